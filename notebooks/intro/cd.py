@@ -1,20 +1,45 @@
 
-import matplotlib.pyplot as plt
-from ipywidgets import interact, fixed
+import importlib.util
+import os
+import sys
 import numpy as np
-plt.style.use('seaborn-whitegrid')
-from mpl_toolkits.mplot3d import *
-from matplotlib import cm
 from scipy.optimize import minimize
 
 
-
-
-plt.style.use('bmh')
-plt.rcParams["figure.figsize"] = [7,7]
-plt.rcParams["axes.spines.right"] = False
-plt.rcParams["axes.spines.top"] = False
-plt.rcParams["font.size"] = 18
+# matplotlib, ipywidgets and mplot3d are only imported on the first plot call,
+# so the functions below can be used without loading the plotting stack.
+# The stand-ins are the ones the trade modules use (trade/lazy.py).
+
+def _lazy_module():
+    '''trade/lazy.py, shared with the trade modules (imported once as `lazy`)'''
+    if 'lazy' not in sys.modules:
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'trade', 'lazy.py')
+        spec = importlib.util.spec_from_file_location('lazy', path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        sys.modules['lazy'] = module
+    return sys.modules['lazy']
+
+_lazy = _lazy_module()
+LazyModule, LazyAttr = _lazy.LazyModule, _lazy.LazyAttr
+
+
+def _plot_style(plt):
+    try:
+        plt.style.use('seaborn-v0_8-whitegrid')
+    except OSError:                     # matplotlib < 3.6
+        plt.style.use('seaborn-whitegrid')
+    plt.style.use('bmh')
+    plt.rcParams["figure.figsize"] = [7,7]
+    plt.rcParams["axes.spines.right"] = False
+    plt.rcParams["axes.spines.top"] = False
+    plt.rcParams["font.size"] = 18
+
+plt = LazyModule('matplotlib.pyplot', on_load=_plot_style)
+cm = LazyModule('matplotlib.cm')
+Axes3D = LazyAttr('mpl_toolkits.mplot3d', 'Axes3D')
+interact = LazyAttr('ipywidgets', 'interact')
+fixed = LazyAttr('ipywidgets', 'fixed')
 
 ALPHA = 1/2
 
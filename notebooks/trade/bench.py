@@ -0,0 +1,937 @@
+# -*- coding: utf-8 -*-
+"""
+Timing harness for the trade model solvers.
+
+Run from this directory:
+
+    python bench.py            # run every benchmark
+    python bench.py hos_batch  # run only benchmarks whose name contains 'hos_batch'
+    python bench.py --suite --json results/HEAD.json --compare results/base.json
+
+Each benchmark prints a one-line summary comparing the new code path
+against the path it replaces.  Guard benchmarks such as `bench_import`
+return False when a budget is exceeded, and the script then exits with
+status 1.  To track timings of the public entry points across commits,
+``--suite`` runs the regression cases registered in benchsuite.py instead
+(with ``--json``, ``--compare``, ``--threshold``, ``--repeat``,
+``--min-time`` and ``--list``).
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+import warnings
+
+import numpy as np
+
+
+def timeit(func, *args, repeat=3, **kwargs):
+    """Best wall-clock time of `repeat` calls to func(*args, **kwargs)."""
+    best = np.inf
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func(*args, **kwargs)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def bench_hos_batch(n=20_000):
+    '''Points/sec of calculate_hos_equilibrium_batch vs the scalar loop.'''
+    import hos
+
+    rng = np.random.default_rng(0)
+    p = rng.uniform(0.9, 1.1, n)
+    Kbar = rng.uniform(80, 120, n)
+    Lbar = rng.uniform(80, 120, n)
+    alpha = rng.uniform(0.55, 0.65, n)
+    beta = rng.uniform(0.35, 0.45, n)
+
+    def scalar_loop():
+        with np.errstate(invalid='ignore'):
+            return [hos.calculate_hos_equilibrium(*args)
+                    for args in zip(p, Kbar, Lbar, alpha, beta)]
+
+    t_scalar = timeit(scalar_loop, repeat=1)
+    t_batch = timeit(hos.calculate_hos_equilibrium_batch, p, Kbar, Lbar, alpha, beta)
+
+    res = hos.calculate_hos_equilibrium_batch(p, Kbar, Lbar, alpha, beta)
+    ref = scalar_loop()
+    err = max(np.nanmax(np.abs(res[k] - np.array([r[k] for r in ref])))
+              for k in ('LA', 'KA', 'QA', 'QM', 'wr'))
+
+    print(f'hos_batch: scalar {n / t_scalar:12,.0f} pts/s   '
+          f'batch {n / t_batch:12,.0f} pts/s   '
+          f'speedup {t_scalar / t_batch:6.0f}x   max abs diff {err:.1e}')
+
+
+def _max_gdp(p, Kbar, Lbar, alpha, beta):
+    '''GDP-maximizing allocation by constrained numerical optimization.'''
+    from scipy.optimize import minimize
+    import hos
+
+    def neg_gdp(x):
+        LA, KA = x
+        return -(p * hos.F(KA, LA, alpha) + hos.G(Kbar - KA, Lbar - LA, beta))
+
+    best = None
+    for x0 in ((Lbar/2, Kbar/2), (0.99*Lbar, 0.99*Kbar), (0.01*Lbar, 0.01*Kbar)):
+        res = minimize(neg_gdp, x0, method='L-BFGS-B', bounds=[(0, Lbar), (0, Kbar)])
+        if best is None or res.fun < best.fun:
+            best = res
+    return -best.fun, best.x[0]
+
+
+def bench_hos_open(n=300, m=1_000_000, shares=((0.6, 0.4), (0.4, 0.6))):
+    '''Regime-aware calculate_open_equilibrium vs numerical GDP maximization.
+
+    Prices span both specialization regimes for each (alpha, beta) in
+    shares, with A capital- and labor-intensive; specialized points must sit
+    exactly on a corner.  The batch is also timed on m points against the
+    diversified-only calculate_hos_equilibrium_batch.'''
+    import hos
+
+    rng = np.random.default_rng(5)
+    p = np.exp(rng.uniform(np.log(0.5), np.log(2), n))
+    Kbar, Lbar = rng.uniform(50, 150, n), rng.uniform(50, 150, n)
+
+    ok = True
+    for alpha, beta in shares:
+        with warnings.catch_warnings(), np.errstate(all='ignore'):
+            warnings.simplefilter('ignore')
+            t_opt = timeit(lambda: [_max_gdp(*args, alpha, beta) for args in zip(p, Kbar, Lbar)], repeat=1)
+            ref = np.array([_max_gdp(*args, alpha, beta) for args in zip(p, Kbar, Lbar)])
+        res = hos.calculate_open_equilibrium(p, Kbar, Lbar, alpha, beta)
+        gdp = p * res.QA + res.QM
+        err = np.max(np.abs(gdp / ref[:, 0] - 1))
+        factor_err = np.max(np.abs((res.w * Lbar + res.r * Kbar) / gdp - 1))   # Euler: income = GDP
+        counts = np.bincount(res.regime, minlength=3)
+        corners = (np.array_equal(res.regime == hos.ONLY_A, (res.LM == 0) & (res.KM == 0))
+                   and np.array_equal(res.regime == hos.ONLY_M, (res.LA == 0) & (res.KA == 0)))
+
+        P = np.exp(rng.uniform(np.log(0.5), np.log(2), m))
+        K, L = rng.uniform(50, 150, m), rng.uniform(50, 150, m)
+        t_open = timeit(hos.calculate_open_equilibrium, P, K, L, alpha, beta)
+        t_cone = timeit(hos.calculate_hos_equilibrium_batch, P, K, L, alpha, beta)
+
+        print(f'hos_open a={alpha} b={beta}: optimize {n / t_opt:8,.0f} pts/s   '
+              f'regime batch {m / t_open:12,.0f} pts/s   (cone-only batch {m / t_cone:12,.0f} pts/s)   '
+              f'max rel gdp diff {err:.1e}   w*L+r*K vs gdp {factor_err:.1e}   '
+              f'regimes {dict(zip(hos.REGIMES, counts.tolist()))}   exact corners {corners}')
+        ok = ok and err < 1e-6 and factor_err < 1e-12 and counts.all() and corners
+    return bool(ok)
+
+
+def _brentq_world_price(Kbar, Lbar, Kbar_f, Lbar_f, alpha, beta, theta):
+    '''World price from brentq on excess demand, one country pair at a time.'''
+    from scipy.optimize import brentq
+    import hos
+
+    def excess_demand(p):
+        h = hos.calculate_open_equilibrium(p, Kbar, Lbar, alpha, beta)
+        f = hos.calculate_open_equilibrium(p, Kbar_f, Lbar_f, alpha, beta)
+        return theta * (h.QM + f.QM) - (1 - theta) * p * (h.QA + f.QA)
+
+    return brentq(excess_demand, 0.01, 100, xtol=1e-14, rtol=1e-13)
+
+
+def bench_hos_world(n=200, m=1_000_000):
+    '''Batched calculate_world_equilibrium vs brentq per country pair.
+
+    Scans how a fixed world endowment is split between the two countries;
+    where both are diversified the price must equal the integrated-world
+    autarky price.'''
+    import hos
+
+    rng = np.random.default_rng(6)
+    s, z = rng.uniform(0.02, 0.98, n), rng.uniform(0.02, 0.98, n)
+    args = (200 * s, 200 * z, 200 * (1 - s), 200 * (1 - z))
+    alpha, beta, theta = 0.6, 0.4, 0.5
+
+    t_brentq = timeit(lambda: [_brentq_world_price(*pair, alpha, beta, theta)
+                               for pair in zip(*args)], repeat=1)
+    ref = np.array([_brentq_world_price(*pair, alpha, beta, theta) for pair in zip(*args)])
+    eq = hos.calculate_world_equilibrium(*args, alpha, beta, theta)
+    err = np.max(np.abs(eq.p / ref - 1))
+    p_int = hos.autarky_equilibrium(alpha, beta, theta, 200, 200)['p']
+    fpe_err = np.max(np.abs(eq.p[eq.fpe] / p_int - 1))
+    balance = np.max(np.abs(eq.p * eq.EA + eq.EM))
+
+    s = np.linspace(0.01, 0.99, m)
+    t_batch = timeit(hos.calculate_world_equilibrium, 200 * s, 100, 200 * (1 - s), 100,
+                     alpha, beta, theta, repeat=1)
+
+    print(f'hos_world: brentq {n / t_brentq:8,.0f} pairs/s   batch {m / t_batch:10,.0f} pairs/s   '
+          f'max rel price diff {err:.1e}   FPE share {eq.fpe.mean():.2f} '
+          f'(price vs integrated {fpe_err:.1e})   trade balance {balance:.1e}')
+    return bool(err < 1e-10 and fpe_err < 1e-10 and eq.converged.all())
+
+
+def bench_hos_multi(n=10_000, worlds=20):
+    '''calculate_multicountry_equilibrium on n countries vs a per-country loop.
+
+    Checks an integrated world (all countries in the cone) against the
+    closed-form integrated equilibrium and a dispersed one (with
+    specialized countries) for market clearing; the loop solves each
+    country at the known world price with the scalar open-economy solver.'''
+    import hos
+
+    rng = np.random.default_rng(7)
+    out, ok = [], True
+    for label, spread in (('integrated', 0.05), ('dispersed', 1.0)):
+        K = rng.lognormal(np.log(100), spread, n)
+        L = rng.lognormal(np.log(100), spread, n)
+        t_multi = timeit(hos.calculate_multicountry_equilibrium, K, L)
+        eq = hos.calculate_multicountry_equilibrium(K, L)
+        t_loop = timeit(lambda: [hos.calculate_open_equilibrium.__wrapped__(eq.p, k, l)
+                                 for k, l in zip(K[:n // 10], L[:n // 10])], repeat=1) * 10
+        clearing = max(abs(eq.EA.sum()) / eq.countries.QA.sum(), abs(eq.EM.sum()) / eq.countries.QM.sum())
+        ok &= bool(eq.integrated) == (label == 'integrated') and clearing < 1e-12 and t_multi < 1
+        if label == 'integrated':
+            ok &= eq.p == eq.p_integrated and np.ptp(eq.countries.w) == 0
+        out.append(f'{label}: {t_multi*1e3:6.1f} ms (loop at known p {t_loop*1e3:7.0f} ms), '
+                   f'in cone {eq.in_cone.mean():.2f}, clearing {clearing:.0e}')
+
+    K = rng.lognormal(np.log(100), 1.0, (worlds, n // worlds))
+    L = rng.lognormal(np.log(100), 1.0, (worlds, n // worlds))
+    t_batch = timeit(hos.calculate_multicountry_equilibrium, K, L)
+    out.append(f'{worlds} worlds batched: {t_batch*1e3:6.1f} ms')
+    print(f'hos_multi ({n:,} countries): ' + '   '.join(out))
+    return bool(ok)
+
+
+def _hos_dict(LA, KA, LM, KM, QA, QM, wr, ka, km):
+    '''The per-call dict calculate_hos_equilibrium used to return.'''
+    return {
+        'LA': LA, 'KA': KA,
+        'LM': LM, 'KM': KM,
+        'QA': QA, 'QM': QM,
+        'wr': wr,
+        'ka_ratio': ka,
+        'km_ratio': km
+    }
+
+
+def bench_hos_records(n=1_000_000):
+    '''HOSResult vs per-call dicts over n evaluations, and a record batch.
+
+    Times building n results and reading a field from each, the memoized
+    calculate_hos_equilibrium hit path, and retained memory for n results
+    held as dicts, as HOSResult objects and as one structured array.
+    '''
+    import tracemalloc
+    import hos
+
+    eq = hos.calculate_hos_equilibrium.__wrapped__(1.0)
+    vals = tuple(eq.values())
+
+    def build(make):
+        total = 0.0
+        for _ in range(n):
+            total += make(*vals)['QA']
+        return total
+
+    t_dict = timeit(build, _hos_dict, repeat=1)
+    t_rec = timeit(build, hos.HOSResult, repeat=1)
+    t_attr = timeit(lambda: sum(hos.HOSResult(*vals).QA for _ in range(n)), repeat=1)
+    hos.calculate_hos_equilibrium(1.0)
+    t_memo = timeit(lambda: [hos.calculate_hos_equilibrium(1.0) for _ in range(n)], repeat=1)
+
+    def retained(make, m=100_000):
+        tracemalloc.start()
+        rows = [make(float(i), *vals[1:]) for i in range(m)]
+        size = tracemalloc.get_traced_memory()[0] / m
+        tracemalloc.stop()
+        del rows
+        return size * n
+
+    mem_dict, mem_rec = retained(_hos_dict), retained(hos.HOSResult)
+    p = np.random.default_rng(5).uniform(0.9, 1.1, n)
+    t0 = time.perf_counter()
+    records = hos.calculate_hos_equilibrium_batch(p).to_records()
+    t_batch = time.perf_counter() - t0
+
+    print(f'hos_records ({n:,}): build+read dict {n / t_dict:10,.0f}/s   HOSResult[key] {n / t_rec:10,.0f}/s   '
+          f'HOSResult.attr {n / t_attr:10,.0f}/s   memo hit {n / t_memo:10,.0f}/s   '
+          f'memory dicts {mem_dict / 2**20:,.0f} MB  records {mem_rec / 2**20:,.0f} MB  '
+          f'structured array {records.nbytes / 2**20:,.0f} MB (batch + to_records {t_batch * 1e3:.0f} ms)')
+
+
+def bench_hos_statics(n=200_000):
+    '''Analytic calculate_comparative_statics vs central finite differences.'''
+    import hos
+
+    rng = np.random.default_rng(7)
+    p = rng.uniform(0.8, 1.25, n)
+    Kbar = rng.uniform(80, 120, n)
+    Lbar = rng.uniform(80, 120, n)
+    h = 1e-5
+
+    def finite_differences():
+        out = {}
+        for name, args_up, args_dn, x in [
+                ('p', (p * (1 + h), Kbar, Lbar), (p * (1 - h), Kbar, Lbar), p),
+                ('Kbar', (p, Kbar * (1 + h), Lbar), (p, Kbar * (1 - h), Lbar), Kbar),
+                ('Lbar', (p, Kbar, Lbar * (1 + h)), (p, Kbar, Lbar * (1 - h)), Lbar)]:
+            up = hos.calculate_hos_equilibrium_batch(*args_up)
+            dn = hos.calculate_hos_equilibrium_batch(*args_dn)
+            out[name] = (up.QA - dn.QA) / (2 * h * x)
+        return out
+
+    t_fd = timeit(finite_differences)
+    t_an = timeit(hos.calculate_comparative_statics, p, Kbar, Lbar)
+    cs = hos.calculate_comparative_statics(p, Kbar, Lbar)
+    fd = finite_differences()
+    err = max(np.nanmax(np.abs(fd[x] / cs[f'dQA_d{x}'] - 1)) for x in fd)
+
+    print(f'hos_statics: finite differences {n / t_fd:12,.0f} pts/s (QA only)   '
+          f'analytic {n / t_an:12,.0f} pts/s (all derivatives)   '
+          f'max rel FD noise {err:.1e}')
+
+
+def _ppf_error(La, Kbar, Lbar, alpha, beta, n_ref=200_001):
+    '''Max distance from a dense sample of the frontier to the PPF polyline
+    through the labor allocations La.'''
+    import hos
+
+    ref = np.linspace(La[0], La[-1], n_ref)
+    qa, qm = hos._ppf_outputs(ref, Kbar, Lbar, alpha, beta)
+    Qa, Qm = hos._ppf_outputs(La, Kbar, Lbar, alpha, beta)
+    seg = np.clip(np.searchsorted(La, ref) - 1, 0, La.size - 2)
+    return np.max(hos._chord_distance(Qa[seg], Qm[seg], Qa[seg + 1], Qm[seg + 1], qa, qm))
+
+
+def bench_hos_ppf(cases=((100, 100, 0.6, 0.4), (100, 100, 0.9, 0.1))):
+    '''Accuracy vs point count: uniform linspace PPF vs adaptive calculate_ppf(tol=).'''
+    import hos
+
+    for Kbar, Lbar, alpha, beta in cases:
+        uniform = []
+        for n in (25, 100, 400, 1600):
+            La = np.linspace(0.1, Lbar - 0.1, n)
+            uniform.append(f'{n}:{_ppf_error(La, Kbar, Lbar, alpha, beta):.0e}')
+        adaptive = []
+        for tol in (1e-1, 1e-2, 1e-3, 1e-4):
+            La = hos._adaptive_ppf_grid(Kbar, Lbar, alpha, beta, tol, 100_000)
+            err = _ppf_error(La, Kbar, Lbar, alpha, beta)
+            adaptive.append(f'{La.size}:{err:.0e}')
+        t = timeit(hos.calculate_ppf, Kbar, Lbar, alpha, beta, tol=1e-3)
+        print(f'hos_ppf (alpha={alpha}, beta={beta}): points:max error  '
+              f'uniform {" ".join(uniform)}   adaptive (tol 1e-1..1e-4) {" ".join(adaptive)}   '
+              f'tol=1e-3 in {t*1e3:.2f} ms')
+
+
+def bench_instrument(n=200_000):
+    '''Per-call cost of the instrumentation hooks, off and on.
+
+    The wrapper overhead is measured on a no-op function so solver noise
+    does not swamp it.  Returns False if a disabled hook adds more than a
+    microsecond per call.
+    '''
+    import hos
+    import instrument
+
+    def noop(x):
+        return x
+
+    wrapped = instrument.instrumented(noop, name='bench.noop')
+    hos.calculate_hos_equilibrium(1.0)
+    cases = [('no-op', noop, wrapped), ('memo hit', None, hos.calculate_hos_equilibrium)]
+
+    ok, parts = True, []
+    for label, raw, func in cases:
+        t_off = timeit(lambda: [func(1.0) for _ in range(n)]) / n
+        with instrument.recording(size=1000):
+            t_on = timeit(lambda: [func(1.0) for _ in range(n)]) / n
+        instrument.clear()
+        if raw is not None:
+            t_raw = timeit(lambda: [raw(1.0) for _ in range(n)]) / n
+            ok &= t_off - t_raw < 1e-6
+            parts.append(f'{label}: raw {t_raw*1e6:5.2f} us  off {t_off*1e6:5.2f} us  on {t_on*1e6:5.2f} us')
+        else:
+            parts.append(f'{label}: off {t_off*1e6:5.2f} us  on {t_on*1e6:5.2f} us')
+    print('instrument: ' + '   '.join(parts))
+    return bool(ok)
+
+
+def bench_tables(n=10_000, tol=0.1):
+    '''Table lookups (tables.py) vs the Newton solve they replace.
+
+    Uses the default SFM table with unequal labor shares (alpha=0.6), so
+    labor_allocation iterates.  Also checks that a per-cell `tol` keeps the observed error
+    at the cell-centre estimate while solving only the coarse cells.
+    Returns False if a lookup is not faster than solving.'''
+    import tables
+
+    rng = np.random.default_rng(5)
+    table = tables.build_sfm_table(alpha=0.6)
+    q = dict(p=rng.uniform(0.5, 2, n), Tbar=rng.uniform(50, 200, n), Kbar=rng.uniform(50, 200, n))
+    exact = table.exact(**q)
+    err = np.max(np.abs(table(**q)['La'] - exact['La']))
+
+    rows = [dict(zip(q, map(float, row))) for row in list(zip(*q.values()))[:1000]]
+    with np.errstate(all='ignore'):
+        t_scalar = timeit(lambda: [table.exact(**row) for row in rows]) / len(rows)
+    t_lookup = timeit(lambda: [table(**row) for row in rows]) / len(rows)
+    t_exact = timeit(table.exact, **q) / n
+    t_batch = timeit(table, **q) / n
+
+    cell = table._locate([q[name] for name in table.axes])[1]
+    coarse = np.mean(table._too_coarse(cell, tol))
+    tol_err = np.max(np.abs(table(tol=tol, **q)['La'] - exact['La']))
+
+    print(f'tables_sfm: scalar solve {t_scalar*1e6:7.1f} us   scalar lookup {t_lookup*1e6:6.1f} us   '
+          f'batch solve {t_exact*1e9:6.0f} ns/pt   batch lookup {t_batch*1e9:5.0f} ns/pt   '
+          f'La max error {err:.1e} (bound {table.error_bound["La"]:.1e}); '
+          f'tol={tol}: {coarse:.0%} of points solved, max error {tol_err:.1e}')
+    return bool(t_lookup < t_scalar and t_batch < t_exact)
+
+
+def bench_sweep(n_side=1500, chunk_size=100_000):
+    '''Points/s and peak traced memory of sweep.run_sweep vs a list of per-point results.'''
+    import tempfile
+    import tracemalloc
+    import hos
+    import sweep
+
+    grid = {'p': np.geomspace(0.5, 2, n_side), 'Kbar': np.linspace(50, 150, n_side)}
+    fixed = {'Lbar': 100, 'alpha': 0.6, 'beta': 0.4}
+    n = n_side**2
+
+    # the list-of-results approach, on a slice small enough to run
+    m = 50_000
+    tracemalloc.start()
+    with np.errstate(invalid='ignore'):
+        rows = [hos.calculate_hos_equilibrium.__wrapped__(p, k, **fixed)
+                for p, k in zip(np.resize(grid['p'], m), np.resize(grid['Kbar'], m))]
+    list_peak = tracemalloc.get_traced_memory()[1] / m
+    tracemalloc.stop()
+    del rows
+
+    with tempfile.TemporaryDirectory() as d:
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        res = sweep.run_sweep('tables.hos_equilibrium', d, grid=grid, fixed=fixed,
+                              chunk_size=chunk_size)
+        seconds = time.perf_counter() - t0
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        qa = float(np.nanmean(res['QA']))
+        del res
+
+    print(f'sweep: {n:,} points in {seconds:.2f} s ({n / seconds:,.0f} pts/s)   '
+          f'peak traced memory {peak / 2**20:.0f} MB (list of results: ~{list_peak * n / 2**20:,.0f} MB)   '
+          f'mean QA {qa:.2f}')
+
+
+def bench_parallel(n=100_000, chunk_size=2_000):
+    '''Scaling of sweep.run_parallel with worker count on a per-point solver.'''
+    import sweep
+
+    rng = np.random.default_rng(6)
+    points = {'alpha': rng.uniform(0.2, 0.8, n), 'beta': rng.uniform(0.2, 0.8, n),
+              'theta': rng.uniform(0.2, 0.8, n)}
+    kwargs = dict(points=points, chunk_size=chunk_size)
+
+    t_serial = timeit(sweep.run_parallel, 'hos.optimize_closed_economy', vectorized=False,
+                      processes=0, repeat=1, **kwargs)
+    line = [f'serial {n / t_serial:9,.0f} pts/s']
+    workers = [w for w in (1, 2, 4, 8, 16) if w <= (os.cpu_count() or 1)]
+    for w in workers:
+        t = timeit(sweep.run_parallel, 'hos.optimize_closed_economy', vectorized=False,
+                   processes=w, repeat=1, **kwargs)
+        line.append(f'{w}w {t_serial / t:5.2f}x')
+    t_batch = timeit(sweep.run_parallel, 'hos.optimize_closed_economy', processes=0, **kwargs)
+
+    print(f'parallel ({os.cpu_count()} cpus): {"   ".join(line)}   '
+          f'batched path {n / t_batch:12,.0f} pts/s')
+
+
+def _nelder_mead_autarky(alpha, beta, theta, Kbar, Lbar):
+    '''The Nelder-Mead autarky solve that optimize_closed_economy used to run.'''
+    from scipy.optimize import minimize
+    import hos
+
+    def objective(X):
+        return -hos.U(hos.F(X[0], X[1], alpha),
+                      hos.G(Kbar - X[0], Lbar - X[1], beta), theta)
+
+    with np.errstate(invalid='ignore'):
+        result = minimize(objective, [Kbar / 2, Lbar / 2], method='Nelder-Mead')
+    return result.x, result.nfev
+
+
+def bench_hos_autarky(n=500):
+    '''Closed-form autarky_equilibrium vs the old Nelder-Mead solve.'''
+    import hos
+
+    rng = np.random.default_rng(1)
+    alpha = rng.uniform(0.2, 0.8, n)
+    beta = np.clip(1 - alpha + rng.uniform(-0.1, 0.1, n), 0.05, 0.95)
+    theta = rng.uniform(0.2, 0.8, n)
+    Kbar = rng.uniform(50, 150, n)
+    Lbar = rng.uniform(50, 150, n)
+    params = list(zip(alpha, beta, theta, Kbar, Lbar))
+
+    nfev = []
+
+    def nelder_mead_loop():
+        nfev.clear()
+        for args in params:
+            nfev.append(_nelder_mead_autarky(*args)[1])
+
+    t_nm = timeit(nelder_mead_loop, repeat=1)
+    t_scalar = timeit(lambda: [hos.optimize_closed_economy(*args) for args in params])
+    t_batch = timeit(hos.autarky_equilibrium, alpha, beta, theta, Kbar, Lbar)
+
+    eq = hos.autarky_equilibrium(alpha, beta, theta, Kbar, Lbar)
+    nm_x = np.array([_nelder_mead_autarky(*args)[0] for args in params[:50]])
+    err = np.max(np.abs(nm_x[:, 1] - eq['LA'][:50]) / Lbar[:50])
+
+    print(f'hos_autarky: nelder-mead {n / t_nm:10,.0f} solves/s ({np.mean(nfev):.0f} fev/solve)   '
+          f'closed-form scalar {n / t_scalar:10,.0f} solves/s   '
+          f'batch {n / t_batch:12,.0f} solves/s   max rel LA diff {err:.1e}')
+
+
+def _fsolve_eqn(p, Lbar, Tbar, Kbar):
+    '''The fsolve labor-market solve that sfm.eqn used to run.'''
+    from scipy.optimize import fsolve
+    import sfm
+
+    def func(La):
+        return p*sfm.MPLa(La, Tbar) - sfm.MPLm(Lbar-La, Kbar)
+    return fsolve(func, 1)[0]
+
+
+def bench_sfm_eqn(n=2_000):
+    '''sfm.labor_allocation (closed form and Newton) vs the old fsolve.'''
+    import sfm
+
+    rng = np.random.default_rng(2)
+    p = rng.uniform(0.5, 2, n)
+    Lbar = rng.uniform(100, 400, n)
+    Tbar, Kbar = 100.0, 100.0
+
+    t_fsolve = timeit(lambda: [_fsolve_eqn(pi, Li, Tbar, Kbar) for pi, Li in zip(p, Lbar)])
+    t_scalar = timeit(lambda: [sfm.labor_allocation(pi, Li, Tbar, Kbar) for pi, Li in zip(p, Lbar)])
+    t_batch = timeit(sfm.labor_allocation, p, Lbar, Tbar, Kbar)
+
+    ref = np.array([_fsolve_eqn(pi, Li, Tbar, Kbar) for pi, Li in zip(p, Lbar)])
+    err = np.max(np.abs(sfm.labor_allocation(p, Lbar, Tbar, Kbar) - ref))
+
+    unequal = sfm.SFMParams(alpha=0.6)      # unequal labor shares take the Newton path
+    t_newton = timeit(sfm.labor_allocation, p, Lbar, Tbar, Kbar, params=unequal)
+
+    print(f'sfm_eqn: fsolve {n / t_fsolve:10,.0f} calls/s   '
+          f'closed-form scalar {n / t_scalar:10,.0f} calls/s   '
+          f'batch {n / t_batch:12,.0f} calls/s   newton batch {n / t_newton:12,.0f} calls/s   '
+          f'max abs diff {err:.1e}')
+
+
+def _newton_iterations(p, Lbar, Tbar, Kbar, params, tol=1e-12):
+    '''Newton steps labor_allocation takes (one gap and slope evaluation each).'''
+    import sfm
+
+    La = sfm.labor_allocation(p, Lbar, Tbar, Kbar, tol=tol, params=params)
+    for k in range(1, 101):
+        if abs(sfm.labor_allocation(p, Lbar, Tbar, Kbar, tol=tol, maxiter=k, params=params) - La) <= tol*Lbar:
+            return k
+    return k
+
+
+def bench_kernel_derivatives(n=200):
+    '''Function evaluations per solve with and without exact derivatives.
+
+    Dual-number derivatives of the model kernels are fed to the scipy solves
+    the modules used to run (fsolve for sfm.eqn, a gradient-based minimize
+    for hos autarky) and compared with derivative-free runs and with the
+    current Newton / closed-form solvers.  Returns False if a dual
+    derivative disagrees with the hand-derived one.
+    '''
+    from scipy.optimize import fsolve, minimize
+    import hos
+    import sfm
+    from dual import derivative, jacobian
+
+    rng = np.random.default_rng(4)
+    p = rng.uniform(0.5, 2, n)
+    Lbar = rng.uniform(100, 400, n)
+    Tbar, Kbar = 100.0, 100.0
+
+    params = sfm.SFMParams(alpha=0.6)       # unequal labor shares: labor_allocation iterates
+
+    # hand-derived Newton slope vs the dual derivative of log_wage_gap
+    La = Lbar * rng.uniform(0.05, 0.95, n)
+    _, dg_dual = derivative(sfm.log_wage_gap, La, p, Lbar, Tbar, Kbar, params=params)
+    _, dg_hand = sfm.log_wage_gap(La, p, Lbar, Tbar, Kbar, params=params, slope=True)
+    slope_err = np.max(np.abs(dg_dual/dg_hand - 1))
+
+    fev_plain, fev_exact = [], []
+    for pi, Li in zip(p, Lbar):
+        def gap(x):
+            return sfm.log_wage_gap(x[0], pi, Li, Tbar, Kbar, params=params)
+
+        def fprime(x):
+            return derivative(sfm.log_wage_gap, x[0], pi, Li, Tbar, Kbar,
+                              params=params)[1].reshape(1, 1)
+
+        _, info, *_ = fsolve(gap, [Li/2], full_output=True)
+        fev_plain.append(info['nfev'])
+        _, info, *_ = fsolve(gap, [Li/2], fprime=fprime, full_output=True)
+        fev_exact.append(info['nfev'] + info['njev'])
+    fev_newton = [2 * _newton_iterations(pi, Li, Tbar, Kbar, params) for pi, Li in zip(p, Lbar)]
+
+    print(f'kernel sfm_eqn: fsolve {np.mean(fev_plain):5.1f} evals/solve   '
+          f'fsolve+dual fprime {np.mean(fev_exact):5.1f}   '
+          f'newton {np.mean(fev_newton):5.1f} (gap+slope)   '
+          f'dual vs hand slope max rel diff {slope_err:.1e}')
+
+    # hos autarky: maximize log utility over (KA, LA)
+    m = 50
+    a = rng.uniform(0.3, 0.7, m)
+    b = np.clip(1 - a + rng.uniform(-0.1, 0.1, m), 0.05, 0.95)
+    th = rng.uniform(0.3, 0.7, m)
+    Kb = rng.uniform(50, 150, m)
+    Lb = rng.uniform(50, 150, m)
+
+    def neg_log_u(x, ai, bi, ti, Ki, Li):
+        return -np.log(hos.U(hos.F(x[0], x[1], ai), hos.G(Ki - x[0], Li - x[1], bi), ti))
+
+    def grad(x, *args):
+        return jacobian(lambda y: [neg_log_u(y, *args)], x)[1][0]
+
+    fev_nm, fev_bfgs, fev_jac, err = [], [], [], 0.0
+    eq = hos.autarky_equilibrium(a, b, th, Kb, Lb)
+    bounds = [(1e-6, None)] * 2
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for i, args in enumerate(zip(a, b, th, Kb, Lb)):
+            x0 = [args[3]/2, args[4]/2]
+            fev_nm.append(minimize(neg_log_u, x0, args, method='Nelder-Mead').nfev)
+            fev_bfgs.append(minimize(neg_log_u, x0, args, method='BFGS').nfev)
+            res = minimize(neg_log_u, x0, args, method='BFGS', jac=grad)
+            fev_jac.append(res.nfev + res.njev)
+            err = max(err, abs(res.x[1] - eq['LA'][i]) / args[4])
+
+    print(f'kernel hos_autarky: nelder-mead {np.mean(fev_nm):5.1f} evals/solve   '
+          f'bfgs {np.mean(fev_bfgs):5.1f}   bfgs+dual jac {np.mean(fev_jac):5.1f} (f+grad)   '
+          f'closed form 1   max rel LA diff {err:.1e}')
+    return bool(slope_err < 1e-12)
+
+
+def _nested_p_autarky(Lbar, Tbar, Kbar):
+    '''The fsolve-over-fsolve autarky price search sfm.p_autarky used to run.'''
+    from scipy.optimize import fsolve
+    import sfm
+
+    def excessdemandA(p):
+        LAe = _fsolve_eqn(p[0], Lbar, Tbar, Kbar)
+        gdp = p[0]*sfm.F(LAe, Tbar) + sfm.G(Lbar - LAe, Kbar)
+        return sfm.F(LAe, Tbar) - gdp/(2*p[0])
+    return fsolve(excessdemandA, 1)[0]
+
+
+def bench_sfm_autarky(n=200):
+    '''Closed-form sfm.p_autarky over an Lbar sweep vs nested fsolve.'''
+    import sfm
+
+    Lbar = np.linspace(100, 400, n)
+    t_nested = timeit(lambda: [_nested_p_autarky(L, 100, 100) for L in Lbar], repeat=1)
+    t_batch = timeit(sfm.p_autarky.__wrapped__, Lbar, 100, 100)
+    ref = np.array([_nested_p_autarky(L, 100, 100) for L in Lbar])
+    err = np.max(np.abs(sfm.p_autarky(Lbar, 100, 100) - ref))
+
+    print(f'sfm_autarky: nested fsolve {n / t_nested:10,.0f} solves/s   '
+          f'closed-form batch {n / t_batch:14,.0f} solves/s   max abs diff {err:.1e}')
+
+
+def _brentq_nsector_wage(p, S, a, Lbar):
+    '''Market-clearing wage of one N-sector price scenario by brentq.'''
+    from scipy.optimize import brentq
+
+    def excess_labor(logw):
+        return np.log(np.sum(S * (a * p / np.exp(logw))**(1 / (1 - a)))) - np.log(Lbar)
+    return np.exp(brentq(excess_labor, -50, 50, xtol=1e-14))
+
+
+def bench_sfm_nsector(n=200, m=5_000, sectors=50):
+    '''sfm.nsector_eqn on m price scenarios vs brentq per scenario.
+
+    Also checks that two sectors reproduce sfm.eqn.'''
+    import sfm
+
+    params = sfm.SFMParams(alpha=0.6)
+    p2 = np.linspace(0.5, 2, 101)
+    two = sfm.nsector_eqn(np.stack([p2, np.ones_like(p2)], -1), [params.Tbar, params.Kbar],
+                          [params.alpha, params.beta], params=params)
+    two_err = np.max(np.abs(two['L'][:, 0] - sfm.eqn(p2, params=params)[0])) / params.Lbar
+
+    rng = np.random.default_rng(8)
+    S, a = rng.uniform(10, 200, sectors), rng.uniform(0.1, 0.9, sectors)
+    P = rng.lognormal(0, 0.5, (m, sectors))
+    t_brentq = timeit(lambda: [_brentq_nsector_wage(pi, S, a, 1000) for pi in P[:n]], repeat=1)
+    t_batch = timeit(sfm.nsector_eqn, P, S, a, 1000)
+
+    eq = sfm.nsector_eqn(P, S, a, 1000)
+    ref = np.array([_brentq_nsector_wage(pi, S, a, 1000) for pi in P[:n]])
+    err = np.max(np.abs(eq['w'][:n] / ref - 1))
+    clearing = np.max(np.abs(eq['L'].sum(-1) / 1000 - 1))
+
+    print(f'sfm_nsector ({sectors} sectors): brentq {n / t_brentq:8,.0f} scenarios/s   '
+          f'batch {m / t_batch:10,.0f} scenarios/s   max rel wage diff {err:.1e}   '
+          f'clearing {clearing:.1e}   2-sector vs eqn {two_err:.1e}')
+    return bool(err < 1e-12 and clearing < 1e-12 and two_err < 1e-10)
+
+
+def _fsolve_tariff(p, t, Lbar, Tbar, Kbar):
+    '''Tariff equilibrium point by point: fsolve the labor market at the
+    domestic price, then fsolve the income-with-rebate fixed point.'''
+    from scipy.optimize import fsolve
+    import sfm
+
+    pt = p*(1 + t)
+    La = _fsolve_eqn(pt, Lbar, Tbar, Kbar)
+    X, Y = sfm.F(La, Tbar), sfm.G(Lbar - La, Kbar)
+    income = fsolve(lambda I: I - (pt*X + Y + (pt - p)*(I/(2*pt) - X)), pt*X + Y)[0]
+    return sfm.u(income/(2*pt), income/2)
+
+
+def bench_sfm_tariff(n=200, m=1_000):
+    '''Batched sfm.tariff_equilibrium over a (p, t) grid vs per-point fsolve.
+
+    The reference loop solves n points; the batch solves an m x m grid.'''
+    import sfm
+
+    rng = np.random.default_rng(4)
+    p = rng.uniform(0.3, 0.9, n)             # importers of the ag good
+    t = rng.uniform(0, 1, n) * (1/p - 1)     # below the prohibitive tariff
+    t_fsolve = timeit(lambda: [_fsolve_tariff(pi, ti, 400, 100, 100) for pi, ti in zip(p, t)],
+                      repeat=1)
+    ref = np.array([_fsolve_tariff(pi, ti, 400, 100, 100) for pi, ti in zip(p, t)])
+    err = np.max(np.abs(sfm.tariff_equilibrium(p, t)['welfare'] / ref - 1))
+
+    P, T = np.linspace(0.3, 2, m)[:, None], np.linspace(0, 1, m)
+    t_grid = timeit(sfm.tariff_equilibrium, P, T, repeat=1)
+    t_opt, _, _ = sfm.optimal_tariff(P[:, 0], T)
+
+    print(f'sfm_tariff: fsolve {n / t_fsolve:10,.0f} points/s   '
+          f'batch grid {m*m / t_grid:12,.0f} points/s   max rel welfare diff {err:.1e}   '
+          f'optimal tariff {t_opt.min():.2f}..{t_opt.max():.2f}')
+    return bool(err < 1e-9 and not t_opt.any())
+
+
+def _fsolve_rworldprice(mplx, mply, lbar, mplfx, mplfy, lbarf):
+    '''The fsolve search on the step-shaped excess demand ricardo used to run.'''
+    from scipy.optimize import fsolve
+    import ricardo
+
+    def xsdemand(p):
+        qx, _, cx, _ = ricardo.openeq(mplx, mply, lbar, p[0])
+        qfx, _, cfx, _ = ricardo.openeq(mplfx, mplfy, lbarf, p[0])
+        return (cx + cfx) - (qx + qfx)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        return fsolve(xsdemand, (mply/mplx + mplfy/mplfx)/2)[0]
+
+
+def bench_ricardo_worldprice(n=2_000):
+    '''Exact rworld_equilibrium vs fsolve on the step-function excess demand.'''
+    import ricardo
+
+    rng = np.random.default_rng(3)
+    args = [rng.uniform(0.5, 3, n), rng.uniform(0.5, 3, n), rng.uniform(50, 200, n),
+            rng.uniform(0.5, 3, n), rng.uniform(0.5, 3, n), rng.uniform(50, 200, n)]
+    rows = list(zip(*args))
+
+    t_fsolve = timeit(lambda: [_fsolve_rworldprice(*row) for row in rows], repeat=1)
+    t_batch = timeit(ricardo.rworld_equilibrium, *args)
+
+    eq = ricardo.rworld_equilibrium(*args)
+    xs = eq['cx'] + eq['cfx'] - eq['qx'] - eq['qfx']
+    p_fsolve = np.array([_fsolve_rworldprice(*row) for row in rows])
+    wrong = np.mean(np.abs(p_fsolve - eq['p']) > 1e-6 * eq['p'])
+
+    print(f'ricardo_worldprice: fsolve {n / t_fsolve:10,.0f} solves/s   '
+          f'exact batch {n / t_batch:12,.0f} solves/s   '
+          f'max |excess demand| {np.max(np.abs(xs)):.1e}   fsolve off in {wrong:.0%} of cases')
+
+
+def _world_residual(mpl, lbar, shares, eq):
+    '''Labor and goods market imbalance (relative) of a world_equilibrium result.'''
+    A, b = 1/np.asarray(mpl), np.asarray(shares)/np.sum(shares)
+    income = eq['income'].sum()
+    return max(np.abs((A*eq['Q']).sum(axis=1) - lbar).max()/lbar.max(),
+               np.abs(eq['prices']*eq['Q'].sum(axis=0) - b*income).max()/income)
+
+
+def bench_ricardo_world(n_countries=1000, n_goods=100, n_random=20):
+    '''world_equilibrium on an Eaton-Kortum style productivity draw, plus
+    market-clearing residuals over independent lognormal draws (300x30 and
+    30x300, where the interior point iterations used to stall).  Returns
+    False if any result misses an equilibrium.'''
+    import ricardo
+
+    rng = np.random.default_rng(4)
+    mpl = rng.lognormal(0, 1, (n_countries, 1)) * rng.weibull(4, (n_countries, n_goods))
+    lbar = rng.uniform(1, 10, n_countries)
+    shares = rng.dirichlet(np.ones(n_goods))
+
+    t = timeit(ricardo.world_equilibrium, mpl, lbar, shares)
+    eq = ricardo.world_equilibrium(mpl, lbar, shares)
+    undercut = np.max(1 - (mpl**-1 * eq['wages'][:, None]).min(axis=0)/eq['prices'])
+    nit, exact = eq['iterations'], eq['exact']
+    residual = [_world_residual(mpl, lbar, shares, eq)]
+    converged = [eq['converged']]
+
+    rng = np.random.default_rng(1)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        for shape in [(300, 30)]*n_random + [(30, 300)]*n_random:
+            mpl = rng.lognormal(0, 1, shape)
+            lbar = rng.uniform(1, 10, shape[0])
+            shares = rng.dirichlet(np.ones(shape[1]))
+            eq = ricardo.world_equilibrium(mpl, lbar, shares)
+            residual.append(_world_residual(mpl, lbar, shares, eq))
+            converged.append(eq['converged'])
+
+    # the two-good, two-country case agrees with the exact regime solver
+    two = ricardo.world_equilibrium([[2, 1], [1, 2.5]], [100, 80], numeraire=1)
+    p2 = ricardo.rworldprice(2, 1, 100, 1, 2.5, 80)
+
+    print(f'ricardo_world: {n_countries}x{n_goods} in {t*1e3:7.1f} ms   '
+          f'{nit} IPM iterations   exact={exact}   '
+          f'max undercut {undercut:.1e}   2x2 price diff {abs(two["prices"][0] - p2):.1e}   '
+          f'{sum(converged)}/{len(converged)} converged, max residual {max(residual):.1e}')
+    return bool(all(converged) and max(residual) < 1e-6 and abs(two['prices'][0] - p2) < 1e-9)
+
+
+def bench_render(n=48, processes=4):
+    '''Figures/s of render.render_batch in-process vs across a process pool.'''
+    import tempfile
+    import render
+
+    def jobs(directory):
+        out = []
+        for i, p in enumerate(np.linspace(0.5, 2, n)):
+            job = [('hos.plot_ppf', {'LA': 20 + i}, 'png'),
+                   ('sfm.sfmplot', {'p': p}, 'png'),
+                   ('ricardo.rtwopane', {'p': p}, 'svg'),
+                   ('cd.consume_plot', {'p': p, 'I': 100}, 'png')][i % 4]
+            out.append(render.RenderJob(job[0], job[1], os.path.join(directory, f'{i:04d}.{job[2]}')))
+        return out
+
+    with tempfile.TemporaryDirectory() as d:
+        serial = render.render_batch(jobs(d), processes=0)
+        pooled = render.render_batch(jobs(d), processes=processes)
+        written = len(os.listdir(d))
+
+    print(f'render: in-process {serial.throughput:6.1f} figures/s   '
+          f'{processes} workers {pooled.throughput:6.1f} figures/s   '
+          f'peak worker RSS {pooled.peak_rss_mb:.0f} MB   '
+          f'{written} files, {len(serial.failed) + len(pooled.failed)} failures')
+
+
+def bench_liveplot(frames=40):
+    '''Slider-sweep frames/s: rebuild-per-call plot functions vs LivePlot updates.'''
+    import contextlib
+    import io
+    import matplotlib
+    matplotlib.use('Agg')
+    import hos
+    import sfm
+    plt = hos.plt
+
+    diagrams = [('edgeworth', hos.plot_edgeworth_box, hos.EdgeworthBoxPlot, 'LA', (5, 95)),
+                ('lerner', hos.plot_lerner_diagram, hos.LernerDiagramPlot, 'p', (0.5, 2)),
+                ('sfm', sfm.sfmplot2, sfm.SFMPlot, 'p', (0.5, 2))]
+
+    for name, plot, Live, param, (lo, hi) in diagrams:
+        values = np.linspace(lo, hi, frames)
+
+        def rebuild():
+            with contextlib.redirect_stdout(io.StringIO()), warnings.catch_warnings():
+                warnings.simplefilter('ignore')
+                for v in values:
+                    plot(v)
+                    plt.gcf().canvas.draw()
+                    plt.close('all')
+
+        def live(blit):
+            diagram = Live(**{param: lo}, blit=blit).draw()
+            for v in values:
+                diagram.update(**{param: v})
+            plt.close(diagram.fig)
+
+        t_rebuild = timeit(rebuild, repeat=1)
+        t_live = timeit(live, False, repeat=1)
+        t_blit = timeit(live, True, repeat=1)
+        print(f'liveplot_{name}: rebuild {frames / t_rebuild:6.1f} fps   '
+              f'update {frames / t_live:6.1f} fps   blit {frames / t_blit:7.1f} fps')
+
+
+IMPORT_BUDGET_MS = 300   # cumulative import time allowed per model module
+HEAVY_MODULES = ('matplotlib', 'ipywidgets', 'seaborn', 'mpl_toolkits', 'scipy')
+
+
+def _import_profile(module):
+    '''Cumulative import time (ms) of `module` in a fresh interpreter and the
+    heavy packages it dragged in, from ``python -X importtime``.'''
+    code = (f'import sys, {module}; '
+            f'print(" ".join(m for m in {HEAVY_MODULES!r} if m in sys.modules))')
+    out = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                         cwd=os.path.dirname(os.path.abspath(__file__)),
+                         capture_output=True, text=True, check=True)
+    cumulative = 0
+    for line in out.stderr.splitlines():
+        fields = line.split('|')
+        if len(fields) == 3 and fields[2].strip() == module and fields[2].startswith(' ' + module):
+            cumulative = int(fields[1]) / 1e3
+    return cumulative, out.stdout.split()
+
+
+def bench_import(modules=('hos', 'sfm', 'ricardo'), repeat=3):
+    '''Headless import time of each model module against IMPORT_BUDGET_MS.'''
+    ok = True
+    for module in modules:
+        ms, heavy = min(_import_profile(module) for _ in range(repeat))
+        within = ms <= IMPORT_BUDGET_MS and not heavy
+        ok &= within
+        print(f'import_{module}: {ms:7.1f} ms (budget {IMPORT_BUDGET_MS} ms)   '
+              f'heavy modules loaded: {", ".join(heavy) or "none"}   '
+              f'{"ok" if within else "OVER BUDGET"}')
+    return ok
+
+
+BENCHMARKS = [bench_import, bench_hos_batch, bench_hos_open, bench_hos_world, bench_hos_multi, bench_hos_records, bench_hos_statics, bench_hos_ppf, bench_hos_autarky, bench_sfm_eqn, bench_sfm_autarky, bench_sfm_tariff, bench_sfm_nsector,
+              bench_kernel_derivatives, bench_instrument,
+              bench_tables, bench_sweep, bench_parallel,
+              bench_ricardo_worldprice, bench_ricardo_world, bench_render,
+              bench_liveplot]
+
+
+if __name__ == "__main__":
+    import benchsuite
+
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('patterns', nargs='*',
+                        help='run only benchmarks (or suite cases) whose name contains one of these')
+    parser.add_argument('--suite', action='store_true',
+                        help='time the benchsuite regression cases instead')
+    parser.add_argument('--json', help='write suite results to this file')
+    parser.add_argument('--compare', help='suite results file to compare against')
+    parser.add_argument('--threshold', type=float, default=benchsuite.THRESHOLD,
+                        help='median-time ratio counted as a regression (default %(default)s)')
+    parser.add_argument('--repeat', type=int, default=benchsuite.REPEAT)
+    parser.add_argument('--min-time', type=float, default=benchsuite.MIN_TIME)
+    parser.add_argument('--list', action='store_true', help='list the suite cases and exit')
+    args = parser.parse_args()
+
+    if args.suite or args.json or args.compare or args.list:
+        sys.exit(benchsuite.main(args))
+    failed = False
+    for bench in BENCHMARKS:
+        name = bench.__name__[len('bench_'):]
+        if not args.patterns or any(s in name for s in args.patterns):
+            failed |= bench() is False
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,396 @@
+# -*- coding: utf-8 -*-
+"""
+Regression benchmark suite for the trade solvers and plot functions.
+
+Run through bench.py, the single benchmark entry point (no network or
+extra packages needed):
+
+    python bench.py --suite                            # run every case, print a table
+    python bench.py --suite sfm ricardo                # only cases whose name contains a pattern
+    python bench.py --suite --json results/HEAD.json   # also record the timings
+    python bench.py --suite --compare results/base.json
+
+The other benchmarks in bench.py compare a new code path with the one it
+replaced.  The cases here instead time one public entry point each, on
+fixed scalar and large-array inputs, so timings recorded at two commits
+can be compared: ``--compare`` prints the ratio of median times per case
+and exits with status 1 if any case got slower than ``--threshold``
+(default 1.25x).
+
+A case is a function registered with `case` that does its setup and
+returns the zero-argument callable to time, as in asv:
+
+    @case('sfm.eqn[array]')
+    def _():
+        p = np.linspace(0.5, 2, LARGE)
+        return lambda: sfm.eqn(p)
+
+Plot cases draw to the non-interactive Agg canvas and close the figure.
+"""
+
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+LARGE = 1_000_000      # points in the large-array cases
+MIN_TIME = 0.05        # seconds per sample; calls per sample are chosen to reach it
+REPEAT = 5             # samples per case
+THRESHOLD = 1.25       # median-time ratio reported as a regression
+
+CASES: Dict[str, Callable[[], Callable[[], object]]] = {}
+
+
+def case(name: str):
+    """Register a benchmark case under `name` (``module.function[variant]``)."""
+    def register(setup):
+        CASES[name] = setup
+        return setup
+    return register
+
+
+def _cd():
+    """The consumer-choice module, which lives one directory up."""
+    parent = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+    if parent not in sys.path:
+        sys.path.append(parent)
+    import cd
+    return cd
+
+
+def _draw(plot, *args, **kwargs):
+    """Callable that runs a plot function and renders the resulting figure."""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            plot(*args, **kwargs)
+        plt.gcf().canvas.draw()
+        plt.close('all')
+    return run
+
+
+# ============================================================================
+# Solver cases
+# ============================================================================
+
+@case('hos.calculate_hos_equilibrium[scalar]')
+def _():
+    import hos
+    return lambda: hos.calculate_hos_equilibrium.__wrapped__(1.0, 100, 100, 0.6, 0.4)
+
+
+@case('hos.calculate_hos_equilibrium[cached]')
+def _():
+    import hos
+    return lambda: hos.calculate_hos_equilibrium(1.0, 100, 100, 0.6, 0.4)
+
+
+@case('hos.calculate_hos_equilibrium_batch[array]')
+def _():
+    import hos
+    p = np.linspace(0.9, 1.1, LARGE)
+    return lambda: hos.calculate_hos_equilibrium_batch(p, 100, 100, 0.6, 0.4)
+
+
+@case('hos.calculate_open_equilibrium[array]')
+def _():
+    import hos
+    p = np.geomspace(0.5, 2, LARGE)
+    return lambda: hos.calculate_open_equilibrium(p, 100, 100, 0.6, 0.4)
+
+
+@case('hos.calculate_world_equilibrium[array]')
+def _():
+    import hos
+    s = np.linspace(0.01, 0.99, LARGE // 10)
+    return lambda: hos.calculate_world_equilibrium(200 * s, 100, 200 * (1 - s), 100)
+
+
+@case('hos.calculate_multicountry_equilibrium[10000]')
+def _():
+    import hos
+    rng = np.random.default_rng(0)
+    K, L = rng.lognormal(np.log(100), 1.0, (2, 10_000))
+    return lambda: hos.calculate_multicountry_equilibrium(K, L)
+
+
+@case('hos.optimize_closed_economy[scalar]')
+def _():
+    import hos
+    return lambda: hos.optimize_closed_economy(0.6, 0.4, 0.5, 100, 100)
+
+
+@case('hos.autarky_equilibrium[array]')
+def _():
+    import hos
+    theta = np.linspace(0.2, 0.8, LARGE)
+    return lambda: hos.autarky_equilibrium(0.6, 0.4, theta, 100, 100)
+
+
+@case('hos.calculate_ppf[n=100]')
+def _():
+    import hos
+    return lambda: hos.calculate_ppf(100, 100, 0.6, 0.4, n_points=100)
+
+
+@case('hos.calculate_ppf[tol=1e-4]')
+def _():
+    import hos
+    return lambda: hos.calculate_ppf(100, 100, 0.6, 0.4, tol=1e-4)
+
+
+@case('sfm.eqn[scalar]')
+def _():
+    import sfm
+    return lambda: sfm.eqn.__wrapped__(1.5)
+
+
+@case('sfm.eqn[array]')
+def _():
+    import sfm
+    p = np.linspace(0.5, 2, LARGE)
+    return lambda: sfm.eqn(p)
+
+
+@case('sfm.eqn[array, newton]')
+def _():
+    import sfm
+    p = np.linspace(0.5, 2, LARGE // 10)
+    params = sfm.SFMParams(alpha=0.6)
+    return lambda: sfm.eqn(p, params=params)
+
+
+@case('sfm.p_autarky[scalar]')
+def _():
+    import sfm
+    return lambda: sfm.p_autarky.__wrapped__(300)
+
+
+@case('sfm.p_autarky[array]')
+def _():
+    import sfm
+    Lbar = np.linspace(100, 400, LARGE)
+    return lambda: sfm.p_autarky(Lbar)
+
+
+@case('sfm.tariff_equilibrium[grid]')
+def _():
+    import sfm
+    p, t = np.linspace(0.3, 2, 1000)[:, None], np.linspace(0, 1, LARGE // 1000)
+    return lambda: sfm.tariff_equilibrium(p, t)
+
+
+@case('sfm.nsector_eqn[50 sectors]')
+def _():
+    import sfm
+    rng = np.random.default_rng(0)
+    S, a = rng.uniform(10, 200, 50), rng.uniform(0.1, 0.9, 50)
+    p = rng.lognormal(0, 0.5, (5_000, 50))
+    return lambda: sfm.nsector_eqn(p, S, a, 1000)
+
+
+@case('ricardo.rworldprice[scalar]')
+def _():
+    import ricardo
+    return lambda: ricardo.rworldprice.__wrapped__(2, 1, 100, 1, 2, 100)
+
+
+@case('ricardo.rworldprice[array]')
+def _():
+    import ricardo
+    lbarf = np.linspace(50, 200, LARGE)
+    return lambda: ricardo.rworldprice(2, 1, 100, 1, 2, lbarf)
+
+
+@case('cd.cd_demands[scalar]')
+def _():
+    cd = _cd()
+    return lambda: cd.cd_demands(1.5, 100)
+
+
+@case('cd.cd_demands[array]')
+def _():
+    cd = _cd()
+    p = np.linspace(0.5, 2, LARGE)
+    return lambda: cd.cd_demands(p, 100)
+
+
+# ============================================================================
+# Plot cases
+# ============================================================================
+
+@case('hos.plot_lerner_diagram')
+def _():
+    import hos
+    return _draw(hos.plot_lerner_diagram, 1.0)
+
+
+@case('hos.plot_edgeworth_box')
+def _():
+    import hos
+    return _draw(hos.plot_edgeworth_box, 40)
+
+
+@case('hos.plot_ppf')
+def _():
+    import hos
+    return _draw(hos.plot_ppf, 40)
+
+
+@case('hos.plot_closed_economy')
+def _():
+    import hos
+    return _draw(hos.plot_closed_economy)
+
+
+@case('hos.plot_rybczynski')
+def _():
+    import hos
+    return _draw(hos.plot_rybczynski, 1.0)
+
+
+@case('sfm.sfmplot2')
+def _():
+    import sfm
+    return _draw(sfm.sfmplot2, 1.5)
+
+
+@case('sfm.sfmtrade')
+def _():
+    import sfm
+    return _draw(sfm.sfmtrade, 1.5)
+
+
+@case('sfm.open_trade')
+def _():
+    import sfm
+    return _draw(sfm.open_trade, 0.5, 0.2, dt=True)
+
+
+@case('sfm.open_trade[subsidy]')
+def _():
+    import sfm
+    return _draw(sfm.open_trade, 0.5, 0.2, dt=True, subsidy=True)
+
+
+@case('ricardo.rtwopane')
+def _():
+    import ricardo
+    return _draw(ricardo.rtwopane, p=1)
+
+
+@case('cd.consume_plot')
+def _():
+    cd = _cd()
+    return _draw(cd.consume_plot, 1.5, 100)
+
+
+# ============================================================================
+# Running, recording and comparing
+# ============================================================================
+
+def time_case(func: Callable[[], object], repeat: int = REPEAT,
+              min_time: float = MIN_TIME) -> Dict[str, float]:
+    """Per-call timings of func: calls per sample are doubled until one
+    sample takes at least `min_time`, then `repeat` samples are taken."""
+    func()                                  # warm up imports and caches
+    number = 1
+    while True:
+        t0 = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - t0
+        if elapsed >= min_time:
+            break
+        number *= 2
+    samples = [elapsed / number]
+    for _ in range(repeat - 1):
+        t0 = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - t0) / number)
+    return {'min': min(samples), 'median': float(np.median(samples)),
+            'number': number, 'repeat': repeat}
+
+
+def run_suite(patterns: Optional[List[str]] = None, repeat: int = REPEAT,
+              min_time: float = MIN_TIME) -> Dict[str, Dict[str, float]]:
+    """Time every case whose name contains one of `patterns` (all if None)."""
+    results = {}
+    for name, setup in CASES.items():
+        if patterns and not any(p in name for p in patterns):
+            continue
+        with np.errstate(all='ignore'):
+            results[name] = time_case(setup(), repeat, min_time)
+        print(f'{name:48s} {_fmt(results[name]["median"]):>10s}', flush=True)
+    return results
+
+
+def environment() -> Dict[str, str]:
+    """Commit, versions and machine recorded alongside the timings."""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                text=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    import matplotlib
+    return {'commit': commit,
+            'date': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(), 'numpy': np.__version__,
+            'matplotlib': matplotlib.__version__,
+            'machine': f'{platform.system()} {platform.machine()}, {os.cpu_count()} cpus'}
+
+
+def compare(results: Dict, base: Dict, threshold: float = THRESHOLD) -> List[str]:
+    """Print median-time ratios against `base`; return the regressed cases."""
+    print(f'\ncompared with {base["environment"].get("commit")} ({base["environment"]["date"]}):')
+    regressed = []
+    for name, new in results.items():
+        old = base['results'].get(name)
+        if old is None:
+            print(f'{name:48s} {"new":>10s}')
+            continue
+        ratio = new['median'] / old['median']
+        flag = 'slower' if ratio > threshold else 'faster' if ratio < 1/threshold else ''
+        if flag == 'slower':
+            regressed.append(name)
+        print(f'{name:48s} {_fmt(old["median"]):>10s} -> {_fmt(new["median"]):>10s}  {ratio:5.2f}x {flag}')
+    return regressed
+
+
+def _fmt(seconds: float) -> str:
+    for unit, scale in (('s', 1), ('ms', 1e-3), ('us', 1e-6)):
+        if seconds >= scale:
+            return f'{seconds / scale:.3g} {unit}'
+    return f'{seconds / 1e-9:.3g} ns'
+
+
+def main(args) -> int:
+    """Run the suite for the command line parsed by bench.py; exit status."""
+    if args.list:
+        print('\n'.join(CASES))
+        return 0
+    results = run_suite(args.patterns, args.repeat, args.min_time)
+    record = {'environment': environment(), 'results': results}
+    if args.json:
+        os.makedirs(os.path.dirname(os.path.abspath(args.json)), exist_ok=True)
+        with open(args.json, 'w') as f:
+            json.dump(record, f, indent=1)
+    if args.compare:
+        with open(args.compare) as f:
+            base = json.load(f)
+        if compare(results, base, args.threshold):
+            return 1
+    return 0
@@ -12,12 +12,22 @@ Created on Mon Oct 3 2019 16:08:57:01 2019
 Refactored: 2026-01-02 - Separated computation from visualization
 """
 
+import operator
+from collections.abc import Mapping
 from typing import Dict, Tuple, Optional
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
 import numpy as np
-from scipy.optimize import minimize
-import matplotlib.pyplot as plt
-from ipywidgets import interact, fixed
+
+from lazy import LazyModule, LazyAttr
+from liveplot import LivePlot
+from instrument import instrumented, note
+from memo import memoize
+
+# The plotting stack is imported (and styled) on the first plot call, so the
+# solvers can be used headless without loading matplotlib or ipywidgets.
+plt = LazyModule('matplotlib.pyplot', on_load=lambda pyplot: setup_plot_style())
+interact = LazyAttr('ipywidgets', 'interact')
+fixed = LazyAttr('ipywidgets', 'fixed')
 
 
 # ============================================================================
@@ -140,7 +150,7 @@ def stolper_samuelson(p: float, alpha: float, beta: float) -> float:
     """
     Za = alpha**alpha * (1-alpha)**(1-alpha)
     Zm = beta**beta * (1-beta)**(1-beta)
-    return (p * (Za / Zm))**(1 / (alpha - beta))
+    return (p * (Za / Zm))**(1 / (beta - alpha))
 
 
 def wage_rental_from_price(p: float, a: float = alpha, b: float = beta) -> float:
@@ -158,12 +168,170 @@ def wage_rental_from_price(p: float, a: float = alpha, b: float = beta) -> float
     return B * p**(1/(b-a))
 
 
+def price_from_wage_rental(wr: float, alpha: float, beta: float) -> float:
+    """Relative price at which `stolper_samuelson` gives wage-rental ratio wr.
+
+    Args:
+        wr: Wage-rental ratio (w/r)
+        alpha: Capital share in sector A
+        beta: Capital share in sector M
+
+    Returns:
+        Relative price (Pa/Pm)
+    """
+    Za = alpha**alpha * (1-alpha)**(1-alpha)
+    Zm = beta**beta * (1-beta)**(1-beta)
+    return wr**(beta - alpha) * Zm / Za
+
+
+def cone_of_diversification(Kbar: float = Kbar, Lbar: float = Lbar,
+                            alpha: float = alpha, beta: float = beta) -> Tuple[float, float]:
+    """Price range over which an economy with these endowments produces both goods.
+
+    Both sectors produce while the endowment ratio Kbar/Lbar lies between
+    the sectoral K/L ratios.  At the edges one sector's `kl_ratio` equals
+    Kbar/Lbar, which fixes w/r and hence, through `stolper_samuelson`,
+    the price.  Vectorized over all arguments.
+
+    Args:
+        Kbar: Total capital endowment
+        Lbar: Total labor endowment
+        alpha: Capital share in sector A
+        beta: Capital share in sector M
+
+    Returns:
+        (p_low, p_high): only M is produced at p <= p_low, only A at p >= p_high
+    """
+    k = np.divide(Kbar, Lbar)
+    p_high = price_from_wage_rental(k * (1 - alpha) / alpha, alpha, beta)   # ka = k
+    p_low = price_from_wage_rental(k * (1 - beta) / beta, alpha, beta)      # km = k
+    return p_low, p_high
+
+
+# ============================================================================
+# Result Types
+# ============================================================================
+
+class Record(Mapping):
+    """Fixed-field result with attribute and dict-style access.
+
+    Subclasses are ``@dataclass(slots=True, eq=False)`` classes, so a result
+    is a compact slotted object (no per-instance dict) rather than a
+    per-call dict, but ``res['QA']``, ``res['QA'] = x``, ``res.keys()``,
+    ``dict(res)`` and ``res == {...}`` keep working for code written
+    against the old dict results.  Attribute access (``res.QA``) is the
+    fastest path.  Records are mutable like the dicts were (memoize hands
+    out copies, so the cache is unaffected), but unlike a dict they cannot
+    gain new keys, and ``json.dumps`` needs ``res.to_dict()``.
+    """
+    __slots__ = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._values = operator.attrgetter(*cls.__annotations__)
+
+    def __copy__(self):
+        return type(self)(*self._values(self))
+
+    def __getitem__(self, key: str):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key: str, value):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __iter__(self):
+        return iter(self.__slots__)
+
+    def __len__(self) -> int:
+        return len(self.__slots__)
+
+    @classmethod
+    def dtype(cls) -> np.dtype:
+        """Structured dtype with one float64 field per result field."""
+        return np.dtype([(name, float) for name in cls.__slots__])
+
+    def to_dict(self) -> Dict[str, float]:
+        """Plain dict of the fields, e.g. for ``json.dumps``."""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+@dataclass(slots=True, eq=False)
+class HOSResult(Record):
+    """Scalar HOS equilibrium returned by `calculate_hos_equilibrium`.
+
+    Attributes:
+        LA, KA: Labor and capital in sector A
+        LM, KM: Labor and capital in sector M
+        QA, QM: Output quantities
+        wr: Wage-rental ratio
+        ka_ratio, km_ratio: K/L ratios by sector
+    """
+    LA: float
+    KA: float
+    LM: float
+    KM: float
+    QA: float
+    QM: float
+    wr: float
+    ka_ratio: float
+    km_ratio: float
+
+
+@dataclass(slots=True, eq=False)
+class AutarkyResult(Record):
+    """Scalar autarky equilibrium returned by `optimize_closed_economy`.
+
+    Attributes:
+        QA, QM: Output (= consumption) quantities
+        KA, LA: Capital and labor in sector A
+        utility: Utility of the autarky consumption bundle
+        wr: Wage-rental ratio
+        p: Autarky relative price (Pa/Pm)
+    """
+    QA: float
+    QM: float
+    KA: float
+    LA: float
+    utility: float
+    wr: float
+    p: float
+
+
+@dataclass(slots=True, eq=False)
+class LernerResult(Record):
+    """Lerner diagram quantities returned by `calculate_lerner_diagram`.
+
+    Attributes:
+        wr: Wage-rental ratio
+        KLa, KLm: K/L ratios by sector
+        Lm_iso, Km_iso: Tangency point on the M isoquant
+        La_iso, Ka_iso: Tangency point on the unit-value A isoquant
+        QM, QA: Quantities on the two isoquants
+        isocost_intercept: K-axis intercept of the common isocost line
+    """
+    wr: float
+    KLa: float
+    KLm: float
+    Lm_iso: float
+    Km_iso: float
+    La_iso: float
+    Ka_iso: float
+    QM: float
+    QA: float
+    isocost_intercept: float
+
+
 # ============================================================================
 # Equilibrium Calculations
 # ============================================================================
 
+@memoize
 def calculate_hos_equilibrium(p: float, Kbar: float = Kbar, Lbar: float = Lbar,
-                              alpha: float = alpha, beta: float = beta) -> Dict[str, float]:
+                              alpha: float = alpha, beta: float = beta) -> HOSResult:
     """Calculate HOS equilibrium allocations and outputs.
 
     Args:
@@ -174,7 +342,7 @@ def calculate_hos_equilibrium(p: float, Kbar: float = Kbar, Lbar: float = Lbar,
         beta: Capital share in sector M
 
     Returns:
-        Dictionary containing:
+        HOSResult (dict-style access supported) containing:
             - LA, KA: Labor and capital in sector A
             - LM, KM: Labor and capital in sector M
             - QA, QM: Output quantities
@@ -196,14 +364,574 @@ def calculate_hos_equilibrium(p: float, Kbar: float = Kbar, Lbar: float = Lbar,
     QA = F(KA, LA, alpha)
     QM = G(KM, LM, beta)
 
-    return {
-        'LA': LA, 'KA': KA,
-        'LM': LM, 'KM': KM,
-        'QA': QA, 'QM': QM,
-        'wr': wr,
-        'ka_ratio': ka,
-        'km_ratio': km
-    }
+    return HOSResult(LA, KA, LM, KM, QA, QM, wr, ka, km)
+
+
+@dataclass
+class HOSBatchResult:
+    """Struct-of-arrays HOS equilibrium over a grid of parameters.
+
+    Every field has the broadcast shape of the inputs passed to
+    `calculate_hos_equilibrium_batch`.
+
+    Attributes:
+        LA, KA: Labor and capital in sector A
+        LM, KM: Labor and capital in sector M
+        QA, QM: Output quantities
+        wr: Wage-rental ratio
+        ka_ratio, km_ratio: K/L ratios by sector
+        in_cone: True where Kbar/Lbar lies inside the cone of diversification
+            (both sectors produce); elsewhere the allocations above are the
+            unconstrained formulas and are not economically meaningful
+            (`calculate_open_equilibrium` solves the corners)
+    """
+    LA: np.ndarray
+    KA: np.ndarray
+    LM: np.ndarray
+    KM: np.ndarray
+    QA: np.ndarray
+    QM: np.ndarray
+    wr: np.ndarray
+    ka_ratio: np.ndarray
+    km_ratio: np.ndarray
+    in_cone: np.ndarray
+
+    def __len__(self) -> int:
+        return self.LA.size
+
+    def __getitem__(self, key: str) -> np.ndarray:
+        """Dictionary-style access to a column, e.g. ``res['QA']``."""
+        return getattr(self, key)
+
+    def to_records(self) -> np.ndarray:
+        """The batch as one NumPy structured array (a record per point).
+
+        Fields are those of `HOSResult` plus ``in_cone`` (and any fields a
+        subclass adds); each element supports ``rec['QA']`` like a scalar
+        result.
+        """
+        dtype = np.dtype([(f.name, getattr(self, f.name).dtype) for f in fields(self)])
+        records = np.empty(self.LA.shape, dtype)
+        for name in dtype.names:
+            records[name] = getattr(self, name)
+        return records
+
+
+@instrumented
+def calculate_hos_equilibrium_batch(p, Kbar=Kbar, Lbar=Lbar,
+                                    alpha=alpha, beta=beta) -> HOSBatchResult:
+    """Vectorized `calculate_hos_equilibrium` over broadcastable arrays.
+
+    All arguments may be scalars or NumPy arrays; they are broadcast against
+    each other and the whole grid is solved in one pass using the closed
+    forms in `stolper_samuelson` and `kl_ratio`.
+
+    Args:
+        p: Relative price (Pa/Pm)
+        Kbar: Total capital endowment
+        Lbar: Total labor endowment
+        alpha: Capital share in sector A
+        beta: Capital share in sector M
+
+    Returns:
+        HOSBatchResult with one array per output and an `in_cone` mask
+    """
+    p, Kbar, Lbar, alpha, beta = np.broadcast_arrays(
+        *(np.asarray(x, dtype=float) for x in (p, Kbar, Lbar, alpha, beta)))
+
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        wr = stolper_samuelson(p, alpha, beta)
+        ka = kl_ratio(wr, alpha)
+        km = kl_ratio(wr, beta)
+
+        LA = (Kbar - km * Lbar) / (ka - km)
+        KA = ka * LA
+        LM = Lbar - LA
+        KM = Kbar - KA
+
+        QA = F(KA, LA, alpha)
+        QM = G(KM, LM, beta)
+
+    in_cone = (LA > 0) & (LA < Lbar)
+
+    return HOSBatchResult(LA=LA, KA=KA, LM=LM, KM=KM, QA=QA, QM=QM,
+                          wr=wr, ka_ratio=ka, km_ratio=km, in_cone=in_cone)
+
+
+# Production regimes of `calculate_open_equilibrium`
+DIVERSIFIED, ONLY_A, ONLY_M = 0, 1, 2
+REGIMES = ('diversified', 'only A', 'only M')
+
+
+@dataclass
+class HOSOpenResult(HOSBatchResult):
+    """`HOSBatchResult` with complete specialization handled.
+
+    Outside the cone of diversification the allocation is the corner
+    (all factors in one sector), and ``wr``, ``ka_ratio`` and ``km_ratio``
+    are the factor prices and cost-minimizing intensities at that corner.
+
+    Attributes:
+        w, r: Wage and rental in units of good M
+        regime: DIVERSIFIED, ONLY_A or ONLY_M (int8, names in `REGIMES`)
+    """
+    w: np.ndarray
+    r: np.ndarray
+    regime: np.ndarray
+
+
+@instrumented
+def calculate_open_equilibrium(p, Kbar=Kbar, Lbar=Lbar,
+                               alpha=alpha, beta=beta) -> HOSOpenResult:
+    """Small open economy HOS equilibrium in every production regime.
+
+    Vectorized like `calculate_hos_equilibrium_batch`, and branch-free:
+    both sectors produce while w/r from `stolper_samuelson` lies between
+    the two ratios at which one sector's `kl_ratio` equals Kbar/Lbar (the
+    edges of the cone, see `cone_of_diversification`).  Beyond an edge the
+    economy specializes and factor prices are set by the endowment, so
+    clipping w/r to that interval gives the right intensities in every
+    regime and the allocation formula puts all factors in one sector at
+    the clipped ends.  The rental is the larger of the two zero-profit
+    rentals, which is the one of the sector that produces.
+
+    Args:
+        p: Relative price (Pa/Pm)
+        Kbar: Total capital endowment
+        Lbar: Total labor endowment
+        alpha: Capital share in sector A
+        beta: Capital share in sector M
+
+    Returns:
+        HOSOpenResult with one array per output and the regime of each point
+    """
+    p, Kbar, Lbar, alpha, beta = np.broadcast_arrays(
+        *(np.asarray(x, dtype=float) for x in (p, Kbar, Lbar, alpha, beta)))
+
+    regime, wr, ka, km, LA, KA, LM, KM, QA, QM = _open_allocation(p, Kbar, Lbar, alpha, beta)
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        Za = alpha**alpha * (1 - alpha)**(1 - alpha)
+        Zm = beta**beta * (1 - beta)**(1 - beta)
+        r = np.maximum(p * Za * wr**(alpha - 1), Zm * wr**(beta - 1))
+        w = wr * r
+
+    return HOSOpenResult(LA=LA, KA=KA, LM=LM, KM=KM, QA=QA, QM=QM,
+                         wr=wr, ka_ratio=ka, km_ratio=km, in_cone=regime == DIVERSIFIED,
+                         w=w, r=r, regime=regime)
+
+
+def _open_allocation(p, Kbar, Lbar, alpha, beta):
+    """Regime, w/r, intensities, allocation and outputs of
+    `calculate_open_equilibrium`."""
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        k = Kbar / Lbar
+        wr_a = k * (1 - alpha) / alpha      # w/r at which ka = k: only A
+        wr_m = k * (1 - beta) / beta        # w/r at which km = k: only M
+        wr = np.clip(stolper_samuelson(p, alpha, beta), np.minimum(wr_a, wr_m), np.maximum(wr_a, wr_m))
+        ka = kl_ratio(wr, alpha)
+        km = kl_ratio(wr, beta)
+
+        # the regime comes from where w/r was clipped (clip returns the bound
+        # itself), not from the rounded allocation, which can miss a corner
+        only_a, only_m = wr == wr_a, wr == wr_m
+        regime = np.where(only_a, ONLY_A, np.where(only_m, ONLY_M, DIVERSIFIED)).astype(np.int8)
+
+        LA = np.clip((Kbar - km * Lbar) / (ka - km), 0, Lbar)
+        LA = np.where(only_a, Lbar, np.where(only_m, 0.0, LA))
+        KA = np.where(only_a, Kbar, np.where(only_m, 0.0, ka * LA))
+        LM = Lbar - LA
+        KM = Kbar - KA
+
+        QA = F(KA, LA, alpha)
+        QM = G(KM, LM, beta)
+    return regime, wr, ka, km, LA, KA, LM, KM, QA, QM
+
+
+# ============================================================================
+# World Equilibrium
+# ============================================================================
+
+@dataclass
+class HOSWorldResult:
+    """Two-country free-trade equilibrium over a batch of country pairs.
+
+    Every array has the broadcast shape of the inputs passed to
+    `calculate_world_equilibrium`.  Trade flows are home net exports;
+    the foreign flows are their negatives, and trade balances at p:
+    ``p*EA + EM == 0``.
+
+    Attributes:
+        p: World relative price (Pa/Pm)
+        home, foreign: Each country's `HOSOpenResult` at p (production,
+            factor prices and regime)
+        CA, CM: Home consumption
+        CA_f, CM_f: Foreign consumption
+        EA, EM: Home net exports of A and M
+        w_ratio, r_ratio: Home over foreign wage and rental
+        fpe: True where factor prices are equalized (both ratios 1)
+        converged: False where the price search stopped at maxiter
+    """
+    p: np.ndarray
+    home: HOSOpenResult
+    foreign: HOSOpenResult
+    CA: np.ndarray
+    CM: np.ndarray
+    CA_f: np.ndarray
+    CM_f: np.ndarray
+    EA: np.ndarray
+    EM: np.ndarray
+    w_ratio: np.ndarray
+    r_ratio: np.ndarray
+    fpe: np.ndarray
+    converged: np.ndarray
+
+    def __getitem__(self, key: str) -> np.ndarray:
+        """Dictionary-style access to a field, e.g. ``eq['EA']``."""
+        return getattr(self, key)
+
+
+@instrumented
+def calculate_world_equilibrium(Kbar=Kbar, Lbar=Lbar, Kbar_f=Kbar, Lbar_f=Lbar,
+                                alpha=alpha, beta=beta, theta=theta,
+                                alpha_f=None, beta_f=None, theta_f=None,
+                                tol: float = 1e-12, maxiter: int = 100,
+                                fpe_tol: float = 1e-9) -> HOSWorldResult:
+    """Free-trade world price and allocations for two HOS economies.
+
+    Vectorized over broadcastable arrays, so a whole batch of country pairs
+    (e.g. a scan over how the world endowment is split) is solved at once.
+    Each country produces as a small open economy at the world price
+    (`calculate_open_equilibrium`, so specialization is handled) and spends
+    a share theta of its income on A.  World excess demand for A is
+    decreasing in p and changes sign inside an analytic bracket: below
+    both countries' `cone_of_diversification` nobody produces A, above it
+    nobody produces M.  The price is found in that bracket by an Illinois
+    (false position) iteration on log p, all pairs at once.
+
+    Args:
+        Kbar, Lbar: Home endowments
+        Kbar_f, Lbar_f: Foreign endowments
+        alpha, beta, theta: Home capital shares and preference parameter
+        alpha_f, beta_f, theta_f: Foreign ones (default: same as home)
+        tol: Tolerance on log p and on relative excess demand
+        maxiter: Maximum number of price iterations
+        fpe_tol: Relative tolerance for equal factor prices
+
+    Returns:
+        HOSWorldResult with prices, both countries' equilibria, consumption,
+        trade flows and the factor-price-equalization diagnostics
+    """
+    alpha_f = alpha if alpha_f is None else alpha_f
+    beta_f = beta if beta_f is None else beta_f
+    theta_f = theta if theta_f is None else theta_f
+    home = np.broadcast_arrays(*(np.asarray(x, dtype=float) for x in
+                                 (Kbar, Lbar, alpha, beta, theta, Kbar_f, Lbar_f,
+                                  alpha_f, beta_f, theta_f)))
+    home, foreign = home[:5], home[5:]
+    (Kbar, Lbar, alpha, beta, theta), (Kbar_f, Lbar_f, alpha_f, beta_f, theta_f) = home, foreign
+
+    def excess_demand(x):
+        """(D - S)/(D + S) for good A in value terms: 1 when no A is
+        produced, -1 when no M is."""
+        p = np.exp(x)
+        *_, QA, QM = _open_allocation(p, Kbar, Lbar, alpha, beta)
+        *_, QA_f, QM_f = _open_allocation(p, Kbar_f, Lbar_f, alpha_f, beta_f)
+        D = theta * QM + theta_f * QM_f
+        S = p * ((1 - theta) * QA + (1 - theta_f) * QA_f)
+        return (D - S) / (D + S)
+
+    lo, hi = cone_of_diversification(Kbar, Lbar, alpha, beta)
+    lo_f, hi_f = cone_of_diversification(Kbar_f, Lbar_f, alpha_f, beta_f)
+    x_lo = np.log(np.minimum(np.minimum(lo, hi), np.minimum(lo_f, hi_f)))
+    x_hi = np.log(np.maximum(np.maximum(lo, hi), np.maximum(lo_f, hi_f)))
+    x, done = _illinois(excess_demand, x_lo, x_hi, tol, maxiter, evals_per_iter=2)
+
+    p = np.exp(x)
+    h = calculate_open_equilibrium.__wrapped__(p, Kbar, Lbar, alpha, beta)
+    f = calculate_open_equilibrium.__wrapped__(p, Kbar_f, Lbar_f, alpha_f, beta_f)
+    income, income_f = p * h.QA + h.QM, p * f.QA + f.QM
+    CA, CM = theta * income / p, (1 - theta) * income
+    CA_f, CM_f = theta_f * income_f / p, (1 - theta_f) * income_f
+    w_ratio, r_ratio = h.w / f.w, h.r / f.r
+    fpe = (np.abs(w_ratio - 1) <= fpe_tol) & (np.abs(r_ratio - 1) <= fpe_tol)
+
+    return HOSWorldResult(p=p, home=h, foreign=f, CA=CA, CM=CM, CA_f=CA_f, CM_f=CM_f,
+                          EA=h.QA - CA, EM=h.QM - CM, w_ratio=w_ratio, r_ratio=r_ratio,
+                          fpe=fpe, converged=done)
+
+
+def _illinois(func, x_lo, x_hi, tol, maxiter, evals_per_iter=1):
+    """Vectorized Illinois (false position) root search of a decreasing func
+    with func(x_lo) = 1 and func(x_hi) = -1.  Returns (x, converged).
+
+    evals_per_iter is the number of model solves one call of func makes,
+    so the instrumentation reports nfev in solves rather than calls.
+    """
+    g_lo, g_hi = np.ones_like(x_lo), -np.ones_like(x_hi)
+    last = np.zeros(x_lo.shape, dtype=np.int8)      # side replaced last: 1 lo, -1 hi
+    it, x, done = 0, (x_lo + x_hi) / 2, np.zeros(x_lo.shape, dtype=bool)
+    for it in range(1, maxiter + 1):
+        x = (x_lo * g_hi - x_hi * g_lo) / (g_hi - g_lo)
+        g = func(x)
+        up = g > 0
+        # Illinois: halve the stale end's value when the same side moves twice
+        g_hi = np.where(up & (last == 1), g_hi / 2, g_hi)
+        g_lo = np.where(~up & (last == -1), g_lo / 2, g_lo)
+        x_lo, g_lo = np.where(up, x, x_lo), np.where(up, g, g_lo)
+        x_hi, g_hi = np.where(up, x_hi, x), np.where(up, g_hi, g)
+        last = np.where(up, 1, -1).astype(np.int8)
+        done = (x_hi - x_lo <= tol) | (np.abs(g) <= tol)
+        if done.all():
+            break
+    note(nit=it, nfev=evals_per_iter * it, converged=bool(done.all()))
+    return x, done
+
+
+def world_equilibrium(home: HOSParams = DEFAULT_PARAMS,
+                      foreign: HOSParams = DEFAULT_PARAMS, **kwargs) -> HOSWorldResult:
+    """`calculate_world_equilibrium` for two `HOSParams` countries."""
+    return calculate_world_equilibrium(
+        home.Kbar, home.Lbar, foreign.Kbar, foreign.Lbar, home.alpha, home.beta, home.theta,
+        foreign.alpha, foreign.beta, foreign.theta, **kwargs)
+
+
+@dataclass
+class HOSMultiResult:
+    """Free-trade equilibrium of many countries sharing one technology.
+
+    Countries lie along the last axis; any leading axes index independent
+    worlds.  ``p`` and the other world-level fields have the leading shape.
+
+    Attributes:
+        p: World relative price (Pa/Pm)
+        p_integrated, wr_integrated: Price and w/r of the integrated world
+            economy (all endowments pooled, `autarky_equilibrium`)
+        in_cone: Per country, True where Kbar/Lbar lies in the cone of
+            diversification at the integrated w/r
+        integrated: Per world, True where every country is in that cone, so
+            free trade replicates the integrated equilibrium (p equals
+            p_integrated and factor prices are equalized everywhere)
+        countries: Each country's `HOSOpenResult` at p
+        CA, CM: Consumption per country
+        EA, EM: Net exports of A and M per country (each sums to 0 over
+            countries)
+        converged: Per world, False where the price search hit maxiter
+    """
+    p: np.ndarray
+    p_integrated: np.ndarray
+    wr_integrated: np.ndarray
+    in_cone: np.ndarray
+    integrated: np.ndarray
+    countries: HOSOpenResult
+    CA: np.ndarray
+    CM: np.ndarray
+    EA: np.ndarray
+    EM: np.ndarray
+    converged: np.ndarray
+
+    def __getitem__(self, key: str) -> np.ndarray:
+        """Dictionary-style access to a field, e.g. ``eq['EA']``."""
+        return getattr(self, key)
+
+
+@instrumented
+def calculate_multicountry_equilibrium(Kbar, Lbar, alpha=alpha, beta=beta, theta=theta,
+                                       tol: float = 1e-12, maxiter: int = 100) -> HOSMultiResult:
+    """Free-trade equilibrium of any number of countries with common technology
+    and preferences.
+
+    The integrated world equilibrium (everything pooled) is solved once in
+    closed form.  Countries whose Kbar/Lbar lies inside its cone of
+    diversification can reproduce it; if all do, the world price is the
+    integrated one and every country's allocation follows from
+    `calculate_open_equilibrium` in one vectorized pass.  Worlds with
+    countries outside the cone are solved for p like
+    `calculate_world_equilibrium`, with excess demand summed over
+    countries, so the cost stays linear in the number of countries.
+
+    Args:
+        Kbar, Lbar: Endowments, countries along the last axis
+        alpha: Capital share in sector A (one per world)
+        beta: Capital share in sector M (one per world)
+        theta: Consumption preference parameter (one per world)
+        tol: Tolerance on log p and on relative excess demand
+        maxiter: Maximum number of price iterations
+
+    Returns:
+        HOSMultiResult with the world price, the integrated-equilibrium
+        grouping and each country's production, consumption and trade
+    """
+    Kbar, Lbar = np.broadcast_arrays(np.asarray(Kbar, dtype=float), np.asarray(Lbar, dtype=float))
+    lead = np.broadcast_shapes(Kbar.shape[:-1], np.shape(alpha), np.shape(beta), np.shape(theta))
+    Kbar, Lbar = (np.broadcast_to(x, lead + x.shape[-1:]) for x in (Kbar, Lbar))
+    alpha, beta, theta = (np.broadcast_to(np.asarray(x, dtype=float), lead)
+                          for x in (alpha, beta, theta))
+
+    world = autarky_equilibrium(alpha, beta, theta, Kbar.sum(-1), Lbar.sum(-1))
+    p_int, wr_int = world['p'], world['wr']
+    k = Kbar / Lbar
+    in_cone = ((k - kl_ratio(wr_int[..., None], alpha[..., None]))
+               * (k - kl_ratio(wr_int[..., None], beta[..., None])) <= 0)
+    integrated = in_cone.all(-1)
+
+    p = np.array(p_int, dtype=float)
+    converged = np.ones(lead, dtype=bool)
+    todo = ~integrated
+    if todo.any():
+        K, L = Kbar[todo], Lbar[todo]
+        a, b, t = alpha[todo][:, None], beta[todo][:, None], theta[todo][:, None]
+
+        def excess_demand(x):
+            """(D - S)/(D + S) for good A in value terms, summed over countries."""
+            q = np.exp(x)[:, None]
+            *_, QA, QM = _open_allocation(q, K, L, a, b)
+            D, S = (t * QM).sum(-1), (q * (1 - t) * QA).sum(-1)
+            return (D - S) / (D + S)
+
+        lo, hi = cone_of_diversification(K, L, a, b)
+        x, converged[todo] = _illinois(excess_demand, np.log(np.minimum(lo, hi).min(-1)),
+                                       np.log(np.maximum(lo, hi).max(-1)), tol, maxiter,
+                                       evals_per_iter=K.shape[-1])
+        p[todo] = np.exp(x)
+
+    pc, th = p[..., None], theta[..., None]
+    countries = calculate_open_equilibrium.__wrapped__(pc, Kbar, Lbar, alpha[..., None], beta[..., None])
+    income = pc * countries.QA + countries.QM
+    CA, CM = th * income / pc, (1 - th) * income
+
+    return HOSMultiResult(p=p[()], p_integrated=p_int, wr_integrated=wr_int, in_cone=in_cone,
+                          integrated=integrated, countries=countries, CA=CA, CM=CM,
+                          EA=countries.QA - CA, EM=countries.QM - CM, converged=converged)
+
+
+# ============================================================================
+# Comparative Statics
+# ============================================================================
+
+@dataclass
+class HOSComparativeStatics:
+    """Levels and analytic derivatives of the HOS equilibrium.
+
+    Factor prices are in units of good M (Pm = 1, Pa = p).  Derivative
+    fields are named ``d<output>_d<input>``; `elasticity` turns any of them
+    into an elasticity.
+
+    Attributes:
+        p, Kbar, Lbar: Inputs (broadcast)
+        w, r, wr: Wage, rental and wage-rental ratio
+        LA, LM, QA, QM: Labor allocations and outputs
+        dw_dp, dr_dp, dwr_dp: Stolper-Samuelson derivatives
+        dLA_dp, dQA_dp, dQM_dp: Supply responses along the PPF
+        dLA_dKbar, dLA_dLbar, dQA_dKbar, dQA_dLbar, dQM_dKbar, dQM_dLbar:
+            Rybczynski derivatives at constant prices
+        in_cone: True where both sectors produce
+    """
+    p: np.ndarray
+    Kbar: np.ndarray
+    Lbar: np.ndarray
+    w: np.ndarray
+    r: np.ndarray
+    wr: np.ndarray
+    LA: np.ndarray
+    LM: np.ndarray
+    QA: np.ndarray
+    QM: np.ndarray
+    dw_dp: np.ndarray
+    dr_dp: np.ndarray
+    dwr_dp: np.ndarray
+    dLA_dp: np.ndarray
+    dQA_dp: np.ndarray
+    dQM_dp: np.ndarray
+    dLA_dKbar: np.ndarray
+    dLA_dLbar: np.ndarray
+    dQA_dKbar: np.ndarray
+    dQA_dLbar: np.ndarray
+    dQM_dKbar: np.ndarray
+    dQM_dLbar: np.ndarray
+    in_cone: np.ndarray
+
+    def __getitem__(self, key: str) -> np.ndarray:
+        """Dictionary-style access to a field, e.g. ``cs['dw_dp']``."""
+        return getattr(self, key)
+
+    def elasticity(self, output: str, wrt: str) -> np.ndarray:
+        """Elasticity of `output` with respect to `wrt`, e.g. ('r', 'p')."""
+        return self[f'd{output}_d{wrt}'] * self[wrt] / self[output]
+
+
+@instrumented
+def calculate_comparative_statics(p, Kbar=Kbar, Lbar=Lbar,
+                                  alpha=alpha, beta=beta) -> HOSComparativeStatics:
+    """HOS levels with analytic Stolper-Samuelson and Rybczynski derivatives.
+
+    Vectorized like `calculate_hos_equilibrium_batch`.  Zero profits in
+    both sectors give the factor-price elasticities directly,
+
+        dln(w/r)/dln p = 1/(beta - alpha)
+        dln r/dln p = -(1-beta)/(beta - alpha),   dln w/dln p = beta/(beta - alpha)
+
+    and with factor intensities fixed by p, outputs are linear in the
+    endowments, so the Rybczynski derivatives are the coefficients of
+    that linear map.  Supply responses to p follow by differentiating the
+    allocation through the intensities.
+
+    Args:
+        p: Relative price (Pa/Pm)
+        Kbar: Total capital endowment
+        Lbar: Total labor endowment
+        alpha: Capital share in sector A
+        beta: Capital share in sector M
+
+    Returns:
+        HOSComparativeStatics with one array per level and derivative
+    """
+    p, Kbar, Lbar, alpha, beta = np.broadcast_arrays(
+        *(np.asarray(x, dtype=float) for x in (p, Kbar, Lbar, alpha, beta)))
+
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        wr = stolper_samuelson(p, alpha, beta)
+        Zm = beta**beta * (1 - beta)**(1 - beta)
+        r = Zm * wr**(beta - 1)          # unit cost of M equals Pm = 1
+        w = wr * r
+        e_wr = 1 / (beta - alpha)
+        dwr_dp = e_wr * wr / p
+        dr_dp = (beta - 1) * e_wr * r / p
+        dw_dp = beta * e_wr * w / p
+
+        # allocations: LA = (Kbar - km*Lbar)/(ka - km) with k = K/L per sector
+        ka = kl_ratio(wr, alpha)
+        km = kl_ratio(wr, beta)
+        D = ka - km
+        LA = (Kbar - km * Lbar) / D
+        LM = Lbar - LA
+        ya, ym = ka**alpha, km**beta     # output per worker in A and M
+        QA = ya * LA
+        QM = ym * LM
+
+        # Rybczynski (prices, hence ka and km, held fixed)
+        dLA_dKbar = 1 / D
+        dLA_dLbar = -km / D
+        dQA_dKbar = ya * dLA_dKbar
+        dQA_dLbar = ya * dLA_dLbar
+        dQM_dKbar = -ym * dLA_dKbar
+        dQM_dLbar = ym * (1 - dLA_dLbar)
+
+        # supply responses: ka and km both scale with w/r
+        dka_dp = ka * e_wr / p
+        dkm_dp = km * e_wr / p
+        dLA_dp = -(dkm_dp * Lbar + LA * (dka_dp - dkm_dp)) / D
+        dQA_dp = alpha * QA * e_wr / p + ya * dLA_dp
+        dQM_dp = beta * QM * e_wr / p - ym * dLA_dp
+
+    return HOSComparativeStatics(
+        p=p, Kbar=Kbar, Lbar=Lbar, w=w, r=r, wr=wr,
+        LA=LA, LM=LM, QA=QA, QM=QM,
+        dw_dp=dw_dp, dr_dp=dr_dp, dwr_dp=dwr_dp,
+        dLA_dp=dLA_dp, dQA_dp=dQA_dp, dQM_dp=dQM_dp,
+        dLA_dKbar=dLA_dKbar, dLA_dLbar=dLA_dLbar,
+        dQA_dKbar=dQA_dKbar, dQA_dLbar=dQA_dLbar,
+        dQM_dKbar=dQM_dKbar, dQM_dLbar=dQM_dLbar,
+        in_cone=(LA > 0) & (LA < Lbar))
 
 
 def edgeworth_locus(L: np.ndarray, Kbar: float = Kbar, Lbar: float = Lbar,
@@ -252,32 +980,99 @@ def indifference_curve(Cm: np.ndarray, theta: float, ubar: float) -> np.ndarray:
     return (ubar / (Cm**(1 - theta)))**(1 / theta)
 
 
+@instrumented
 def calculate_ppf(Kbar: float = Kbar, Lbar: float = Lbar,
                   alpha: float = alpha, beta: float = beta,
-                  n_points: int = 100) -> Tuple[np.ndarray, np.ndarray]:
+                  n_points: int = 100, tol: Optional[float] = None,
+                  max_points: int = 100_000) -> Tuple[np.ndarray, np.ndarray]:
     """Calculate production possibility frontier.
 
+    By default the frontier is sampled at `n_points` evenly spaced labor
+    allocations.  Passing `tol` switches to adaptive sampling: starting from
+    a coarse grid, every segment whose chord misses the frontier at its
+    labor midpoint by more than `tol` (in output units) is split in two,
+    until every segment passes that check or `max_points` is reached.  The
+    midpoint distance estimates rather than bounds the segment's largest
+    deviation, so `tol` is a target, not a guarantee.  Points then
+    concentrate where the frontier bends and the nearly straight stretches
+    use few.
+
     Args:
         Kbar: Total capital endowment
         Lbar: Total labor endowment
         alpha: Capital share in sector A
         beta: Capital share in sector M
-        n_points: Number of points to calculate
+        n_points: Number of points to calculate (ignored when tol is given)
+        tol: Target distance between the polyline and the frontier, checked
+            at each segment's labor midpoint
+        max_points: Hard upper bound on points in adaptive mode
 
     Returns:
-        Tuple of (QA, QM) arrays along the PPF
+        Tuple of (QA, QM) arrays along the PPF, ordered by labor in A
     """
-    La = np.linspace(0.1, Lbar - 0.1, n_points)
+    if tol is None:
+        La = np.linspace(0.1, Lbar - 0.1, n_points)
+    else:
+        La = _adaptive_ppf_grid(Kbar, Lbar, alpha, beta, tol, max_points)
+    return _ppf_outputs(La, Kbar, Lbar, alpha, beta)
+
+
+def _ppf_outputs(La, Kbar, Lbar, alpha, beta):
+    """Outputs (QA, QM) at labor allocations La on the efficiency locus."""
     Ka = edgeworth_locus(La, Kbar, Lbar, alpha, beta)
-    Qa = F(Ka, La, alpha)
-    Qm = G(Kbar - Ka, Lbar - La, beta)
+    return F(Ka, La, alpha), G(Kbar - Ka, Lbar - La, beta)
+
+
+def _chord_distance(ax, ay, bx, by, px, py):
+    """Distance from points p to the chords a-b (all arrays)."""
+    dx, dy = bx - ax, by - ay
+    return np.abs(dx * (py - ay) - dy * (px - ax)) / np.hypot(dx, dy)
 
-    return Qa, Qm
 
+def _adaptive_ppf_grid(Kbar, Lbar, alpha, beta, tol, max_points, n_start=9):
+    """Labor allocations whose PPF polyline passes the midpoint check at tol.
 
+    Each pass evaluates the midpoints of all unfinished segments at once and
+    inserts those that deviate by more than tol, worst first, never growing
+    past max_points; segments that pass are never revisited.
+    """
+    La = np.linspace(0.1, Lbar - 0.1, n_start)
+    Qa, Qm = _ppf_outputs(La, Kbar, Lbar, alpha, beta)
+    open_ = np.ones(La.size - 1, dtype=bool)
+    passes, nfev = 0, n_start
+
+    while open_.any() and La.size < max_points:
+        i = np.flatnonzero(open_)
+        mid = (La[i] + La[i + 1]) / 2
+        passes, nfev = passes + 1, nfev + mid.size
+        qa, qm = _ppf_outputs(mid, Kbar, Lbar, alpha, beta)
+        dist = _chord_distance(Qa[i], Qm[i], Qa[i + 1], Qm[i + 1], qa, qm)
+        split = dist > tol
+        open_[i[~split]] = False
+        if not split.any():
+            break
+        room = max_points - La.size
+        if split.sum() > room:
+            # only the worst segments fit; the rest stay open and unconverged
+            worst = np.argsort(np.where(split, -dist, np.inf), kind='stable')[:room]
+            split = np.zeros_like(split)
+            split[worst] = True
+        i, mid, qa, qm = i[split], mid[split], qa[split], qm[split]
+
+        # insert the new midpoints after position i; both halves stay open
+        La = np.insert(La, i + 1, mid)
+        Qa = np.insert(Qa, i + 1, qa)
+        Qm = np.insert(Qm, i + 1, qm)
+        open_ = np.insert(open_, i + 1, True)
+
+    note(nit=passes, nfev=nfev, converged=not open_.any())
+    return La
+
+
+@instrumented
 def optimize_closed_economy(alpha: float = alpha, beta: float = beta,
                             theta: float = theta, Kbar: float = Kbar,
-                            Lbar: float = Lbar) -> Dict[str, float]:
+                            Lbar: float = Lbar) -> AutarkyResult:
     """Find autarky equilibrium (utility maximization subject to PPF).
 
     Args:
@@ -288,39 +1083,65 @@ def optimize_closed_economy(alpha: float = alpha, beta: float = beta,
         Lbar: Total labor endowment
 
     Returns:
-        Dictionary with optimal QA, QM, utility, and allocations
+        AutarkyResult with optimal QA, QM, utility, allocations, the
+        wage-rental ratio wr and the autarky relative price p
     """
-    def objective(X):
-        """Negative utility for minimization."""
-        Ka, La = X[0], X[1]
-        Ca = F(Ka, La, alpha)
-        Cm = G(Kbar - Ka, Lbar - La, beta)
-        return -U(Ca, Cm, theta)
+    eq = autarky_equilibrium(alpha, beta, theta, Kbar, Lbar)
+    return AutarkyResult(**{key: value[()] for key, value in eq.items()})
+
+
+@instrumented
+def autarky_equilibrium(alpha=alpha, beta=beta, theta=theta,
+                        Kbar=Kbar, Lbar=Lbar) -> Dict[str, np.ndarray]:
+    """Closed-form autarky equilibrium, vectorized over all parameters.
 
-    # Initial guess
-    x0 = [Kbar / 2, Lbar / 2]
+    With Cobb-Douglas technologies and preferences, sector A receives a
+    share theta of national income and sector M the rest, so factor-market
+    clearing pins down the wage-rental ratio directly:
 
-    # Solve
-    result = minimize(objective, x0, method='Nelder-Mead')
+        w/r = [(1-alpha)*theta + (1-beta)*(1-theta)]
+              / [alpha*theta + beta*(1-theta)] * Kbar/Lbar
 
-    if not result.success:
-        raise RuntimeError(f"Optimization failed: {result.message}")
+    Allocations then follow from `kl_ratio`, and the autarky price is the
+    marginal rate of substitution at the chosen outputs.
+
+    Args:
+        alpha: Capital share in sector A
+        beta: Capital share in sector M
+        theta: Consumption preference parameter
+        Kbar: Total capital endowment
+        Lbar: Total labor endowment
+
+    Returns:
+        Dictionary of arrays (broadcast shape of the inputs) with keys
+        QA, QM, KA, LA, utility, wr and p
+    """
+    alpha, beta, theta, Kbar, Lbar = np.broadcast_arrays(
+        *(np.asarray(x, dtype=float) for x in (alpha, beta, theta, Kbar, Lbar)))
+
+    capital_share = alpha * theta + beta * (1 - theta)
+    wr = (1 - capital_share) / capital_share * Kbar / Lbar
+    ka = kl_ratio(wr, alpha)
+    km = kl_ratio(wr, beta)
 
-    Kae, Lae = result.x
-    Qae = F(Kae, Lae, alpha)
-    Qme = G(Kbar - Kae, Lbar - Lae, beta)
-    Ue = U(Qae, Qme, theta)
+    LA = (Kbar - km * Lbar) / (ka - km)
+    KA = ka * LA
+    QA = F(KA, LA, alpha)
+    QM = G(Kbar - KA, Lbar - LA, beta)
 
     return {
-        'QA': Qae, 'QM': Qme,
-        'KA': Kae, 'LA': Lae,
-        'utility': Ue
+        'QA': QA, 'QM': QM,
+        'KA': KA, 'LA': LA,
+        'utility': U(QA, QM, theta),
+        'wr': wr,
+        'p': theta * QM / ((1 - theta) * QA)
     }
 
 
+@instrumented
 def calculate_lerner_diagram(p: float, QM_fixed: float = 30,
                              alpha: float = alpha, beta: float = beta,
-                             Kbar: float = Kbar, Lbar: float = Lbar) -> Dict[str, float]:
+                             Kbar: float = Kbar, Lbar: float = Lbar) -> LernerResult:
     """Calculate quantities for Lerner diagram.
 
     Args:
@@ -332,30 +1153,25 @@ def calculate_lerner_diagram(p: float, QM_fixed: float = 30,
         Lbar: Total labor endowment
 
     Returns:
-        Dictionary with allocations, outputs, and factor intensities
+        LernerResult with allocations, outputs, and factor intensities
     """
     wr = stolper_samuelson(p, alpha, beta)
     Kas = kl_ratio(wr, alpha)
     Kms = kl_ratio(wr, beta)
 
-    # Calculate quantities on isoquants
-    Lm_iso = (QM_fixed / Kms**beta)**(1 / (1 - beta))
+    # Calculate quantities on isoquants (Q = k**share * L along a ray k = K/L)
+    Lm_iso = QM_fixed / Kms**beta
     Km_iso = Kms * Lm_iso
 
-    QA_val = p * QM_fixed
-    La_iso = (QA_val / Kas**alpha)**(1 / (1 - alpha))
+    QA_val = QM_fixed / p       # unit-value isoquant: p*QA = QM
+    La_iso = QA_val / Kas**alpha
     Ka_iso = Kas * La_iso
 
     # Isocost line
     I = Km_iso + wr * Lm_iso
 
-    return {
-        'wr': wr, 'KLa': Kas, 'KLm': Kms,
-        'Lm_iso': Lm_iso, 'Km_iso': Km_iso,
-        'La_iso': La_iso, 'Ka_iso': Ka_iso,
-        'QM': QM_fixed, 'QA': QA_val,
-        'isocost_intercept': I
-    }
+    return LernerResult(wr, Kas, Kms, Lm_iso, Km_iso, La_iso, Ka_iso,
+                        QM_fixed, QA_val, I)
 
 
 # ============================================================================
@@ -662,6 +1478,119 @@ def plot_ss_line(alpha: float = alpha, beta: float = beta):
     plt.tight_layout()
 
 
+# ============================================================================
+# Fast-update Diagrams (for sliders)
+# ============================================================================
+
+class EdgeworthBoxPlot(LivePlot):
+    """Edgeworth box that updates in place; same drawing as plot_edgeworth_box.
+
+    Example:
+        >>> box = EdgeworthBoxPlot(LA=50)
+        >>> box.interact(LA=(1, 99, 1))
+    """
+
+    def __init__(self, LA: float = 50, Kbar: float = Kbar, Lbar: float = Lbar,
+                 alpha: float = alpha, beta: float = beta, ax=None, blit: bool = False):
+        fig, ax = plt.subplots(figsize=(7, 6)) if ax is None else (ax.figure, ax)
+        self._box = None
+        super().__init__(fig, ax, dict(LA=LA, Kbar=Kbar, Lbar=Lbar, alpha=alpha, beta=beta),
+                         blit=blit)
+
+    def _build(self):
+        ax = self.ax
+        self.locus, = ax.plot([], [], 'k-', linewidth=2)
+        self.iso_a, self.iso_m = self._animate(*ax.plot([], [], 'b-', [], [], 'g-'))
+        self.point = self._animate(*ax.plot([], [], 'ro', markersize=10))
+        self.guides = self._animate(*ax.plot([], [], 'k--', [], [], 'k--', alpha=0.5))
+        self.title = self._animate(ax.title)
+        self.title.set_fontsize(12)
+        ax.text(-6, -6, r'$O_A$', fontsize=16)
+        self.origin_m = ax.text(0, 0, r'$O_M$', fontsize=16)
+        ax.set_xlabel(r'$L_A$ - Labor in A', fontsize=16)
+        ax.set_ylabel(r'$K_A$ - Capital in A', fontsize=16)
+
+    def _set(self, LA, Kbar, Lbar, alpha, beta) -> bool:
+        La = np.linspace(1, Lbar - 1, 100)
+        box = (Kbar, Lbar, alpha, beta)
+        static_changed = box != self._box
+        if static_changed:
+            self._box = box
+            self.locus.set_data(La, edgeworth_locus(La, Kbar, Lbar, alpha, beta))
+            self.origin_m.set_position((Lbar - 3, Kbar + 3))
+            self.ax.set_xlim(0, Lbar)
+            self.ax.set_ylim(0, Kbar)
+
+        KA = edgeworth_locus(LA, Kbar, Lbar, alpha, beta)
+        QA = F(KA, LA, alpha)
+        QM = G(Kbar - KA, Lbar - LA, beta)
+        RTS = (alpha / (1 - alpha)) * (KA / LA)
+        self.iso_a.set_data(La, isoquant_K(La, alpha, QA))
+        self.iso_m.set_data(La, Kbar - isoquant_K(Lbar - La, beta, QM))
+        self.point.set_data([LA], [KA])
+        self.guides[0].set_data([LA, LA], [0, KA])
+        self.guides[1].set_data([0, LA], [KA, KA])
+        self.title.set_text(f"(LA, KA) = ({LA:4.1f}, {KA:4.1f})  "
+                            f"(QA, QM) = ({QA:4.1f}, {QM:4.1f})  RTS = {RTS:4.1f}")
+        return static_changed
+
+
+class LernerDiagramPlot(LivePlot):
+    """Lerner diagram that updates in place; same drawing as plot_lerner_diagram.
+
+    Example:
+        >>> lerner = LernerDiagramPlot(p=1)
+        >>> lerner.interact(p=(0.1, 10, 0.1))
+    """
+
+    def __init__(self, p: float = 1, QM_fixed: float = 30,
+                 alpha: float = alpha, beta: float = beta,
+                 Kbar: float = Kbar, Lbar: float = Lbar, ax=None, blit: bool = False):
+        fig, ax = plt.subplots(figsize=(10, 10)) if ax is None else (ax.figure, ax)
+        super().__init__(fig, ax, dict(p=p, QM_fixed=QM_fixed, alpha=alpha, beta=beta,
+                                       Kbar=Kbar, Lbar=Lbar), blit=blit)
+
+    def _build(self):
+        ax = self.ax
+        self.ray_a, self.ray_m = self._animate(*ax.plot([], [], ':', [], [], ':'))
+        self.iso_m = self._animate(*ax.plot([], [], 'b', linewidth=2))
+        self.iso_a = self._animate(*ax.plot([], [], 'g', linewidth=2))
+        self.isocost = self._animate(*ax.plot([], [], 'r:', linewidth=2, label='Isocost'))
+        self.points = self._animate(ax.scatter([0, 0], [0, 0], s=100, c=['blue', 'green'],
+                                               zorder=5))
+        for line, label in zip((self.ray_a, self.ray_m, self.iso_m, self.iso_a),
+                               ('K/L (A)', 'K/L (M)', 'Qm', 'Qa')):
+            line.set_label(label)
+        self.legend = self._animate(ax.legend(loc='upper right'))
+        self.title = self._animate(ax.title)
+        ax.set_xlim(0, 100)
+        ax.set_ylim(0, 100)
+        ax.set_xlabel('L - labor')
+        ax.set_ylabel('K - capital')
+        ax.set_aspect('equal')
+
+    def _set(self, p, QM_fixed, alpha, beta, Kbar, Lbar) -> bool:
+        results = calculate_lerner_diagram(p, QM_fixed, alpha, beta, Kbar, Lbar)
+        ll = np.linspace(0.1, Lbar, 100)
+        ll_ = np.linspace(0.05 * Lbar, 0.80 * Lbar, 100)
+
+        self.ray_a.set_data(ll, results['KLa'] * ll)
+        self.ray_m.set_data(ll, results['KLm'] * ll)
+        self.iso_m.set_data(ll_, isoquant_K(ll_, beta, QM_fixed))
+        self.iso_a.set_data(ll_, isoquant_K(ll_, alpha, results['QA']))
+        self.isocost.set_data(ll, results['isocost_intercept'] - results['wr'] * ll)
+        self.points.set_offsets([[results['Lm_iso'], results['Km_iso']],
+                                 [results['La_iso'], results['Ka_iso']]])
+
+        labels = (f"K/L (A) = {results['KLa']:.2f}", f"K/L (M) = {results['KLm']:.2f}",
+                  f"Qm = {QM_fixed}", f"Qa = {results['QA']:.1f}")
+        for text, label in zip(self.legend.get_texts(), labels):
+            text.set_text(label)
+        self.title.set_text(f'Lerner Diagram\nw/r = {results["wr"]:.2f}, '
+                            f'Ka/La = {results["KLa"]:.2f}, Km/Lm = {results["KLm"]:.2f}')
+        return False
+
+
 # ============================================================================
 # Legacy Functions (backward compatibility)
 # ============================================================================
@@ -733,10 +1662,3 @@ edgeworth = edgeworth_locus
 wreq = wage_rental_from_price
 obj = lambda X, alpha=alpha, beta=beta: -U(F(X[0], X[1], alpha),
                                            G(Kbar-X[0], Lbar-X[1], beta))
-
-
-# ============================================================================
-# Initialize plot style on import
-# ============================================================================
-
-setup_plot_style()
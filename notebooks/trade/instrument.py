@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+"""
+Opt-in per-call statistics for the model solvers.
+
+When a slider feels sluggish, switch recording on and look at what the
+solvers did:
+
+    >>> import instrument
+    >>> instrument.enable()
+    >>> ...                               # drag some sliders
+    >>> print(instrument.report())
+    solver                           calls  hits   mean ms    max ms  mean nit  max nit  mean nfev  failed
+    sfm.labor_allocation                32     -     0.114     0.642       6.3       44        6.8       0
+    sfm.eqn                             40     8     0.103     0.652         -        -          -       0
+    hos.calculate_ppf                    2     -     0.453     0.660       4.5        6      205.0       1
+
+Each call of an instrumented solver appends a `SolveStats` record (wall
+time, iterations, function evaluations, convergence flag and, for memoized
+solvers, whether the cache answered) to a bounded ring buffer.  Solvers
+decorated with `instrumented` report their counters from inside with
+`note`; `memo.memoize` opens the record for memoized solvers and notes the
+cache hit.
+
+Recording is off by default.  A disabled wrapper costs one global flag
+check per call, and `note` returns immediately.
+"""
+
+import functools
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+SIZE = 10_000      # default ring-buffer capacity (records)
+
+ENABLED = False    # read-only flag; use enable() / disable()
+
+_buffer: deque = deque(maxlen=SIZE)
+_local = threading.local()
+
+
+@dataclass(slots=True)
+class SolveStats:
+    """One solver call.
+
+    Attributes:
+        solver: Qualified solver name, e.g. ``'sfm.labor_allocation'``
+        start: time.perf_counter() at entry
+        wall: Wall-clock seconds spent in the call
+        nit: Iterations, if the solver iterates
+        nfev: Function (or point) evaluations, if the solver reports them
+        converged: False if the solver stopped before meeting its tolerance
+        cache_hit: For memoized solvers, whether the cache answered
+    """
+    solver: str
+    start: float
+    wall: float = 0.0
+    nit: Optional[int] = None
+    nfev: Optional[int] = None
+    converged: Optional[bool] = None
+    cache_hit: Optional[bool] = None
+
+
+def enable(size: Optional[int] = None):
+    """Start recording, optionally resizing (and clearing) the ring buffer."""
+    global ENABLED, _buffer
+    if size is not None and size != _buffer.maxlen:
+        _buffer = deque(maxlen=size)
+    ENABLED = True
+
+
+def disable():
+    """Stop recording; records already taken are kept."""
+    global ENABLED
+    ENABLED = False
+
+
+def clear():
+    """Drop all records."""
+    _buffer.clear()
+
+
+@contextmanager
+def recording(size: Optional[int] = None):
+    """Record within a ``with`` block, restoring the previous state after."""
+    was_enabled = ENABLED
+    enable(size)
+    try:
+        yield
+    finally:
+        if not was_enabled:
+            disable()
+
+
+def note(**counters):
+    """Set counters (nit, nfev, converged, cache_hit) on the current call."""
+    if not ENABLED:
+        return
+    stack = getattr(_local, 'stack', None)
+    if stack:
+        stats = stack[-1]
+        for key, value in counters.items():
+            setattr(stats, key, value)
+
+
+def call(solver: str, func: Callable, args: tuple, kwargs: dict):
+    """Run func(*args, **kwargs) as a recorded call of `solver`."""
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+    stats = SolveStats(solver, time.perf_counter())
+    stack.append(stats)
+    try:
+        return func(*args, **kwargs)
+    finally:
+        stats.wall = time.perf_counter() - stats.start
+        stack.pop()
+        _buffer.append(stats)
+
+
+def instrumented(func: Optional[Callable] = None, *, name: Optional[str] = None):
+    """Decorate a solver so its calls are recorded while recording is on.
+
+    Args:
+        func: Function to wrap
+        name: Name the calls are recorded under (defaults to module.function)
+    """
+    if func is None:
+        return functools.partial(instrumented, name=name)
+    name = name or f'{func.__module__}.{func.__name__}'
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not ENABLED:
+            return func(*args, **kwargs)
+        return call(name, func, args, kwargs)
+
+    return wrapper
+
+
+def records(solver: Optional[str] = None) -> List[SolveStats]:
+    """Buffered records, oldest first, optionally for one solver only."""
+    return [r for r in list(_buffer) if solver is None or r.solver == solver]
+
+
+def summary() -> Dict[str, Dict[str, float]]:
+    """Per-solver aggregates of the buffered records.
+
+    For each solver: calls, cache hits, mean/max/total wall time (ms),
+    mean/max iterations, mean function evaluations and the number of calls
+    that did not converge.  Counters a solver never reports are None.
+    """
+    groups: Dict[str, List[SolveStats]] = {}
+    for r in list(_buffer):
+        groups.setdefault(r.solver, []).append(r)
+
+    def mean(values):
+        return sum(values) / len(values) if values else None
+
+    out = {}
+    for solver, rs in groups.items():
+        walls = [r.wall * 1e3 for r in rs]
+        nit = [r.nit for r in rs if r.nit is not None]
+        nfev = [r.nfev for r in rs if r.nfev is not None]
+        hits = [r.cache_hit for r in rs if r.cache_hit is not None]
+        out[solver] = {
+            'calls': len(rs),
+            'cache_hits': sum(hits) if hits else None,
+            'mean_ms': mean(walls), 'max_ms': max(walls), 'total_ms': sum(walls),
+            'mean_nit': mean(nit), 'max_nit': max(nit) if nit else None,
+            'mean_nfev': mean(nfev),
+            'not_converged': sum(r.converged is False for r in rs),
+        }
+    return out
+
+
+def report() -> str:
+    """`summary` as a fixed-width table, slowest solvers (total time) first."""
+    def fmt(value, spec):
+        return '-' if value is None else format(value, spec)
+
+    rows = sorted(summary().items(), key=lambda item: -item[1]['total_ms'])
+    lines = [f'{"solver":30s} {"calls":>7s} {"hits":>5s} {"mean ms":>9s} {"max ms":>9s} '
+             f'{"mean nit":>9s} {"max nit":>8s} {"mean nfev":>10s} {"failed":>7s}']
+    for solver, s in rows:
+        lines.append(f'{solver:30s} {s["calls"]:7d} {fmt(s["cache_hits"], "5d"):>5s} '
+                     f'{s["mean_ms"]:9.3f} {s["max_ms"]:9.3f} {fmt(s["mean_nit"], "9.1f"):>9s} '
+                     f'{fmt(s["max_nit"], "8d"):>8s} {fmt(s["mean_nfev"], "10.1f"):>10s} '
+                     f'{s["not_converged"]:7d}')
+    return '\n'.join(lines)
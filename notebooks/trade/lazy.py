@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+Deferred imports for the plotting stack.
+
+The model modules only need NumPy to solve for equilibria; matplotlib,
+ipywidgets and seaborn are needed only once something is drawn.  Binding
+the usual names to stand-ins keeps ``from hos import *`` working in the
+notebooks while a headless batch worker never loads the GUI stack:
+
+    plt = LazyModule('matplotlib.pyplot', on_load=_setup_plot_style)
+    interact = LazyAttr('ipywidgets', 'interact')
+
+The real module is imported the first time an attribute is looked up (or
+the object is called), after which every access goes straight through.
+"""
+
+import importlib
+from typing import Callable, Optional
+
+
+class LazyModule:
+    """Stand-in for a module that is imported on first attribute access.
+
+    Args:
+        name: Dotted module name, e.g. 'matplotlib.pyplot'
+        on_load: Optional hook called with the module right after import,
+            used to apply plot styles only once plotting actually starts
+    """
+
+    def __init__(self, name: str, on_load: Optional[Callable] = None):
+        self.__dict__['_name'] = name
+        self.__dict__['_on_load'] = on_load
+        self.__dict__['_module'] = None
+
+    def _load(self):
+        module = self.__dict__['_module']
+        if module is None:
+            module = importlib.import_module(self._name)
+            self.__dict__['_module'] = module
+            if self._on_load is not None:
+                self._on_load(module)
+        return module
+
+    @property
+    def loaded(self) -> bool:
+        """True once the underlying module has been imported."""
+        return self.__dict__['_module'] is not None
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = 'loaded' if self.loaded else 'not loaded'
+        return f'<lazy module {self._name!r} ({state})>'
+
+
+class LazyAttr:
+    """Stand-in for a callable such as ``ipywidgets.interact``.
+
+    Calling it, or looking up any of its attributes, imports the module and
+    forwards to the real object.
+    """
+
+    def __init__(self, module, attr: str):
+        self._module = module if isinstance(module, LazyModule) else LazyModule(module)
+        self._attr = attr
+
+    def _load(self):
+        return getattr(self._module, self._attr)
+
+    def __call__(self, *args, **kwargs):
+        return self._load()(*args, **kwargs)
+
+    def __getattr__(self, attr):
+        if attr.startswith('_'):
+            raise AttributeError(attr)
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        return f'<lazy {self._module._name}.{self._attr}>'
@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+"""
+Stateful diagrams for slider-driven notebooks.
+
+The ``plot_*`` functions build a fresh figure on every widget callback.  A
+`LivePlot` instead creates its axes and artists once and, when a parameter
+changes, only pushes new data into them (``set_data``, ``set_offsets``,
+``set_text``).  With ``blit=True`` on a canvas that supports it, the static
+background is cached and only the moving artists are redrawn:
+
+    box = hos.EdgeworthBoxPlot(LA=50)
+    box.interact(LA=(1, 99, 1))
+
+Subclasses implement `_build` (create artists, register the moving ones
+with `_animate`) and `_set` (update artist data for the current params,
+returning True when something static such as an axis limit changed).
+
+Plain plot functions that take a model-parameters object (``params=``) are
+decorated with `hide_from_interact`, so ``interact(sfm.sfmplot, ...)``
+only builds sliders for the economic arguments.
+"""
+
+import inspect
+from typing import Dict, List
+
+
+def hide_from_interact(*names: str):
+    """Leave the arguments `names` out of the signature ipywidgets reads.
+
+    ``interact`` builds a widget for every argument with a default and
+    raises ValueError for one it cannot convert, such as a frozen
+    ``params=DEFAULT_PARAMS`` object.  The decorated function is unchanged
+    and still accepts the hidden arguments when called directly.
+    """
+    def decorate(func):
+        sig = inspect.signature(func)
+        func.__signature__ = sig.replace(parameters=[
+            p for p in sig.parameters.values() if p.name not in names])
+        return func
+    return decorate
+
+
+class LivePlot:
+    """Base class for diagrams that update in place.
+
+    Args:
+        fig, ax: Figure and axes to draw into
+        params: Initial parameter values
+        blit: Redraw only the animated artists over a cached background
+    """
+
+    def __init__(self, fig, ax, params: Dict, blit: bool = False):
+        self.fig, self.ax = fig, ax
+        self.params = dict(params)
+        self.blit = blit and getattr(fig.canvas, 'supports_blit', False)
+        self._animated: List = []
+        self._background = None
+        self._build()
+        self._set(**self.params)
+        if self.blit:
+            self.fig.canvas.mpl_connect('draw_event', self._on_draw)
+
+    # subclass hooks ---------------------------------------------------------
+
+    def _build(self):
+        raise NotImplementedError
+
+    def _set(self, **params) -> bool:
+        raise NotImplementedError
+
+    def _animate(self, *artists):
+        """Register artists that change with the parameters."""
+        for artist in artists:
+            artist.set_animated(self.blit)
+            self._animated.append(artist)
+        return artists[0] if len(artists) == 1 else artists
+
+    # drawing ----------------------------------------------------------------
+
+    def update(self, **params):
+        """Set new parameter values and redraw what changed."""
+        self.params.update(params)
+        static_changed = self._set(**self.params)
+        if self.blit and self._background is not None and not static_changed:
+            canvas = self.fig.canvas
+            canvas.restore_region(self._background)
+            self._draw_animated()
+            canvas.blit(self.fig.bbox)
+            canvas.flush_events()
+        else:
+            self._background = None
+            self.fig.canvas.draw_idle()
+        return self
+
+    def draw(self):
+        """Full synchronous draw (also refreshes the blit background)."""
+        self.fig.canvas.draw()
+        return self
+
+    def _on_draw(self, event):
+        self._background = self.fig.canvas.copy_from_bbox(self.fig.bbox)
+        self._draw_animated()
+
+    def _draw_animated(self):
+        for artist in self._animated:
+            self.fig.draw_artist(artist)
+
+    def interact(self, **ranges):
+        """Attach ipywidgets sliders, e.g. ``interact(p=(0.5, 2, 0.05))``.
+
+        On the inline backend figures cannot change after display, so the
+        updated figure is re-displayed from the callback; interactive
+        backends (ipympl) update the figure in place.
+        """
+        import matplotlib
+        import matplotlib.pyplot as plt
+        from ipywidgets import interact
+
+        inline = 'inline' in matplotlib.get_backend()
+        if inline:
+            plt.close(self.fig)         # shown by the callback, not at cell end
+
+        def callback(**params):
+            self.update(**params)
+            if inline:
+                from IPython.display import display
+                display(self.fig)
+
+        return interact(callback, **ranges)
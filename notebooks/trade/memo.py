@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+"""
+Bounded memoization for the model solvers.
+
+Interactive notebooks re-run the same equilibrium solves every time a slider
+is dragged back over a value it has already visited.  Decorating a solver
+with `memoize` keeps its most recent results in a thread-safe LRU cache:
+
+    @memoize
+    def eqn(p, Lbar=Lbar, Tbar=Tbar, Kbar=Kbar):
+        ...
+
+Arguments are bound to the function signature (so ``eqn(1)`` and
+``eqn(1, Lbar=400)`` share an entry) and float arguments can optionally be
+rounded to a number of decimals before lookup.  Calls with unhashable
+arguments such as NumPy arrays bypass the cache.
+
+Every memoized solver registers itself so that hit/miss counters can be
+inspected for a running kernel:
+
+    >>> import memo
+    >>> memo.cache_stats()
+    {'sfm.eqn': {'hits': 12, 'misses': 3, 'bypassed': 0, 'size': 3, 'maxsize': 256}, ...}
+
+The caches live in the Python process, so under Voila each kernel keeps
+its own.  While `instrument` recording is on, every call of a memoized
+solver is recorded with its wall time and whether the cache answered.
+"""
+
+import functools
+import inspect
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
+from numbers import Real
+from typing import Callable, Dict, Optional
+
+import instrument
+
+MAXSIZE = 256      # default number of entries kept per solver
+QUANTIZE = None    # default decimals to round float arguments to (None = exact)
+
+_registry: Dict[str, 'LRUCache'] = {}
+_UNSET = object()
+
+
+class LRUCache:
+    """Least-recently-used mapping with hit/miss counters.
+
+    Args:
+        maxsize: Maximum number of entries (0 disables caching)
+        quantize: Decimals to round float arguments to, or None for exact keys
+    """
+
+    def __init__(self, maxsize: int = MAXSIZE, quantize: Optional[int] = QUANTIZE):
+        self.maxsize = maxsize
+        self.quantize = quantize
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def make_key(self, values: tuple):
+        """Hashable key for a tuple of bound argument values, or None."""
+        if self.quantize is not None:
+            values = tuple(round(float(v), self.quantize)
+                           if isinstance(v, Real) and not isinstance(v, bool) else v
+                           for v in values)
+        try:
+            hash(values)
+        except TypeError:
+            return None
+        return values
+
+    def lookup(self, key):
+        """Return (True, value) on a hit and (False, None) on a miss."""
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return True, self._data[key]
+            self.misses += 1
+            return False, None
+
+    def store(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def bypass(self):
+        with self._lock:
+            self.bypassed += 1
+
+    def resize(self, maxsize: int):
+        with self._lock:
+            self.maxsize = maxsize
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.bypassed = 0
+
+    def info(self) -> Dict[str, int]:
+        return {'hits': self.hits, 'misses': self.misses,
+                'bypassed': self.bypassed, 'size': len(self._data),
+                'maxsize': self.maxsize}
+
+
+def memoize(func: Optional[Callable] = None, *, maxsize: Optional[int] = None,
+            quantize: Optional[int] = None, name: Optional[str] = None):
+    """Decorate a solver with a bounded LRU cache.
+
+    Can be used bare (``@memoize``) or with options
+    (``@memoize(maxsize=64, quantize=6)``).  Mapping results (dicts and
+    `hos.Record` objects) are copied on the way out so callers cannot
+    corrupt cached entries.
+
+    Args:
+        func: Function to wrap
+        maxsize: Entries to keep (defaults to memo.MAXSIZE)
+        quantize: Decimals to round float arguments to (defaults to memo.QUANTIZE)
+        name: Key under which stats are reported (defaults to module.function)
+    """
+    if func is None:
+        return functools.partial(memoize, maxsize=maxsize, quantize=quantize, name=name)
+
+    cache = LRUCache(MAXSIZE if maxsize is None else maxsize,
+                     QUANTIZE if quantize is None else quantize)
+    signature = inspect.signature(func)
+    name = name or f'{func.__module__}.{func.__name__}'
+    # Signature.bind dominates the cost of a cache hit, so plain calls to
+    # functions without *args, **kwargs or keyword-only parameters build the
+    # key directly from the defaults
+    params = signature.parameters.values()
+    names = tuple(p.name for p in params)
+    index = {name: i for i, name in enumerate(names)}
+    defaults = tuple(p.default for p in params)
+    n_required = sum(p.default is p.empty for p in params)
+    simple = all(p.kind is p.POSITIONAL_OR_KEYWORD for p in params)
+
+    def fast_values(args, kwargs):
+        n = len(args)
+        if not simple or n > len(names):
+            return None
+        if not kwargs:
+            return args + defaults[n:] if n >= n_required else None
+        if any(index.get(k, -1) < n for k in kwargs):
+            return None
+        if any(names[i] not in kwargs for i in range(n, n_required)):
+            return None
+        return args + tuple(kwargs.get(k, d) for k, d in zip(names[n:], defaults[n:]))
+
+    def cached(*args, **kwargs):
+        values = fast_values(args, kwargs)
+        if values is None:      # let bind apply defaults or raise the TypeError
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            values = tuple(bound.arguments.values())
+        key = cache.make_key(values)
+        if key is None or cache.maxsize <= 0:
+            cache.bypass()
+            return func(*args, **kwargs)
+        hit, result = cache.lookup(key)
+        if instrument.ENABLED:
+            instrument.note(cache_hit=hit)
+        if not hit:
+            result = func(*args, **kwargs)
+            cache.store(key, result)
+        return _fresh(result)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if instrument.ENABLED:
+            return instrument.call(name, cached, args, kwargs)
+        return cached(*args, **kwargs)
+
+    wrapper.cache = cache
+    wrapper.cache_info = cache.info
+    wrapper.cache_clear = cache.clear
+    _registry[name] = cache
+    return wrapper
+
+
+def _fresh(result):
+    """Copy of a mutable mapping result (dicts and `hos.Record` objects)."""
+    if isinstance(result, dict):
+        return dict(result)
+    return result.__copy__() if isinstance(result, Mapping) else result
+
+
+def configure(maxsize: Optional[int] = None, quantize=_UNSET):
+    """Change size and/or key quantization of every registered cache.
+
+    Pass ``quantize=None`` to go back to exact keys.  Changing the
+    quantization clears the caches, since existing keys were built with the
+    old rounding.
+    """
+    for cache in _registry.values():
+        if maxsize is not None:
+            cache.resize(maxsize)
+        if quantize is not _UNSET and quantize != cache.quantize:
+            cache.quantize = quantize
+            cache.clear()
+
+
+def cache_stats() -> Dict[str, Dict[str, int]]:
+    """Hit/miss/size counters for every memoized solver, keyed by name."""
+    return {name: cache.info() for name, cache in _registry.items()}
+
+
+def clear_all():
+    """Empty every registered cache and reset its counters."""
+    for cache in _registry.values():
+        cache.clear()
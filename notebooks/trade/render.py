@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+"""
+Headless batch rendering of the model figures.
+
+The plotting functions (``hos.plot_*``, ``sfm.sfmplot``, ``ricardo.rtwopane``,
+``cd.consume_plot`` ...) draw into pyplot's global state and return nothing.
+`render_batch` runs a list of such calls across a process pool with the Agg
+backend, saves whatever figure each call leaves current, and closes every
+figure before the next job so workers do not accumulate them:
+
+    from render import RenderJob, render_batch
+
+    jobs = [RenderJob('sfm.sfmplot', {'p': p}, f'figs/sfm_{i:03d}.png')
+            for i, p in enumerate(np.linspace(0.5, 2, 200))]
+    report = render_batch(jobs, processes=4)
+    print(report)
+
+Functions are named as 'module.function' strings so jobs pickle cheaply and
+each worker imports the model modules once.  The output format follows the
+filename extension (.png, .svg, .pdf).  From the shell, a JSON list of jobs
+can be rendered with
+
+    python render.py jobs.json [processes]
+"""
+
+import contextlib
+import importlib
+import io
+import json
+import multiprocessing
+import os
+import sys
+import time
+import warnings
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
+
+try:
+    import resource
+except ImportError:         # not available on Windows
+    resource = None
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SEARCH_PATH = [HERE, os.path.dirname(HERE)]     # trade/ and notebooks/ (for cd.py)
+
+
+@dataclass
+class RenderJob:
+    """One figure to draw.
+
+    Attributes:
+        func: Plot function as 'module.function', e.g. 'hos.plot_ppf'
+        kwargs: Keyword arguments for the call
+        filename: Output path; the extension selects the format
+        dpi: Resolution for raster formats
+    """
+    func: str
+    kwargs: Dict = field(default_factory=dict)
+    filename: str = 'figure.png'
+    dpi: int = 100
+
+
+@dataclass
+class RenderResult:
+    """Outcome of one job; `error` is None on success."""
+    filename: str
+    seconds: float
+    error: Optional[str] = None
+
+
+@dataclass
+class RenderReport:
+    """Summary of a batch.
+
+    Attributes:
+        results: One RenderResult per job, in job order
+        seconds: Wall-clock time of the whole batch
+        processes: Number of worker processes (0 = rendered in-process)
+        peak_rss_mb: Largest resident set size reached by any worker, in MB
+            (None where the platform does not report it)
+    """
+    results: List[RenderResult]
+    seconds: float
+    processes: int
+    peak_rss_mb: Optional[float] = None
+
+    @property
+    def failed(self) -> List[RenderResult]:
+        return [r for r in self.results if r.error is not None]
+
+    @property
+    def throughput(self) -> float:
+        """Figures written per second."""
+        return (len(self.results) - len(self.failed)) / self.seconds if self.seconds else 0.0
+
+    def __str__(self):
+        rss = 'n/a' if self.peak_rss_mb is None else f'{self.peak_rss_mb:.0f} MB'
+        return (f'{len(self.results)} jobs, {len(self.failed)} failed, '
+                f'{self.seconds:.2f} s on {self.processes or 1} process(es): '
+                f'{self.throughput:.1f} figures/s, peak RSS {rss}')
+
+
+def _peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of the calling process in MB."""
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 2**20 if sys.platform == 'darwin' else rss / 2**10   # bytes vs KB
+
+
+def _add_search_path(search_path: Sequence[str]):
+    for path in reversed(search_path):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+
+
+def _init_worker(search_path: Sequence[str]):
+    """Put the model modules on sys.path and select the Agg backend.
+
+    Only run in spawned workers: forcing the backend in the caller would
+    switch a live notebook session away from its own backend.
+    """
+    _add_search_path(search_path)
+    import matplotlib
+    matplotlib.use('Agg', force=True)
+
+
+@contextlib.contextmanager
+def _agg_backend():
+    """Render with Agg in this process, restoring the caller's backend after."""
+    import matplotlib
+    backend = matplotlib.get_backend()
+    matplotlib.use('Agg', force=True)
+    try:
+        yield
+    finally:
+        matplotlib.use(backend, force=True)
+
+
+def _resolve(name: str):
+    module, _, func = name.rpartition('.')
+    return getattr(importlib.import_module(module), func)
+
+
+def render_job(job: RenderJob) -> RenderResult:
+    """Draw one job on a fresh figure, save it and close the figures it made.
+
+    Figures that were open before the call (a notebook's own, when
+    rendering in-process) are left open and the current one is restored.
+    Output the plot functions print (equilibrium summaries and the like) is
+    discarded.  Exceptions are caught and reported in the result so one bad
+    parameter set does not abort the batch.
+    """
+    import matplotlib.pyplot as plt
+
+    t0 = time.perf_counter()
+    error = None
+    before = set(plt.get_fignums())
+    current = plt.gcf().number if before else None
+    try:
+        plt.figure()
+        with contextlib.redirect_stdout(io.StringIO()), warnings.catch_warnings():
+            warnings.simplefilter('ignore')     # Agg's "cannot show" and overflow noise
+            _resolve(job.func)(**job.kwargs)
+            directory = os.path.dirname(job.filename)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            plt.gcf().savefig(job.filename, dpi=job.dpi)
+    except Exception as e:
+        error = f'{type(e).__name__}: {e}'
+    finally:
+        for num in set(plt.get_fignums()) - before:
+            plt.close(num)
+        if current is not None:
+            plt.figure(current)
+    return RenderResult(job.filename, time.perf_counter() - t0, error)
+
+
+def _render_chunk(jobs: List[RenderJob]):
+    return [render_job(job) for job in jobs], _peak_rss_mb()
+
+
+def render_batch(jobs: Sequence[RenderJob], processes: Optional[int] = None,
+                 chunksize: int = 8,
+                 search_path: Sequence[str] = SEARCH_PATH) -> RenderReport:
+    """Render a list of jobs across a process pool.
+
+    Args:
+        jobs: RenderJob instances (or dicts with the same fields)
+        processes: Worker count; None uses os.cpu_count(), 0 renders in
+            this process (handy for debugging)
+        chunksize: Jobs handed to a worker at a time
+        search_path: Directories added to sys.path in the workers
+
+    Returns:
+        RenderReport with per-job results in job order
+    """
+    jobs = [job if isinstance(job, RenderJob) else RenderJob(**job) for job in jobs]
+    chunks = [jobs[i:i + chunksize] for i in range(0, len(jobs), chunksize)]
+
+    t0 = time.perf_counter()
+    if processes == 0:
+        _add_search_path(search_path)
+        with _agg_backend():
+            done = [_render_chunk(chunk) for chunk in chunks]
+    else:
+        processes = processes or os.cpu_count()
+        with multiprocessing.Pool(processes, _init_worker, (list(search_path),)) as pool:
+            done = pool.map(_render_chunk, chunks)
+    seconds = time.perf_counter() - t0
+
+    results = [result for chunk_results, _ in done for result in chunk_results]
+    peaks = [rss for _, rss in done if rss is not None]
+    return RenderReport(results, seconds, processes, max(peaks) if peaks else None)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        sys.exit('usage: python render.py jobs.json [processes]')
+    with open(sys.argv[1]) as f:
+        jobs = json.load(f)
+    report = render_batch(jobs, int(sys.argv[2]) if len(sys.argv) > 2 else None)
+    for r in report.failed:
+        print(f'{r.filename}: {r.error}', file=sys.stderr)
+    print(report)
+    sys.exit(1 if report.failed else 0)
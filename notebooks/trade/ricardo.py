@@ -5,34 +5,89 @@ Created on Mon Sep 16 08:57:01 2019
 @author: jconning
 """
 
+import warnings
+from dataclasses import dataclass, replace
+
 import numpy as np
-import matplotlib.pyplot as plt
-from scipy.optimize import fsolve
+
+from lazy import LazyModule
+from liveplot import hide_from_interact
+from instrument import instrumented, note
+from memo import memoize
+
+
+def _plot_style(plt):
+    '''Style applied when pyplot is first used (not at import).'''
+    plt.style.use('bmh')
+    plt.rcParams["figure.figsize"] = [7,7]
+    plt.rcParams["axes.spines.right"] = False
+    plt.rcParams["axes.spines.top"] = False
+    plt.rcParams["font.size"] = 18
+
+# pyplot loads on the first plot call so the solvers run headless
+plt = LazyModule('matplotlib.pyplot', on_load=_plot_style)
+
+@dataclass(frozen=True)
+class RicardoParams:
+    '''Technology and labor endowment of one Ricardian economy, plus the
+    plot bounds.  Frozen and hashable, so it can be passed to any solver or
+    plot with params= (foreign= for the partner country) and used as a
+    memoize key; derive variants with replace():
+        rtwopane(p=1, foreign=DEFAULT_FOREIGN.replace(lbar=150))
+    mplx, mply: labor productivity in goods X and Y
+    lbar: labor endowment
+    xmax, ymax, n: axis bounds and number of points on the QX grid'''
+    mplx: float = 2
+    mply: float = 1
+    lbar: float = 100
+    xmax: float = 400
+    ymax: float = 400
+    n: int = 50
+
+    def __post_init__(self):
+        if min(self.mplx, self.mply) <= 0:
+            raise ValueError(f"labor productivities must be positive, got {self.mplx}, {self.mply}")
+        if self.lbar <= 0:
+            raise ValueError("Endowments must be positive")
+        if self.n < 2:
+            raise ValueError(f"n must be at least 2, got {self.n}")
+
+    def replace(self, **changes):
+        return replace(self, **changes)
+
+    def qx_grid(self, n=None):
+        '''Quantities of X at which lines are plotted'''
+        return np.linspace(0.1, self.xmax, self.n if n is None else n)
+
+    def technology(self, mplx=None, mply=None, lbar=None):
+        '''(mplx, mply, lbar), with explicitly passed values taking precedence'''
+        return (self.mplx if mplx is None else mplx,
+                self.mply if mply is None else mply,
+                self.lbar if lbar is None else lbar)
 
 
-plt.style.use('bmh')
-plt.rcParams["figure.figsize"] = [7,7]
-plt.rcParams["axes.spines.right"] = False
-plt.rcParams["axes.spines.top"] = False
-plt.rcParams["font.size"] = 18
+DEFAULT_PARAMS = RicardoParams()
+DEFAULT_FOREIGN = RicardoParams(mplx=DEFAULT_PARAMS.mply, mply=DEFAULT_PARAMS.mplx)
 
-# Some default parameters when none are supplied
-MPLX = 2
-MPLY = 1
-LBAR = 100
+# Legacy module-level names (read-only defaults; functions take params=)
+MPLX = DEFAULT_PARAMS.mplx
+MPLY = DEFAULT_PARAMS.mply
+LBAR = DEFAULT_PARAMS.lbar
 
 NAMEX = 'Good X'
 NAMEY = 'Good Y'
 
-XMAX = 400   # for plot bounds and aesthetics
-YMAX = 400
-N = 50              # num of datapoints to plot
-QX =  np.linspace(0.1, XMAX, N)
+XMAX = DEFAULT_PARAMS.xmax   # for plot bounds and aesthetics
+YMAX = DEFAULT_PARAMS.ymax
+N = DEFAULT_PARAMS.n         # num of datapoints to plot
+QX =  DEFAULT_PARAMS.qx_grid()
 
-def budget(px=1, py=1, I=100, show = False):   
+@hide_from_interact('params')
+def budget(px=1, py=1, I=100, show = False, params=DEFAULT_PARAMS):   
     '''Plot a linear PPF diagram 
        show == False delays plt.show() to allow other elements to be plotted first'''
     XMAX, YMAX = 300,300
+    QX = params.qx_grid()
     qy = I/py - (px/py) * QX
     plt.plot(QX, qy, linewidth=2, label='Budget')
     plt.axis([0,XMAX,0,YMAX])
@@ -43,27 +98,31 @@ def budget(px=1, py=1, I=100, show = False):
     if show: #use False for subplots
         plt.show()
         
-def rppf(mplx=MPLX, mply=MPLY, lbar=LBAR, show = False, title='Home'):   
+@hide_from_interact('params')
+def rppf(mplx=None, mply=None, lbar=None, show = False, title='Home', params=DEFAULT_PARAMS):   
     '''Plot a linear PPF diagram 
        show == False delays plt.show() to allow other elements to be plotted first'''
+    mplx, mply, lbar = params.technology(mplx, mply, lbar)
+    QX = params.qx_grid()
     qy = mply*lbar - (mply/mplx) * QX
     plt.plot(QX, qy, linewidth=2, label='PPF')
-    plt.axis([0,XMAX,0,YMAX])
+    plt.axis([0,params.xmax,0,params.ymax])
     plt.xlabel(NAMEX), plt.ylabel(NAMEY)
     plt.title(title)
-    plt.text(0.15*XMAX, 0.9*YMAX, 
+    plt.text(0.15*params.xmax, 0.9*params.ymax, 
              r' $\frac{MPL_Y}{MPL_X}=\frac{P_X}{P_Y}=$'+'{:3.2f}'.format(mply/mplx)
              + ' Y/X', fontsize=14  )  
     if show: #use False for subplots
         plt.show()
         
-def tworppf(mplx, mply, lbar, mplfx, mplfy, lbarf):
-    foreign = rppf
+@hide_from_interact('params', 'foreign')
+def tworppf(mplx=None, mply=None, lbar=None, mplfx=None, mplfy=None, lbarf=None,
+            params=DEFAULT_PARAMS, foreign=DEFAULT_FOREIGN):
     plt.figure(1, figsize =(12,12))
     plt.subplot(121, aspect='equal')
-    rppf(mplx, mply, lbar, title='Home')
+    rppf(mplx, mply, lbar, title='Home', params=params)
     plt.subplot(122, aspect='equal')
-    foreign(mplfx, mplfy, lbarf, title='Foreign')
+    rppf(mplfx, mplfy, lbarf, title='Foreign', params=foreign)
     plt.ylabel('')
           
        
@@ -75,14 +134,17 @@ def indif(x, ubar):
 def demands(p, I):
      return I/(2*p) , I/2
 
-def indif_plot(p, I):
+@hide_from_interact('params')
+def indif_plot(p, I, params=DEFAULT_PARAMS):
+    QX = params.qx_grid()
     xd, yd = demands(p, I)
     plt.scatter(xd,yd)
     ubar = xd*yd
     QX_ = np.where( (QX>xd*0.3)&(QX<xd*2), QX, np.nan) #clip for aesthetics
     plt.plot(QX_, indif(QX_, ubar))
     
-def openeq(mplx=MPLX, mply=MPLY, lbar=LBAR, pw=1):
+def openeq(mplx=None, mply=None, lbar=None, pw=1, params=DEFAULT_PARAMS):
+    mplx, mply, lbar = params.technology(mplx, mply, lbar)
     if pw > mply/mplx:
         qx = mplx*lbar
         qy = 0
@@ -93,7 +155,8 @@ def openeq(mplx=MPLX, mply=MPLY, lbar=LBAR, pw=1):
     cx, cy = demands(pw,I)
     return qx, qy, cx, cy
 
-def openeq2(mplx=MPLX, mply=MPLY, lbar=LBAR, pw=1):
+def openeq2(mplx=None, mply=None, lbar=None, pw=1, params=DEFAULT_PARAMS):
+    mplx, mply, lbar = params.technology(mplx, mply, lbar)
     qx = (pw > mply/mplx) * mplx*lbar
     qy = (pw <= mply/mplx) * mply*lbar
     I = pw*qx + qy       
@@ -101,54 +164,331 @@ def openeq2(mplx=MPLX, mply=MPLY, lbar=LBAR, pw=1):
     return qx, qy, cx, cy
        
 
-def openrppf(mplx=MPLX, mply=MPLY, lbar=LBAR, pw=1, show = False, title='Home'):
+@hide_from_interact('params')
+def openrppf(mplx=None, mply=None, lbar=None, pw=1, show = False, title='Home',
+             params=DEFAULT_PARAMS):
     '''Like rppf but also plots world price line and specialization'''
-    rppf(mplx, mply, lbar)
-    qx, qy, cx, cy = openeq(mplx, mply, lbar, pw)
+    rppf(mplx, mply, lbar, params=params)
+    qx, qy, cx, cy = openeq(mplx, mply, lbar, pw, params=params)
     plt.scatter(qx,qy)
     plt.title(title)
     I = pw*qx + qy    #income measured in units of y
-    budget(px=pw, py=1, I=I)
-    indif_plot(pw, I)
+    budget(px=pw, py=1, I=I, params=params)
+    indif_plot(pw, I, params=params)
+
+
+# Regimes of the two-country world equilibrium returned by rworld_equilibrium
+SPECIALIZED = 0         # both countries completely specialized
+HOME_DIVERSIFIED = 1    # home produces both goods, price = home autarky price
+FOREIGN_DIVERSIFIED = 2 # foreign produces both goods, price = foreign autarky price
+
+@instrumented
+def rworld_equilibrium(mplx=None, mply=None, lbar=None, mplfx=None, mplfy=None, lbarf=None,
+                       params=DEFAULT_PARAMS, foreign=DEFAULT_FOREIGN):
+    '''Exact two-country Ricardian world equilibrium, vectorized.
+
+    All arguments may be arrays (broadcast against each other); those not
+    passed come from params (home) and foreign.  Instead of
+    root-finding on the step-shaped excess demand, the three possible
+    specialization regimes are checked directly: the country with the lower
+    autarky price mply/mplx exports X, and the price that balances world
+    demand under complete specialization is clipped to the interval between
+    the two autarky prices.  If it is clipped, the country whose autarky
+    price binds produces both goods.
+
+    Returns a dict of arrays: world price p, home and foreign production and
+    consumption (qx, qy, cx, cy, qfx, qfy, cfx, cfy), home net exports of X
+    (xnx), whether home exports X (home_exports_x) and the regime code.'''
+    mplx, mply, lbar, mplfx, mplfy, lbarf = np.broadcast_arrays(
+        *(np.asarray(x, dtype=float) for x in (*params.technology(mplx, mply, lbar),
+                                                *foreign.technology(mplfx, mplfy, lbarf))))
+    a, af = mply/mplx, mplfy/mplfx          # autarky prices of X in units of Y
+    home_x = a <= af
+
+    # exporter (e) of X and the other country (o)
+    ae, ao = np.where(home_x, a, af), np.where(home_x, af, a)
+    Xe = np.where(home_x, mplx*lbar, mplfx*lbarf)
+    Ye = ae*Xe
+    Yo = np.where(home_x, mplfy*lbarf, mply*lbar)
+    ps = Yo/Xe                      # price that clears X under complete specialization
+    p = np.clip(ps, ae, ao)
+
+    # corners from openeq2, then fix up whichever country is diversified
+    qx, qy, _, _ = openeq2(mplx, mply, lbar, p)
+    qfx, qfy, _, _ = openeq2(mplfx, mplfy, lbarf, p)
+    e_div, o_div = ps <= ae, (ps >= ao) & ~(ps <= ae)
+    qxe = np.where(e_div, (Ye + Yo)/(2*ae), Xe)
+    qxo = np.where(o_div, (Yo - ao*Xe)/(2*ao), 0)
+    home_div = np.where(home_x, e_div, o_div)
+    foreign_div = np.where(home_x, o_div, e_div)
+    qx = np.where(home_div, np.where(home_x, qxe, qxo), qx)
+    qy = np.where(home_div, mply*lbar - a*qx, qy)
+    qfx = np.where(foreign_div, np.where(home_x, qxo, qxe), qfx)
+    qfy = np.where(foreign_div, mplfy*lbarf - af*qfx, qfy)
+
+    cx, cy = demands(p, p*qx + qy)
+    cfx, cfy = demands(p, p*qfx + qfy)
+    regime = np.where(home_div, HOME_DIVERSIFIED,
+                      np.where(foreign_div, FOREIGN_DIVERSIFIED, SPECIALIZED))
 
+    out = dict(p=p, qx=qx, qy=qy, cx=cx, cy=cy, qfx=qfx, qfy=qfy, cfx=cfx, cfy=cfy,
+               xnx=qx - cx, home_exports_x=home_x, regime=regime)
+    return {k: v[()] for k, v in out.items()}
 
-def rworldprice(mplx, mply, lbar, mplfx, mplfy, lbarf):
+@memoize
+def rworldprice(mplx=None, mply=None, lbar=None, mplfx=None, mplfy=None, lbarf=None,
+                params=DEFAULT_PARAMS, foreign=DEFAULT_FOREIGN):
     '''  World equilibrium price consistent with balanced trade
-    By Walras' law we just need to find price at which excess demand in 
-    one market is eliminated
+    (exact, see rworld_equilibrium; arrays are accepted)
     '''
-    def xsdemand(p):
-        qx, _, cx, _ = openeq(mplx, mply, lbar, p)
-        qfx, _, cfx, _ = openeq(mplfx, mplfy, lbarf, p)
-        return (cx + cfx) - (qx + qfx) 
-    
-    guess = (mply/mplx + mplfy/mplfx)/2 
-    return fsolve(xsdemand, guess)[0]
+    return rworld_equilibrium(mplx, mply, lbar, mplfx, mplfy, lbarf, params, foreign)['p']
     
 
-def rtwopane(mplx=MPLX, mply=MPLY, lbar=LBAR, 
-            mplfx=MPLY, mplfy=MPLX, lbarf=LBAR, p=1):
-    foreign = openrppf
+@hide_from_interact('params', 'foreign')
+def rtwopane(mplx=None, mply=None, lbar=None, 
+            mplfx=None, mplfy=None, lbarf=None, p=1,
+            params=DEFAULT_PARAMS, foreign=DEFAULT_FOREIGN):
     plt.figure(1, figsize =(12,12))
     plt.subplot(121, aspect='equal')
-    openrppf(mplx, mply, lbar, p, title='Home')
+    openrppf(mplx, mply, lbar, p, title='Home', params=params)
     plt.subplot(122, aspect='equal')
-    foreign(mplfx, mplfy, lbarf, p, title='Foreign')
+    openrppf(mplfx, mplfy, lbarf, p, title='Foreign', params=foreign)
     plt.ylabel('')
     
-def rworldeq(mplx=MPLX, mply=MPLY, lbar=LBAR, 
-            mplfx=MPLY, mplfy=MPLX, lbarf=LBAR):
+@hide_from_interact('params', 'foreign')
+def rworldeq(mplx=None, mply=None, lbar=None, 
+            mplfx=None, mplfy=None, lbarf=None,
+            params=DEFAULT_PARAMS, foreign=DEFAULT_FOREIGN):
     
-    pw = rworldprice(mplx, mply, lbar, mplfx, mplfy, lbarf)
-    rtwopane(mplx, mply, lbar, mplfx, mplfy, lbarf, p=pw)
+    eq = rworld_equilibrium(mplx, mply, lbar, mplfx, mplfy, lbarf, params, foreign)
+    pw = eq['p']
+    rtwopane(mplx, mply, lbar, mplfx, mplfy, lbarf, p=pw, params=params, foreign=foreign)
     print(f'Equilibrium world price: {pw:3.2f} units of Y per X')
-    qx, qy, cx, cy = openeq(mplx, mply, lbar, pw)
-    qxf, qyf, cxf, cyf = openeq(mplfx, mplfy, lbarf, pw)
-    print(f'Home Net Exports of X: {qx-cx:3.0f};  Foreign Net Imports of X: {qxf-cxf:3.0f} '  )
+    print(f'Home Net Exports of X: {eq["xnx"]:3.0f};  Foreign Net Imports of X: {eq["cfx"]-eq["qfx"]:3.0f} '  )
 
 
+## Many countries, many goods
+#
+# With N countries and M goods the labor-requirement matrix A[i, g] = 1/MPL[i, g]
+# replaces (mplx, mply).  With identical Cobb-Douglas preferences (expenditure
+# shares b) the world equilibrium solves the convex program
+#
+#     min  L.w - b.log(p)    s.t.   p[g] <= A[i, g] * w[i]   for all i, g
+#
+# (p = goods prices, w = wages): the constraint says no country can produce a
+# good below its world price, and its multipliers are the quantities produced.
+# `world_equilibrium` solves it with a primal-dual interior point method whose
+# Newton systems reduce to a min(N, M)-square Schur complement, then snaps the
+# result to the exact specialization pattern.
+
+def labor_requirements(mpl):
+    '''Labor-requirement matrix A = 1/MPL (countries x goods)'''
+    mpl = np.asarray(mpl, dtype=float)
+    if mpl.ndim != 2 or np.any(mpl <= 0):
+        raise ValueError("mpl must be a 2-D array of positive labor productivities")
+    return 1/mpl
+
+def openeq_nm(mpl, lbar, prices):
+    '''openeq for many goods: each country puts all its labor into the good
+    that pays the highest wage, prices[g]*mpl[i, g].  Returns (Q, wages).'''
+    mpl = np.asarray(mpl, dtype=float)
+    lbar = np.asarray(lbar, dtype=float)
+    value = np.asarray(prices, dtype=float)*mpl
+    best = np.argmax(value, axis=1)
+    rows = np.arange(mpl.shape[0])
+    Q = np.zeros_like(mpl)
+    Q[rows, best] = mpl[rows, best]*lbar
+    return Q, value[rows, best]
+
+def _ipm_world(A, lbar, b, tol, maxiter):
+    '''Primal-dual interior point iterations for the world program.
+    Returns wages, prices, slacks and quantities of the best iterate (by
+    its largest scaled residual), the iteration count and that residual.
+    Near the solution the Newton system can become too ill-conditioned to
+    make progress; the iterations then stop and the best iterate stands.'''
+    N, M = A.shape
+    m = N*M
+    w = np.ones(N)/lbar.sum()
+    p = 0.5*(A*w[:, None]).min(axis=0)
+    s = A*w[:, None] - p
+    q = 1/(m*s)
+    best, best_err = None, np.inf
+    for it in range(1, maxiter + 1):
+        rs = A*w[:, None] - p - s            # primal residual
+        rw = lbar - (A*q).sum(axis=1)        # labor-market residual
+        rp = b/p - q.sum(axis=0)             # goods-market residual
+        mu = (s*q).sum()/m
+        err = max(mu, np.abs(rw).max()/lbar.max(), np.abs(rp*p).max(), np.abs(rs/p).max())
+        if not np.isfinite(err):
+            break
+        if err < best_err:
+            best, best_err = (w, p, s, q), err
+        if err < tol:
+            break
+        D = q/s
+        C = A*D
+        hww = (A*C).sum(axis=1)
+        # goods market linearized as p*Q = b rather than b/p = Q: the latter
+        # drives the price step into p > 0 and stalls
+        hpp = q.sum(axis=0)/p + D.sum(axis=0)
+        # Newton system  hww*dw - C@dp = rW,  hpp*dp - C.T@dw = rP:
+        # eliminate whichever of w, p is longer and solve for the other
+        if M <= N:
+            schur = np.diag(hpp) - (C.T/hww) @ C
+        else:
+            schur = np.diag(hww) - (C/hpp) @ C.T
+        if not np.all(np.isfinite(schur)):
+            break
+
+        def newton(rc):
+            r = (rc - q*rs)/s
+            rW = (A*r).sum(axis=1) - rw
+            rP = rp - r.sum(axis=0)
+            if M <= N:
+                dp = np.linalg.solve(schur, rP + C.T @ (rW/hww))
+                dw = (rW + C @ dp)/hww
+            else:
+                dw = np.linalg.solve(schur, rW + C @ (rP/hpp))
+                dp = (rP + C.T @ dw)/hpp
+            ds = A*dw[:, None] - dp + rs
+            return dw, dp, ds, (rc - q*ds)/s
+
+        def max_step(dp, ds, dq):
+            step = 1.0
+            for x, dx in ((s, ds), (q, dq), (p, dp)):
+                neg = dx < 0
+                if neg.any():
+                    step = min(step, np.min(-x[neg]/dx[neg]))
+            return step
+
+        # Mehrotra predictor-corrector
+        try:
+            dw, dp, ds, dq = newton(-s*q)
+            step = max_step(dp, ds, dq)
+            mu_aff = ((s + step*ds)*(q + step*dq)).sum()/m
+            sigma = (mu_aff/mu)**3
+            dw, dp, ds, dq = newton(sigma*mu - s*q - ds*dq)
+        except np.linalg.LinAlgError:
+            break
+        step = min(1.0, 0.99*max_step(dp, ds, dq))
+        if step < 1e-12:
+            break                            # stalled against the boundary
+        w, p, s, q = w + step*dw, p + step*dp, s + step*ds, q + step*dq
+    return (*best, it, best_err)
+
+def _snap_world(A, lbar, b, active):
+    '''Exact wages, prices and quantities for a candidate specialization
+    pattern (active[i, g] True if country i may produce good g).  Returns
+    None if the pattern does not support an equilibrium.'''
+    from scipy import sparse
+    from scipy.sparse.csgraph import connected_components, breadth_first_order
+    from scipy.optimize import linprog
+
+    N, M = A.shape
+    if not (active.any(axis=1).all() and active.any(axis=0).all()):
+        return None
+    i, g = np.nonzero(active)
+    logA = np.log(A)
+    graph = sparse.coo_matrix((np.ones(len(i)), (i, N + g)), shape=(N + M, N + M)).tocsr()
+    graph = graph + graph.T
+    ncomp, comp = connected_components(graph, directed=False)
+
+    # wages and prices tie through every active pair: log p[g] = log A[i,g] + log w[i]
+    logv = np.zeros(N + M)
+    for c in range(ncomp):
+        order, pred = breadth_first_order(graph, np.flatnonzero(comp == c)[0], directed=False)
+        for node in order[1:]:
+            parent = pred[node]
+            if node < N:
+                logv[node] = logv[parent] - logA[node, parent - N]
+            else:
+                logv[node] = logv[parent] + logA[parent, node - N]
+    for c in range(ncomp):
+        countries, goods = comp[:N] == c, comp[N:] == c
+        shift = np.log(b[goods].sum()) - np.log((lbar*np.exp(logv[:N]))[countries].sum())
+        logv[np.flatnonzero(comp == c)] += shift
+    w, p = np.exp(logv[:N]), np.exp(logv[N:])
+    _, best_wage = openeq_nm(1/A, lbar, p)
+    if np.any(best_wage > w*(1 + 1e-9)):
+        return None                          # a good outside the pattern pays more
+
+    # quantities on the active pairs: clear labor and goods markets
+    k = len(i)
+    A_eq = sparse.vstack([sparse.coo_matrix((A[i, g], (i, np.arange(k))), shape=(N, k)),
+                          sparse.coo_matrix((np.ones(k), (g, np.arange(k))), shape=(M, k))])
+    lp = linprog(np.zeros(k), A_eq=A_eq, b_eq=np.concatenate([lbar, b/p]),
+                 bounds=(0, None), method='highs')
+    if lp.status != 0:
+        return None
+    Q = np.zeros_like(A)
+    Q[i, g] = lp.x
+    return w, p, Q
+
+def _world_residual(A, lbar, b, w, p, Q):
+    '''Largest violation of the equilibrium conditions, scaled like the
+    interior point test (world income 1): labor and goods market imbalance,
+    the value of output produced at a loss, and the margin by which some
+    country undercuts a good's price.'''
+    cost = A*w[:, None]
+    income = (w*lbar).sum()
+    return max(np.abs((A*Q).sum(axis=1) - lbar).max()/lbar.max(),
+               np.abs(p*Q.sum(axis=0) - b*income).max()/income,
+               (np.clip(cost - p, 0, None)*Q).sum()/income,
+               np.max(1 - cost.min(axis=0)/p, initial=0))
+
+@instrumented
+def world_equilibrium(mpl, lbar, shares=None, numeraire=None, tol=1e-10, maxiter=100):
+    '''Ricardian world equilibrium for N countries and M goods.
+
+    mpl    : (N, M) labor productivities, mpl[i, g] = output of good g per worker in i
+    lbar   : (N,) labor endowments
+    shares : (M,) Cobb-Douglas expenditure shares (default: equal)
+    numeraire : index of the good whose price is 1 (default: world income = 1)
+
+    Returns a dict of arrays: prices (M,), wages (N,), production Q, consumption
+    C, net exports X and labor allocation (all N x M), incomes (N,), whether
+    the solution was snapped to an exact specialization pattern, the
+    number of interior point iterations, the largest scaled violation of the
+    equilibrium conditions (residual) and whether it is below sqrt(tol)
+    (converged).  An unconverged result is returned with a RuntimeWarning;
+    it is not an equilibrium.'''
+    A = labor_requirements(mpl)
+    N, M = A.shape
+    lbar = np.broadcast_to(np.asarray(lbar, dtype=float), (N,))
+    b = np.full(M, 1/M) if shares is None else np.asarray(shares, dtype=float)
+    b = b/b.sum()
+
+    w, p, s, q, nit, _ = _ipm_world(A, lbar, b, tol, maxiter)
+    # candidate patterns: countries within a shrinking margin of the lowest
+    # unit cost of each good, or the complementarity split of the iterates
+    cost = A*w[:, None]
+    margin = cost/cost.min(axis=0) - 1
+    patterns = [margin < gap for gap in (1e-9, 1e-8, 1e-7, 1e-6, 1e-5)]
+    patterns.append(q/q.sum(axis=0) > s/p)
+    for active in patterns:
+        snapped = _snap_world(A, lbar, b, active)
+        if snapped is not None:
+            w, p, Q = snapped
+            break
+    else:
+        Q = q
+    exact = snapped is not None
+    # an interior iterate is only accurate to about sqrt(mu)
+    residual = _world_residual(A, lbar, b, w, p, Q)
+    converged = bool(residual < np.sqrt(tol))
+    note(nit=nit, converged=converged)
+    if not converged:
+        warnings.warn(f'world_equilibrium did not converge: residual {residual:.1e} '
+                      f'after {nit} iterations', RuntimeWarning, stacklevel=3)
+
+    scale = 1.0 if numeraire is None else 1/p[numeraire]
+    w, p = w*scale, p*scale
+    income = w*lbar
+    C = np.outer(income, b/p)
+    return dict(prices=p, wages=w, Q=Q, C=C, X=Q - C, labor=A*Q,
+                income=income, exact=exact, iterations=nit, residual=residual,
+                converged=converged)
 
-    
 
 if __name__ == "__main__":
     print('budget plot')
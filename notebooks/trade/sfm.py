@@ -11,54 +11,120 @@ Created on Mon Oct 3 2019 16 08:57:01 2019
 """
 
 
+from dataclasses import dataclass, replace
+
 import numpy as np
-from scipy.optimize import fsolve
 np.seterr(divide='ignore', invalid='ignore')
-import matplotlib.pyplot as plt
-from ipywidgets import interact, fixed
-import seaborn
-
-plt.style.use('seaborn-colorblind')
-plt.rcParams["figure.figsize"] = [7,7]
-plt.rcParams["axes.spines.right"] = True
-plt.rcParams["axes.spines.top"] = False
-plt.rcParams["font.size"] = 18
-plt.rcParams['axes.grid']=True
-
-Tbar = 100       # Fixed specific land in ag. 
-Kbar = 100       # Fixed specific capital in manuf
-Lbar = 400       # Total number of mobile workers
-LbarMax = 400    # Lbar will be on slider, max value.
+
+from lazy import LazyModule, LazyAttr
+from liveplot import LivePlot, hide_from_interact
+from instrument import instrumented, note
+from memo import memoize
+
+
+def _plot_style(plt):
+    '''Style applied when pyplot is first used (not at import).'''
+    try:
+        plt.style.use('seaborn-v0_8-colorblind')
+    except OSError:                     # matplotlib < 3.6
+        plt.style.use('seaborn-colorblind')
+    plt.rcParams["figure.figsize"] = [7,7]
+    plt.rcParams["axes.spines.right"] = True
+    plt.rcParams["axes.spines.top"] = False
+    plt.rcParams["font.size"] = 18
+    plt.rcParams['axes.grid']=True
+
+# plotting stack loads on the first plot call so the solvers run headless
+plt = LazyModule('matplotlib.pyplot', on_load=_plot_style)
+interact = LazyAttr('ipywidgets', 'interact')
+fixed = LazyAttr('ipywidgets', 'fixed')
+
+@dataclass(frozen=True)
+class SFMParams:
+    '''Parameters of the specific factors model.
+
+    Frozen and hashable, so a scenario can be passed to any solver or plot
+    with params= and used as a memoize key; derive variants with replace():
+        sfmplot(1.5, params=DEFAULT_PARAMS.replace(Tbar=150))
+    Tbar, Kbar: specific land in ag, specific capital in manuf
+    Lbar: mobile workers; LbarMax: right edge of the labor axis in plots
+    alpha, beta: labor shares in ag, manuf'''
+    Tbar: float = 100
+    Kbar: float = 100
+    Lbar: float = 400
+    alpha: float = 0.5
+    beta: float = 0.5
+    LbarMax: float = 400
+
+    def __post_init__(self):
+        if not (0 < self.alpha < 1 and 0 < self.beta < 1):
+            raise ValueError(f"labor shares must be in (0,1), got {self.alpha}, {self.beta}")
+        if min(self.Tbar, self.Kbar, self.Lbar) <= 0:
+            raise ValueError("Endowments must be positive")
+        if self.LbarMax < self.Lbar:
+            raise ValueError(f"LbarMax ({self.LbarMax}) must be at least Lbar ({self.Lbar})")
+
+    def replace(self, **changes):
+        return replace(self, **changes)
+
+    def labor_grid(self, n=None):
+        '''n points on [0, LbarMax) for plotting (default: one per worker)'''
+        n = int(self.LbarMax) if n is None else n
+        return np.linspace(0, self.LbarMax, n, endpoint=False)
+
+    def endowments(self, Lbar=None, Tbar=None, Kbar=None):
+        '''(Lbar, Tbar, Kbar), with explicitly passed values taking precedence'''
+        return (self.Lbar if Lbar is None else Lbar,
+                self.Tbar if Tbar is None else Tbar,
+                self.Kbar if Kbar is None else Kbar)
+
+
+DEFAULT_PARAMS = SFMParams()
+
+# Legacy module-level names (read-only defaults; solvers take params=)
+Tbar = DEFAULT_PARAMS.Tbar       # Fixed specific land in ag. 
+Kbar = DEFAULT_PARAMS.Kbar       # Fixed specific capital in manuf
+Lbar = DEFAULT_PARAMS.Lbar       # Total number of mobile workers
+LbarMax = DEFAULT_PARAMS.LbarMax # Lbar will be on slider, max value.
+alpha, beta = DEFAULT_PARAMS.alpha, DEFAULT_PARAMS.beta  # labor share in ag, manuf
 
 p    = 1.00      # initial rel price of ag goods, p = Pa/Pm
-alpha, beta = 0.5, 0.5  # labor share in ag, manuf
 
-La = np.linspace(1, LbarMax-1,LbarMax)
+La = DEFAULT_PARAMS.labor_grid()
 Lm = Lbar - La
 
-def F(La, Tbar = Tbar):
-    return (Tbar**(1-alpha) * La**alpha)
+def F(La, Tbar=None, params=DEFAULT_PARAMS):
+    Tbar = params.Tbar if Tbar is None else Tbar
+    return (Tbar**(1-params.alpha) * La**params.alpha)
 
-def G(Lm, Kbar =Kbar):
-    return (Kbar**(1-beta) * Lm**beta) 
+def G(Lm, Kbar=None, params=DEFAULT_PARAMS):
+    Kbar = params.Kbar if Kbar is None else Kbar
+    return (Kbar**(1-params.beta) * Lm**params.beta) 
 
-def MPLa(La, Tbar=Tbar):
-    return alpha*Tbar**(1-alpha) * La**(alpha-1)
+def MPLa(La, Tbar=None, params=DEFAULT_PARAMS):
+    Tbar = params.Tbar if Tbar is None else Tbar
+    return params.alpha*Tbar**(1-params.alpha) * La**(params.alpha-1)
 
-def MPLm(Lm, Kbar=Kbar):
-    return beta*Kbar**(1-beta) * Lm**(beta-1)
+def MPLm(Lm, Kbar=None, params=DEFAULT_PARAMS):
+    Kbar = params.Kbar if Kbar is None else Kbar
+    return params.beta*Kbar**(1-params.beta) * Lm**(params.beta-1)
 
-def MPT(La, Tbar=Tbar):
-    return (1-alpha)*Tbar**(-alpha) * La**alpha
+def MPT(La, Tbar=None, params=DEFAULT_PARAMS):
+    Tbar = params.Tbar if Tbar is None else Tbar
+    return (1-params.alpha)*Tbar**(-params.alpha) * La**params.alpha
 
-def MPK(Lm, Kbar=Kbar):
-    return (1-beta)*Kbar**(-beta) * Lm**beta
+def MPK(Lm, Kbar=None, params=DEFAULT_PARAMS):
+    Kbar = params.Kbar if Kbar is None else Kbar
+    return (1-params.beta)*Kbar**(-params.beta) * Lm**params.beta
 
-def ppf(Tbar=Tbar, Kbar=Kbar, Lbar=Lbar):
+@hide_from_interact('params')
+def ppf(Tbar=None, Kbar=None, Lbar=None, params=DEFAULT_PARAMS):
+    Lbar, Tbar, Kbar = params.endowments(Lbar, Tbar, Kbar)
+    La = params.labor_grid()
     plt.xlim(0,300)
     plt.ylim(0,300)
-    Qa = F(La, Tbar) * (La<Lbar)
-    Qm = G(Lm, Kbar) 
+    Qa = F(La, Tbar, params) * (La<Lbar)
+    Qm = G(Lbar - La, Kbar, params)
     plt.title('Production Possibility Frontier')
     plt.xlabel(r'$Q_a$')
     plt.ylabel(r'$Q_m$')
@@ -69,51 +135,162 @@ def ppf(Tbar=Tbar, Kbar=Kbar, Lbar=Lbar):
 LDa = p * MPLa(La) *(La<Lbar)         # for Cobb-Douglas MPL can be written this way
 LDm = MPLm(Lbar-La)
 
-def eqn(p, Lbar=Lbar, Tbar=Tbar, Kbar=Kbar):
-    '''returns numerically found equilibrium labor allocation and wage'''
-    def func(La):
-        return p*MPLa(La, Tbar) - MPLm(Lbar-La, Kbar)
-    Laeq = fsolve(func, 1)[0]
-    return Laeq, p*MPLa(Laeq, Tbar)
+@instrumented
+def labor_allocation(p, Lbar=None, Tbar=None, Kbar=None, tol=1e-12, maxiter=100,
+                     params=DEFAULT_PARAMS):
+    '''Labor in agriculture that clears p*MPLa(La) = MPLm(Lbar-La).
+
+    Vectorized: p, Lbar, Tbar and Kbar may be arrays and are broadcast;
+    endowments not passed and the labor shares come from params.
+    With equal labor shares (alpha == beta) the solution is closed form;
+    otherwise the log of the wage gap is strictly decreasing in La, so a
+    Newton iteration on `log_wage_gap` (with its hand-derived slope, checked
+    against dual.derivative in bench.py), safeguarded by bisection, solves
+    every point at once.
+    The result always lies in (0, Lbar).'''
+    alpha, beta = params.alpha, params.beta
+    p, Lbar, Tbar, Kbar = np.broadcast_arrays(
+        *(np.asarray(x, dtype=float) for x in (p, *params.endowments(Lbar, Tbar, Kbar))))
+    # p*MPLa(La)/MPLm(Lbar-La) = c * La**(alpha-1) / (Lbar-La)**(beta-1)
+    c = p * alpha * Tbar**(1-alpha) / (beta * Kbar**(1-beta))
+    if alpha == beta:
+        r = c**(1/(1-alpha))          # r = La/(Lbar-La)
+        note(nit=0, nfev=1, converged=True)
+        return Lbar * r/(1 + r)
+
+    lo, hi = np.zeros_like(Lbar), Lbar.copy()
+    La = Lbar/2
+    it, done = 0, False
+    for it in range(1, maxiter + 1):
+        g, dg = log_wage_gap(La, p, Lbar, Tbar, Kbar, params, slope=True)
+        lo = np.where(g > 0, La, lo)
+        hi = np.where(g > 0, hi, La)
+        step = La - g/dg
+        step = np.where((step > lo) & (step < hi), step, (lo + hi)/2)
+        done = np.all(np.abs(step - La) <= tol*Lbar)
+        La = step
+        if done:
+            break
+    note(nit=it, nfev=it, converged=bool(done))
+    return La
+
+def log_wage_gap(La, p, Lbar=None, Tbar=None, Kbar=None, params=DEFAULT_PARAMS,
+                 slope=False):
+    '''log(p*MPLa) - log(MPLm): positive while agriculture pays more.
+    Built from the kernels above, so dual.derivative gives its exact slope;
+    slope=True also returns the hand-derived slope labor_allocation uses.'''
+    Lbar, Tbar, Kbar = params.endowments(Lbar, Tbar, Kbar)
+    g = np.log(p*MPLa(La, Tbar, params)) - np.log(MPLm(Lbar-La, Kbar, params))
+    if not slope:
+        return g
+    return g, (params.alpha-1)/La + (params.beta-1)/(Lbar-La)
+
+@memoize
+def eqn(p, Lbar=None, Tbar=None, Kbar=None, params=DEFAULT_PARAMS):
+    '''returns equilibrium labor allocation and wage (vectorized over all arguments)'''
+    Lbar, Tbar, Kbar = params.endowments(Lbar, Tbar, Kbar)
+    Laeq = labor_allocation(p, Lbar, Tbar, Kbar, params=params)[()]
+    return Laeq, p*MPLa(Laeq, Tbar, params)
 
 def u(x,y):
     '''Utility function'''
     return x*y
 
-def XD(p, Lbar = Lbar, Tbar=Tbar, Kbar=Kbar):
+def XD(p, Lbar=None, Tbar=None, Kbar=None, params=DEFAULT_PARAMS):
     '''Cobb-Douglas demand for goods given world prices (national income computed)'''
-    LAe, we = eqn(p, Lbar, Tbar, Kbar)
+    LAe, we = eqn(p, Lbar, Tbar, Kbar, params=params)
+    return demands(p, LAe, Lbar, Tbar, Kbar, params=params)
+
+def demands(p, LAe, Lbar=None, Tbar=None, Kbar=None, params=DEFAULT_PARAMS):
+    '''Cobb-Douglas demand given prices and an already solved labor allocation'''
+    Lbar, Tbar, Kbar = params.endowments(Lbar, Tbar, Kbar)
     # gdp at world prices measured in manuf goods
-    gdp = p*F(LAe, Tbar = Tbar) + G(Lbar -LAe, Kbar=Kbar)
+    gdp = p*F(LAe, Tbar, params) + G(Lbar -LAe, Kbar, params)
     return (1/2)*gdp/p, (1/2)*gdp
 
 def indif(x, ubar):
     return ubar/x 
 
-def p_autarky(Lbar=Lbar, Tbar=Tbar, Kbar=Kbar):
-    '''Find autarky product prices. By Walras' law enough to find price that 
-    sets excess demand in just one market''' 
-    def excessdemandA(p):
-        LAe, _ = eqn(p)
-        QA = F(LAe, Tbar = Tbar)
-        CA, CM = XD(p, Lbar=Lbar) 
-        return QA-CA
-    peq = fsolve(excessdemandA, 1)[0]
-    return peq
-    
-def sfmtrade(p):
+@memoize
+def p_autarky(Lbar=None, Tbar=None, Kbar=None, params=DEFAULT_PARAMS):
+    '''Find autarky product prices (vectorized over the endowments).
+
+    With u = x*y consumers spend equal amounts on both goods, p*QA = QM, and
+    with Cobb-Douglas technology the wage bill in each sector is a fixed share
+    of its revenue, so labor splits as La/Lm = alpha/beta whatever the price.
+    Price and labor allocation then follow in closed form.'''
+    Lbar, Tbar, Kbar = np.broadcast_arrays(
+        *(np.asarray(x, dtype=float) for x in params.endowments(Lbar, Tbar, Kbar)))
+    LAe = params.alpha/(params.alpha + params.beta) * Lbar
+    peq = G(Lbar - LAe, Kbar, params) / F(LAe, Tbar, params)
+    return peq[()]
+
+## N sectors, each with its own specific factor
+
+@instrumented
+def nsector_eqn(p, S, a, Lbar=None, tol=1e-12, maxiter=50, params=DEFAULT_PARAMS):
+    '''Specific-factors equilibrium with N sectors, Q_i = S_i**(1-a_i) * L_i**a_i.
+
+    p holds sector prices along its last axis (any leading axes are price
+    scenarios); S (specific factor endowments) and a (labor shares) are
+    per sector and Lbar broadcasts against the scenarios.  At wage w sector
+    i hires L_i = S_i*(a_i*p_i/w)**(1/(1-a_i)), so labor-market clearing is
+    the single equation sum_i L_i(w) = Lbar.  Its log is a log-sum-exp of
+    functions linear in log w, hence convex and decreasing in log w, and
+    Newton steps on it converge monotonically for every scenario at once.
+    With equal labor shares the first step is exact.
+
+    Returns a dict: wage w, labor L, output Q, rent r per unit of each
+    specific factor, gdp, real_w = w/p_j (the real wage in units of
+    each good), and converged, False for scenarios still moving at maxiter.'''
+    p = np.asarray(p, dtype=float)
+    S, a = np.asarray(S, dtype=float), np.asarray(a, dtype=float)
+    if np.any((a <= 0) | (a >= 1)):
+        raise ValueError('labor shares must be in (0, 1)')
+    logLbar = np.log(params.Lbar if Lbar is None else np.asarray(Lbar, dtype=float))
+    e = 1/(1 - a)                       # labor demand elasticity wrt the wage
+    c = np.log(S) + e*np.log(a*p)       # log L_i = c_i - e_i*log w
+
+    def lse(z):
+        m = z.max(axis=-1, keepdims=True)
+        return (m + np.log(np.exp(z - m).sum(axis=-1, keepdims=True)))[..., 0]
+
+    ebar = np.broadcast_to(e, c.shape).mean(axis=-1)
+    y = (lse(c + (ebar[..., None] - e)*np.log(a*p)) - logLbar)/ebar
+    it, converged = 0, np.zeros(y.shape, dtype=bool)
+    for it in range(1, maxiter + 1):
+        z = c - e*y[..., None]
+        f = lse(z) - logLbar
+        share = np.exp(z - lse(z)[..., None])       # L_i / sum L
+        step = f/(share*e).sum(axis=-1)             # -f/f'
+        y = y + step
+        converged = np.abs(step) <= tol
+        if converged.all():
+            break
+    note(nit=it, nfev=it, converged=bool(converged.all()))
+
+    w = np.exp(y)
+    L = np.exp(c - e*y[..., None])
+    Q = S**(1 - a) * L**a
+    return {'w': w[()], 'L': L, 'Q': Q, 'r': (1 - a)*p*Q/S,
+            'gdp': (p*Q).sum(axis=-1)[()], 'real_w': w[..., None]/p,
+            'converged': converged[()]}
+
+@hide_from_interact('params')
+def sfmtrade(p, params=DEFAULT_PARAMS):
     Ca = np.linspace(0,200,200)
-    LAe, we = eqn(p)
-    X, Y = F(LAe, Tbar = Tbar), G(Lbar -LAe)
+    LAe, we = eqn(p, params=params)
+    X, Y = F(LAe, params=params), G(params.Lbar -LAe, params=params)
+    CX, CY = demands(p, LAe, params=params)
     gdp = p*X + Y
     print(f'(QX, QY) = ({X:3.1f}, {Y:3.1f})')
-    print(f'(CX, CY) = ({XD(p)[0]:3.1f}, {XD(p)[1]:3.1f})')
-    plt.scatter(F(LAe, Tbar), G(Lbar-LAe, Tbar), label='Trade produce')
-    plt.scatter(*XD(p),label='Trade consume', marker='s')
-    plt.scatter(*XD(p_autarky()), marker='x', label='Autarky')
+    print(f'(CX, CY) = ({CX:3.1f}, {CY:3.1f})')
+    plt.scatter(X, Y, label='Trade produce')
+    plt.scatter(CX, CY, label='Trade consume', marker='s')
+    plt.scatter(*XD(p_autarky(params=params), params=params), marker='x', label='Autarky')
     plt.plot([0,gdp/p],[gdp, 0])
-    ppf(100)
-    ub = u(*XD(p))
+    ppf(params=params)
+    ub = u(CX, CY)
     #plt.ylim(0,gdp)
     #plt.xlim(0,gdp)
     plt.xlim(0,300)
@@ -124,20 +301,22 @@ def sfmtrade(p):
     plt.gca().spines['bottom'].set_position('zero')
     plt.gca().spines['left'].set_position('zero')
 
-def sfmtrade3(p):
+@hide_from_interact('params')
+def sfmtrade3(p, params=DEFAULT_PARAMS):
     fig, ax =plt.subplots()
     Ca = np.linspace(0,200,200)
-    LAe, we = eqn(p)
-    X, Y = F(LAe, Tbar = Tbar), G(Lbar -LAe)
+    LAe, we = eqn(p, params=params)
+    X, Y = F(LAe, params=params), G(params.Lbar -LAe, params=params)
+    CX, CY = demands(p, LAe, params=params)
     gdp = p*X + Y
     print(f'(QX, QY) = ({X:3.1f}, {Y:3.1f})')
-    print(f'(CX, CY) = ({XD(p)[0]:3.1f}, {XD(p)[1]:3.1f})')
-    ax.scatter(F(LAe, Tbar), G(Lbar-LAe, Tbar), label='Trade produce')
-    ax.scatter(*XD(p),label='Trade consume', marker='s')
-    ax.scatter(*XD(p_autarky()), marker='x', label='Autarky')
+    print(f'(CX, CY) = ({CX:3.1f}, {CY:3.1f})')
+    ax.scatter(X, Y, label='Trade produce')
+    ax.scatter(CX, CY, label='Trade consume', marker='s')
+    ax.scatter(*XD(p_autarky(params=params), params=params), marker='x', label='Autarky')
     ax.plot([0,gdp/p],[gdp, 0])
-    ppf(100)
-    ub = u(*XD(p))
+    ppf(params=params)
+    ub = u(CX, CY)
     #plt.ylim(0,gdp)
     #plt.xlim(0,gdp)
     ax.set_xlim(0,300)
@@ -149,19 +328,19 @@ def sfmtrade3(p):
     ax.spines['left'].set_position('zero')
 
 
-
-La = np.arange(0, LbarMax)   # this is always over the LbarMax range
-
-def sfmplot(p, Lbar=LbarMax, Tbar=Tbar, Kbar=Kbar, show=True):
-    Lm = Lbar - La
-    Qa = (Tbar**(1-alpha) * La**alpha) * (La<Lbar)
-    Qm = Kbar**(1-beta) * (Lbar - La)**beta
+@hide_from_interact('params')
+def sfmplot(p, Lbar=None, Tbar=None, Kbar=None, show=True, params=DEFAULT_PARAMS):
+    Lbar, Tbar, Kbar = params.endowments(Lbar, Tbar, Kbar)
+    alpha, beta = params.alpha, params.beta
+    La = params.labor_grid()   # always over the LbarMax range
+    Qa = F(La, Tbar, params) * (La<Lbar)
+    Qm = G(Lbar - La, Kbar, params)
     pMPLa = (p * alpha * Qa/La)*(La<Lbar)     # for Cobb-Douglass MPL can be written this way
     MPLm = beta * Qm/(Lbar-La)
-    LA, weq = eqn(p, Lbar, Tbar, Kbar)
+    LA, weq = eqn(p, Lbar, Tbar, Kbar, params=params)
     ymax = 1.0
     plt.ylim(0,ymax)
-    plt.xlim(0,LbarMax)
+    plt.xlim(0,params.LbarMax)
     plt.title('Specific Factors Model')
     plt.plot(La, pMPLa, linewidth = 3, label='AG labor demand')
     plt.plot(La, MPLm, linewidth=3, label ='MF labor demand')
@@ -177,44 +356,172 @@ def sfmplot(p, Lbar=LbarMax, Tbar=Tbar, Kbar=Kbar, show=True):
         print("(La, Lm) = ({0:3.0f}, {1:3.0f})   wage: (w/Pm, w/Pa) =({2:3.2f}, {3:3.2f})"
               .format(LA, Lbar-LA, weq, weq/p))
         print("land rent: (v/Pa, v/Pm) = ({0:3.2f}, {1:3.2f})  capital rental: (r/Pa, r/Pm) = ({2:3.2f}, {3:3.2f})"
-              .format(MPT(LA,Tbar), p*MPT(LA,Tbar), MPK(Lbar-LA,Kbar)/p, MPK(Lbar-LA, Kbar)    )   )
+              .format(MPT(LA,Tbar,params), p*MPT(LA,Tbar,params), MPK(Lbar-LA,Kbar,params)/p, MPK(Lbar-LA, Kbar,params)    )   )
         plt.show()
 
-def sfmplot2(p):
-    sfmplot(1, show=False)
-    sfmplot(p, show=False)
+@hide_from_interact('params')
+def sfmplot2(p, params=DEFAULT_PARAMS):
+    sfmplot(1, show=False, params=params)
+    sfmplot(p, show=False, params=params)
     plt.grid(False)
     if p == 1:
         plt.title('SF Model');
     else:
-        La0, w0 = eqn(1)
+        La0, w0 = eqn(1, params=params)
         plt.scatter(La0,w0*p, s=100, color='black')  #where wage would rise to without labor movement 
         if p>1:
             plt.title(r'$\frac{P_a}{P_m} \uparrow  \rightarrow  \frac{w}{P_m} \uparrow, \frac{w}{P_a} \downarrow $'  );
         elif p<1:
             plt.title(r'$\frac{P_a}{P_m} \downarrow  \rightarrow  \frac{w}{P_m} \downarrow, \frac{w}{P_a} \uparrow $'  );
     plt.show();
+
+
+class SFMPlot(LivePlot):
+    '''sfmplot2 as a diagram that updates in place when p changes:
+           sfm_diagram = SFMPlot()
+           sfm_diagram.interact(p=(0.5, 2, 0.05))
+       The p=1 labor market stays in the background; only the curve,
+       equilibrium and title for the new price are redrawn.'''
+
+    def __init__(self, p=1, Lbar=None, Tbar=None, Kbar=None, ax=None, blit=False,
+                 params=DEFAULT_PARAMS):
+        fig, ax = plt.subplots() if ax is None else (ax.figure, ax)
+        self._base = None
+        self._model = params
+        self._La = params.labor_grid()
+        Lbar, Tbar, Kbar = params.endowments(Lbar, Tbar, Kbar)
+        super().__init__(fig, ax, dict(p=p, Lbar=Lbar, Tbar=Tbar, Kbar=Kbar), blit=blit)
+
+    def _build(self):
+        ax = self.ax
+        ax.set_ylim(0, 1.0)
+        ax.set_xlim(0, self._model.LbarMax)
+        ax.set_xlabel('Labor')
+        ax.set_ylabel('Real wage --' + r'$\frac{w}{p_M}$')
+        self.ag0, self.mf = ax.plot([], [], [], [], linewidth=3)
+        self.eq0 = ax.scatter([0], [0], s=100, color='black')
+        self.w0 = ax.axhline(0, linestyle='dashed')
+        self.lbar = ax.axvline(0, linewidth=3)
+        self.la0, = ax.plot([], [], linestyle='dashed')
+        self.ag = self._animate(*ax.plot([], [], linewidth=3, color='C0'))
+        self.eq = self._animate(ax.scatter([0, 0], [0, 0], s=100, color='black'))
+        self.w = self._animate(ax.axhline(0, linestyle='dashed'))
+        self.la = self._animate(*ax.plot([], [], linestyle='dashed', color='C2'))
+        self.title = self._animate(ax.title)
+
+    def _set(self, p, Lbar, Tbar, Kbar):
+        params, La = self._model, self._La
+        alpha, beta = params.alpha, params.beta
+        Qa = F(La, Tbar, params) * (La<Lbar)
+        base = (Lbar, Tbar, Kbar)
+        static_changed = base != self._base
+        if static_changed:
+            self._base = base
+            Qm = G(Lbar - La, Kbar, params)
+            LA0, w0 = eqn(1, Lbar, Tbar, Kbar, params=params)
+            self.ag0.set_data(La, (alpha * Qa/La)*(La<Lbar))
+            self.mf.set_data(La, beta * Qm/(Lbar-La))
+            self.eq0.set_offsets([[LA0, w0]])
+            self.w0.set_ydata([w0, w0])
+            self.lbar.set_xdata([Lbar, Lbar])
+            self.la0.set_data([LA0, LA0], [0, w0])
+            self._w0 = LA0, w0
+
+        LA, weq = eqn(p, Lbar, Tbar, Kbar, params=params)
+        LA0, w0 = self._w0
+        self.ag.set_data(La, (p * alpha * Qa/La)*(La<Lbar))
+        self.eq.set_offsets([[LA, weq], [LA0, w0*p]])  # wage without labor movement
+        self.w.set_ydata([weq, weq])
+        self.la.set_data([LA, LA], [0, weq])
+        if p > 1:
+            self.title.set_text(r'$\frac{P_a}{P_m} \uparrow  \rightarrow  \frac{w}{P_m} \uparrow, \frac{w}{P_a} \downarrow $')
+        elif p < 1:
+            self.title.set_text(r'$\frac{P_a}{P_m} \downarrow  \rightarrow  \frac{w}{P_m} \downarrow, \frac{w}{P_a} \uparrow $')
+        else:
+            self.title.set_text('SF Model')
+        return static_changed
         
 
 ## For the tariffs in general equilibrium
 
-def open_trade(p, t=0, dt=False):
-    ppf(100)
+def tariff_equilibrium(p, t=0, Lbar=None, Tbar=None, Kbar=None, subsidy=False,
+                       params=DEFAULT_PARAMS):
+    '''Small open economy with an ad valorem trade tax t on the ag good.
+
+    Vectorized: world prices p, tariffs t and the endowments broadcast, so a
+    whole (p, t) grid is solved in one pass.  Producers face pt = p*(1+t).
+    With subsidy=False this is a tariff: consumers face pt as well and the
+    revenue (pt-p)*M on imports M is rebated lump sum.  With u = x*y half of
+    income I is spent on each good, so the rebate fixed point
+    I = pt*X + Y + (pt-p)*(I/(2*pt) - X) has the closed form
+    I = 2*pt*(p*X + Y)/(pt + p).  A tariff that would push pt past the
+    autarky price is prohibitive: pt stops at p_autarky and trade is zero.
+    With subsidy=True t is a production subsidy paid out of a lump-sum tax,
+    so consumers face p and spend GDP at world prices.
+
+    Returns a dict of arrays: domestic price pt, labor allocation La, wage w,
+    outputs X, Y, consumption CX, CY, imports M of the ag good (negative
+    for exports), tariff revenue, gdp at world prices, income and welfare.'''
+    Lbar, Tbar, Kbar = params.endowments(Lbar, Tbar, Kbar)
+    p, t, Lbar, Tbar, Kbar = np.broadcast_arrays(
+        *(np.asarray(x, dtype=float) for x in (p, t, Lbar, Tbar, Kbar)))
+    pt = p*(1 + t)
+    if not subsidy:
+        pa = p_autarky(Lbar, Tbar, Kbar, params=params)
+        pt = np.where((pt - pa)*(p - pa) <= 0, pa, pt)
+    La = labor_allocation(pt, Lbar, Tbar, Kbar, params=params)
+    X, Y = F(La, Tbar, params), G(Lbar - La, Kbar, params)
+    gdp = p*X + Y                       # national income at world prices
+    pc = p if subsidy else pt           # price consumers face
+    income = gdp if subsidy else 2*pt*gdp/(pt + p)
+    CX, CY = (1/2)*income/pc, (1/2)*income
+    M = CX - X
+    revenue = np.zeros_like(M) if subsidy else (pt - p)*M
+    return {'pt': pt[()], 'La': La[()], 'w': (pt*MPLa(La, Tbar, params))[()],
+            'X': X[()], 'Y': Y[()], 'CX': CX[()], 'CY': CY[()], 'M': M[()],
+            'revenue': revenue[()], 'gdp': gdp[()], 'income': income[()],
+            'welfare': u(CX, CY)[()]}
+
+def optimal_tariff(p, t, Lbar=None, Tbar=None, Kbar=None, params=DEFAULT_PARAMS):
+    '''Welfare-maximizing tariff on the grid t for each world price p.
+
+    Solves tariff_equilibrium on the outer grid of p (and the endowments,
+    which broadcast against p) with the 1-D grid t in one pass.  Returns
+    (t_opt, welfare_opt, welfare) with welfare of shape p.shape + t.shape.
+    For this small economy the optimum is the grid point nearest free
+    trade; the welfare curve shows how fast welfare falls away from it.'''
+    t = np.asarray(t, dtype=float)
+    p, *endow = (x if x is None else np.asarray(x, dtype=float)[..., None]
+                 for x in (p, Lbar, Tbar, Kbar))
+    welfare = tariff_equilibrium(p, t, *endow, params=params)['welfare']
+    best = np.argmax(welfare, axis=-1)
+    return t[best], np.take_along_axis(welfare, best[..., None], -1)[..., 0], welfare
+
+@hide_from_interact('params')
+def open_trade(p, t=0, dt=False, subsidy=False, params=DEFAULT_PARAMS):
+    '''PPF, production, consumption and indifference curve with an import
+    tariff t on the ag good, its revenue rebated to consumers (or, with
+    subsidy=True, a production subsidy t paid out of a lump-sum tax).
+    dt=True also draws the domestic price line pt = p*(1+t): tangent to the
+    PPF at production and, under a tariff, through consumption.'''
+    ppf(params=params)
     Ca = np.linspace(0,250,200)
-    pt = p*(1+t)
-    LAe, we = eqn(pt)
-    X, Y = F(LAe, Tbar = Tbar), G(Lbar -LAe)
-    wgdp = p*X + Y  # gdp at world prices
+    eq = tariff_equilibrium(p, t, subsidy=subsidy, params=params)
+    pt, X, Y, CX, CY = eq['pt'], eq['X'], eq['Y'], eq['CX'], eq['CY']
+    wgdp = eq['gdp']  # gdp at world prices
     dgdp = pt*X + Y
-    plt.scatter(*XD(p,t), marker='o', label='Trade')
+    plt.scatter(CX, CY, marker='o', label='Trade')
     plt.scatter(X,Y, marker='o', label='Trade')
     plt.plot([0,wgdp/p],[wgdp, 0])
-    ub = u(*XD(p,t))
+    ub = eq['welfare']
     plt.ylim(0,300)
     plt.xlim(0,300)
     plt.plot(Ca, indif(Ca, ub))
     if dt:
         plt.plot([0,dgdp/pt],[dgdp, 0], c='g')
+        if not subsidy:     # consumers face pt and spend income incl. the rebate
+            income = eq['income']
+            plt.plot([0,income/pt],[income, 0], c='g', linestyle='dashed')
     plt.grid(False)
     #plt.legend()
     ax = plt.gca()
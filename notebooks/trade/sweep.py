@@ -0,0 +1,410 @@
+# -*- coding: utf-8 -*-
+"""
+Chunked parameter sweeps written to a memory-mapped columnar store.
+
+Sweeping a solver over millions of parameter points as a list of dicts
+does not fit in memory.  `run_sweep` evaluates a vectorized solver chunk
+by chunk and writes each output key into its own ``.npy`` column on disk,
+so memory use is bounded by the chunk size:
+
+    from sweep import run_sweep, open_sweep
+
+    run_sweep('tables.hos_equilibrium', 'hos_sweep',
+              grid={'p': np.geomspace(0.5, 2, 1000),
+                    'Kbar': np.linspace(50, 150, 1000)},
+              fixed={'Lbar': 100, 'alpha': 0.6, 'beta': 0.4})
+
+    res = open_sweep('hos_sweep')      # columns are read-only memmaps
+    res['QA'].reshape(res.shape)       # zero-copy view on the grid
+
+The store is a directory holding ``meta.json``, one ``.npy`` file per input
+and output column and a ``done.npy`` flag per chunk.  A chunk is flagged
+only after its columns are flushed, so rerunning an interrupted sweep with
+the same arguments picks up at the first unfinished chunk.
+
+Vectorized solvers follow the convention of the `tables` adapters: keyword
+arrays in, dict of equally shaped arrays out; tuple results (``sfm.eqn``)
+are named with ``outputs=``.  Solvers listed in `VECTORIZED` get whole
+chunks, scalar solvers that have a batched equivalent with the same result
+keys (see `BATCHED`) are swapped for it, and any other solver is called
+once per point unless ``vectorized=True`` is passed.
+
+Both `run_sweep` and the in-memory `run_parallel` can spread chunks over a
+process pool (``processes=``).  Chunks are submitted a few at a time so
+memory stays bounded, and results are reassembled in sweep order:
+
+    eq = run_parallel('hos.optimize_closed_economy',
+                      grid={'alpha': a, 'beta': b, 'theta': [0.5]},
+                      processes=8, progress=print)
+"""
+
+import dataclasses
+import functools
+import hashlib
+import importlib
+import json
+import multiprocessing
+import os
+import sys
+from collections import deque
+from collections.abc import Mapping
+from typing import Callable, Dict, Optional, Sequence, Union
+
+import numpy as np
+
+META = 'meta.json'
+DONE = 'done.npy'
+SEARCH_PATH = [os.path.dirname(os.path.abspath(__file__))]
+
+# scalar solvers and the vectorized functions that compute the same results
+# (with the same argument names) for whole arrays of parameters, with the
+# result keys to keep so both paths give the same columns
+BATCHED = {
+    'hos.calculate_hos_equilibrium': (
+        'hos.calculate_hos_equilibrium_batch',
+        ('LA', 'KA', 'LM', 'KM', 'QA', 'QM', 'wr', 'ka_ratio', 'km_ratio')),
+    'hos.optimize_closed_economy': ('hos.autarky_equilibrium', None),
+}
+
+# solvers that accept arrays themselves; anything not listed here or in
+# BATCHED is called once per point unless vectorized=True is passed
+VECTORIZED = frozenset({
+    'tables.hos_equilibrium', 'tables.sfm_equilibrium',
+    'hos.calculate_hos_equilibrium_batch', 'hos.calculate_open_equilibrium',
+    'hos.calculate_comparative_statics', 'hos.autarky_equilibrium',
+    'ricardo.rworld_equilibrium', 'ricardo.rworldprice',
+    'sfm.eqn', 'sfm.XD', 'sfm.labor_allocation', 'sfm.p_autarky',
+    'sfm.tariff_equilibrium',
+})
+
+
+@functools.lru_cache(maxsize=None)
+def _resolve_name(name: str):
+    module, _, func = name.rpartition('.')
+    return getattr(importlib.import_module(module), func)
+
+
+def _resolve(solver: Union[str, Callable]):
+    return solver if callable(solver) else _resolve_name(solver)
+
+
+def _plan(solver: Union[str, Callable], vectorized: Optional[bool],
+          outputs: Optional[Sequence[str]]):
+    """Solver to run, whether to call it on whole chunks, and outputs.
+
+    With vectorized=None a scalar solver listed in BATCHED is replaced by
+    its batched version (keeping only the scalar solver's result keys),
+    solvers in VECTORIZED get whole chunks, and anything else is
+    evaluated point by point.
+    """
+    if vectorized is None:
+        name = _solver_name(solver)
+        if name in BATCHED:
+            batched, keys = BATCHED[name]
+            return batched, True, outputs if outputs is not None else keys
+        return solver, name in VECTORIZED, outputs
+    return solver, vectorized, outputs
+
+
+def _solver_name(solver: Union[str, Callable]) -> str:
+    if isinstance(solver, str):
+        return solver
+    return f'{solver.__module__}.{solver.__qualname__}'
+
+
+class SweepResult:
+    """Read access to a sweep store; columns are NumPy memmaps.
+
+    Attributes:
+        path: Store directory
+        meta: Contents of meta.json
+        shape: Grid shape for grid sweeps, (n,) for point sweeps
+        done: Boolean flag per chunk
+    """
+
+    def __init__(self, path: str, mode: str = 'r'):
+        self.path = path
+        with open(os.path.join(path, META)) as f:
+            self.meta = json.load(f)
+        self.shape = tuple(self.meta['shape'])
+        self._mode = mode
+        self._columns = {}
+        self.done = np.load(os.path.join(path, DONE), mmap_mode=mode)
+
+    def __repr__(self):
+        return (f'<SweepResult {self.meta["solver"]} n={self.meta["n"]} '
+                f'{int(self.done.sum())}/{self.done.size} chunks>')
+
+    @property
+    def inputs(self):
+        return list(self.meta['inputs'])
+
+    @property
+    def outputs(self):
+        return list(self.meta['outputs'])
+
+    @property
+    def complete(self) -> bool:
+        return bool(self.done.all())
+
+    def keys(self):
+        return self.inputs + self.outputs
+
+    def __getitem__(self, key: str) -> np.memmap:
+        if key not in self._columns:
+            if key not in self.keys():
+                raise KeyError(key)
+            self._columns[key] = np.load(os.path.join(self.path, f'{key}.npy'),
+                                         mmap_mode=self._mode)
+        return self._columns[key]
+
+    def valid(self) -> np.ndarray:
+        """Boolean mask of rows belonging to finished chunks."""
+        size = self.meta['chunk_size']
+        return np.repeat(np.asarray(self.done), size)[:self.meta['n']]
+
+
+def open_sweep(path: str) -> SweepResult:
+    """Open a sweep store read-only and zero-copy."""
+    return SweepResult(path)
+
+
+def _chunk_inputs(meta, grid, points, start, stop):
+    """Input arrays for rows start:stop of the sweep."""
+    if grid is not None:
+        idx = np.unravel_index(np.arange(start, stop), meta['shape'])
+        return {name: np.asarray(axis, dtype=float)[i] for (name, axis), i in zip(grid.items(), idx)}
+    return {name: np.asarray(values)[start:stop] for name, values in points.items()}
+
+
+def _evaluate(solve, inputs, fixed, vectorized, outputs):
+    """Solver results for one chunk as a dict of 1-d arrays."""
+    with np.errstate(all='ignore'):
+        if vectorized:
+            result = solve(**inputs, **fixed)
+        else:
+            n = len(next(iter(inputs.values())))
+            rows = [solve(**{k: v[i] for k, v in inputs.items()}, **fixed) for i in range(n)]
+            if isinstance(rows[0], Mapping):    # dicts and hos.Record results
+                result = {key: np.array([r[key] for r in rows]) for key in rows[0]}
+            elif np.ndim(rows[0]) == 0:
+                result = [np.array(rows)]
+            else:
+                result = list(np.array(rows).T)
+    if dataclasses.is_dataclass(result):
+        result = {f.name: getattr(result, f.name) for f in dataclasses.fields(result)}
+    elif isinstance(result, np.ndarray) and result.ndim <= 1:
+        result = [result]
+    if not isinstance(result, Mapping):
+        if outputs is None:
+            raise ValueError('solver returned an array or tuple; name its items with outputs=')
+        result = dict(zip(outputs, result))
+    elif outputs is not None:
+        result = {key: result[key] for key in outputs}
+    n = len(next(iter(inputs.values())))
+    return {key: np.broadcast_to(np.asarray(val), (n,)) for key, val in result.items()}
+
+
+def _init_worker(search_path: Sequence[str]):
+    for path in reversed(search_path):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+
+
+def _work(task):
+    solver, inputs, fixed, vectorized, outputs = task
+    return _evaluate(_resolve(solver), inputs, fixed, vectorized, outputs)
+
+
+def _run_tasks(tasks, processes: Optional[int]):
+    """Yield _work(task) for each task, in order.
+
+    processes=0 runs in this process; otherwise a pool of `processes`
+    workers (None = os.cpu_count()) is kept busy with at most two chunks
+    queued per worker, so inputs and results never pile up in memory.
+    """
+    if processes == 0:
+        for task in tasks:
+            yield _work(task)
+        return
+    processes = processes or os.cpu_count()
+    with multiprocessing.Pool(processes, _init_worker, (SEARCH_PATH,)) as pool:
+        pending = deque()
+        for task in tasks:
+            pending.append(pool.apply_async(_work, (task,)))
+            if len(pending) >= 2 * processes:
+                yield pending.popleft().get()
+        while pending:
+            yield pending.popleft().get()
+
+
+def _json_default(value):
+    """JSON form of fixed= values json cannot encode itself: parameter
+    dataclasses (e.g. ``params=sfm.SFMParams(...)``) by their fields."""
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return {type(value).__qualname__: dataclasses.asdict(value)}
+    if isinstance(value, (np.generic, np.ndarray)):
+        return value.tolist()
+    raise TypeError(f'fixed= value {value!r} of type {type(value).__name__} '
+                    'cannot be recorded in meta.json')
+
+
+def _input_hashes(grid, points):
+    """SHA-1 of each grid axis or points= column, so a store is only
+    resumed for the same parameter values."""
+    columns = grid if grid is not None else points
+    return {name: hashlib.sha1(np.ascontiguousarray(values, dtype=float)
+                               .tobytes()).hexdigest()
+            for name, values in columns.items()}
+
+
+def _sweep_size(grid, points):
+    """Shape and input names of a grid= or points= sweep."""
+    if (grid is None) == (points is None):
+        raise ValueError('pass exactly one of grid= or points=')
+    if grid is not None:
+        return [len(axis) for axis in grid.values()], list(grid)
+    lengths = {len(values) for values in points.values()}
+    if len(lengths) != 1:
+        raise ValueError('all points= arrays must have the same length')
+    return [lengths.pop()], list(points)
+
+
+def run_parallel(solver: Union[str, Callable],
+                 grid: Optional[Dict[str, Sequence[float]]] = None,
+                 points: Optional[Dict[str, Sequence[float]]] = None,
+                 fixed: Optional[Dict] = None, outputs: Optional[Sequence[str]] = None,
+                 vectorized: Optional[bool] = None, chunk_size: int = 10_000,
+                 processes: Optional[int] = None,
+                 progress: Optional[Callable[[int, int], None]] = None) -> Dict[str, np.ndarray]:
+    """Evaluate `solver` over a sweep across a process pool, in memory.
+
+    Arguments are as for `run_sweep`; the solver must be importable by the
+    workers (a 'module.function' name or a module-level function).
+
+    Returns:
+        Dict of output arrays with the grid's shape ((n,) for points=)
+    """
+    fixed = dict(fixed or {})
+    solver, vectorized, outputs = _plan(solver, vectorized, outputs)
+    shape, _ = _sweep_size(grid, points)
+    n = int(np.prod(shape))
+    n_chunks = -(-n // chunk_size)
+    meta = {'shape': shape}
+
+    tasks = ((solver, _chunk_inputs(meta, grid, points, start, min(start + chunk_size, n)),
+              fixed, vectorized, outputs) for start in range(0, n, chunk_size))
+    out = None
+    for chunk, result in enumerate(_run_tasks(tasks, processes)):
+        if out is None:
+            out = {key: np.empty(n, dtype=val.dtype) for key, val in result.items()}
+        start = chunk * chunk_size
+        for key, val in result.items():
+            out[key][start:start + len(val)] = val
+        if progress is not None:
+            progress(chunk + 1, n_chunks)
+    return {key: val.reshape(shape) for key, val in out.items()}
+
+
+def _write_chunk(columns, done, chunk, chunk_size, result):
+    """Store one chunk's results, then flag it as done."""
+    start = chunk * chunk_size
+    for key, col in columns.items():
+        col[start:start + len(result[key])] = result[key]
+        col.flush()
+    done[chunk] = True
+    done.flush()
+
+
+def run_sweep(solver: Union[str, Callable], path: str,
+              grid: Optional[Dict[str, Sequence[float]]] = None,
+              points: Optional[Dict[str, Sequence[float]]] = None,
+              fixed: Optional[Dict] = None, outputs: Optional[Sequence[str]] = None,
+              vectorized: Optional[bool] = None, chunk_size: int = 100_000,
+              overwrite: bool = False, processes: Optional[int] = 0,
+              progress: Optional[Callable[[int, int], None]] = None) -> SweepResult:
+    """Evaluate `solver` over a parameter sweep into a columnar store.
+
+    Args:
+        solver: Solver function or its 'module.function' name
+        path: Store directory (created if needed)
+        grid: Axes of a Cartesian grid, swept in C order
+        points: Explicit parameter arrays of equal length (instead of grid)
+        fixed: Arguments held constant
+        outputs: Result keys to keep, or names for a tuple result
+        vectorized: True to call the solver on whole chunks, False once per
+            point; None (default) uses the batched equivalent of a solver
+            listed in BATCHED, whole chunks for one in VECTORIZED and
+            per-point calls otherwise
+        chunk_size: Points evaluated and written per chunk
+        overwrite: Discard an existing store with different settings or
+            input values
+        processes: Worker processes for chunks (0 = this process, the
+            default; None = os.cpu_count())
+        progress: Called as progress(chunks_done, n_chunks) after each chunk
+
+    Returns:
+        SweepResult opened on the finished store
+    """
+    fixed = dict(fixed or {})
+    name = _solver_name(solver)
+    solver, vectorized, outputs = _plan(solver, vectorized, outputs)
+    shape, inputs = _sweep_size(grid, points)
+    n = int(np.prod(shape))
+    n_chunks = -(-n // chunk_size)
+    settings = {'solver': name, 'n': n, 'shape': shape,
+                'chunk_size': chunk_size, 'inputs': inputs,
+                'input_hashes': _input_hashes(grid, points),
+                'fixed': json.loads(json.dumps(fixed, default=_json_default)),
+                'requested_outputs': None if outputs is None else list(outputs),
+                'vectorized': vectorized}
+
+    meta_path = os.path.join(path, META)
+    if os.path.exists(meta_path):
+        with open(meta_path) as f:
+            meta = json.load(f)
+        if any(meta.get(k) != v for k, v in settings.items()):
+            if not overwrite:
+                raise ValueError(f'{path} holds a different sweep; pass overwrite=True to replace it')
+            meta = None
+    else:
+        meta = None
+    os.makedirs(path, exist_ok=True)
+
+    first = None
+    if meta is None:
+        # first chunk decides the output columns and their dtypes
+        first = _evaluate(_resolve(solver),
+                          _chunk_inputs(settings, grid, points, 0, min(chunk_size, n)),
+                          fixed, vectorized, outputs)
+        meta = dict(settings, outputs=list(first))
+        for key in inputs:
+            col = np.lib.format.open_memmap(os.path.join(path, f'{key}.npy'), 'w+', float, (n,))
+            for start in range(0, n, chunk_size):
+                stop = min(start + chunk_size, n)
+                col[start:stop] = _chunk_inputs(settings, grid, points, start, stop)[key]
+            col.flush()
+        for key, val in first.items():
+            np.lib.format.open_memmap(os.path.join(path, f'{key}.npy'), 'w+', val.dtype, (n,)).flush()
+        np.save(os.path.join(path, DONE), np.zeros(n_chunks, dtype=bool))
+        with open(meta_path, 'w') as f:
+            json.dump(meta, f, indent=1)
+
+    columns = {key: np.load(os.path.join(path, f'{key}.npy'), mmap_mode='r+')
+               for key in meta['outputs']}
+    done = np.load(os.path.join(path, DONE), mmap_mode='r+')
+
+    todo = [chunk for chunk in range(n_chunks) if not done[chunk]]
+    if first is not None:
+        todo.remove(0)
+        _write_chunk(columns, done, 0, chunk_size, first)
+    tasks = ((solver, _chunk_inputs(meta, grid, points, c * chunk_size,
+                                    min((c + 1) * chunk_size, n)),
+              fixed, vectorized, outputs) for c in todo)
+    for chunk, result in zip(todo, _run_tasks(tasks, processes)):
+        _write_chunk(columns, done, chunk, chunk_size, result)
+        if progress is not None:
+            progress(int(done.sum()), n_chunks)
+
+    del columns, done
+    return SweepResult(path)
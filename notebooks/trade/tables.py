@@ -0,0 +1,396 @@
+# -*- coding: utf-8 -*-
+"""
+Precomputed lookup tables for solvers that iterate.
+
+A classroom of Voila sessions asks for the same equilibria over and over.
+`build_table` evaluates a vectorized solver once on a rectilinear parameter
+grid and stores the results in a compact ``.npz``; at runtime a
+`LookupTable` answers with multilinear interpolation instead of solving:
+
+    # offline
+    table = build_sfm_table()
+    table.save('sfm_equilibrium.npz')
+
+    # runtime
+    table = tables.load('sfm_equilibrium.npz')
+    eq = table(p=1.1, Tbar=100, Kbar=100, tol=0.05)
+    eq['La'], table.error_bound['La']
+
+A table only pays off when the solver iterates, e.g. sfm.labor_allocation
+with unequal labor shares (Newton).  The closed-form solvers (the HOS
+equilibrium and frontier, the equal-share SFM) are faster to evaluate than
+to look up; `hos_equilibrium` is kept as an adapter for `sweep`.
+
+Every table records an estimate of its interpolation error per output and
+grid cell (measured against the exact solver at the cell centres, where
+multilinear interpolation is least accurate).  Points outside the grid, or
+in cells whose error exceeds the caller's `tol`, are handed to the exact
+solver instead, so a lookup never silently extrapolates.
+
+``python tables.py [outdir]`` builds the default table.
+"""
+
+import bisect
+import importlib
+import itertools
+import json
+import math
+import os
+import sys
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+
+def _resolve(name: str):
+    module, _, func = name.rpartition('.')
+    return getattr(importlib.import_module(module), func)
+
+
+# ============================================================================
+# Solver adapters (vectorized, keyword arguments in, dict of arrays out)
+# ============================================================================
+
+HOS_OUTPUTS = ('LA', 'KA', 'LM', 'KM', 'QA', 'QM', 'wr')
+
+
+def hos_equilibrium(p, Kbar, Lbar, alpha, beta):
+    """hos.calculate_hos_equilibrium_batch as a dict of the numeric outputs."""
+    import hos
+    res = hos.calculate_hos_equilibrium_batch(p, Kbar, Lbar, alpha, beta)
+    out = {key: res[key] for key in HOS_OUTPUTS}
+    out['in_cone'] = res.in_cone
+    return out
+
+
+def sfm_equilibrium(p, Lbar, Tbar, Kbar, alpha=0.5, beta=0.5):
+    """sfm.eqn and sfm.XD in one call: labor allocation, wage and demands."""
+    import sfm
+    params = sfm.SFMParams(alpha=alpha, beta=beta)
+    La = sfm.labor_allocation(p, Lbar, Tbar, Kbar, params=params)
+    CA, CM = sfm.demands(p, La, Lbar, Tbar, Kbar, params=params)
+    return {'La': La, 'w': p * sfm.MPLa(La, Tbar, params), 'CA': CA, 'CM': CM}
+
+
+# ============================================================================
+# Tables
+# ============================================================================
+
+class LookupTable:
+    """Tabulated solver outputs on a rectilinear grid.
+
+    Args:
+        solver: Exact solver as 'module.function'; it must accept the axis
+            names (plus `fixed`) as keyword arrays and return a dict of arrays
+        axes: Grid points per argument, in order (each strictly increasing)
+        values: Output arrays of shape (len(axis) for each axis)
+        fixed: Arguments held constant over the whole table
+        log_axes: Axes interpolated in log space (for power-law dependence)
+        error_bound: Estimated worst-case interpolation error per output
+        cell_error: Estimated interpolation error per output and grid cell
+            (arrays of shape (len(axis) - 1 for each axis)); defaults to
+            error_bound everywhere
+    """
+
+    def __init__(self, solver: str, axes: Dict[str, np.ndarray],
+                 values: Dict[str, np.ndarray], fixed: Optional[Dict] = None,
+                 log_axes: Sequence[str] = (),
+                 error_bound: Optional[Dict[str, float]] = None,
+                 cell_error: Optional[Dict[str, np.ndarray]] = None):
+        self.solver = solver
+        self.axes = {name: np.asarray(grid, dtype=float) for name, grid in axes.items()}
+        self.values = values
+        self.fixed = dict(fixed or {})
+        self.log_axes = tuple(log_axes)
+        self.error_bound = dict(error_bound or {})
+        self._solve = _resolve(solver)
+        self._coords = [np.log(grid) if name in self.log_axes else grid
+                        for name, grid in self.axes.items()]
+        self._coord_lists = [c.tolist() for c in self._coords]
+        # outputs side by side, one row per grid node, so each corner of a
+        # cell is a single row gather at a flat offset
+        shape = tuple(len(g) for g in self.axes.values())
+        self._flat = np.stack(list(values.values()), axis=-1).reshape(-1, len(values))
+        self._strides = [int(np.prod(shape[j + 1:])) for j in range(len(shape))]
+        self._corners = [(corner, sum(c * s for c, s in zip(corner, self._strides)))
+                         for corner in itertools.product((0, 1), repeat=len(shape))]
+        cells = tuple(n - 1 for n in shape)
+        if cell_error is None:
+            cell_error = {key: np.full(cells, self.error_bound.get(key, np.inf)) for key in values}
+        self.cell_error = cell_error
+        # worst output per cell, for a scalar `tol`
+        self._cell_worst = np.max([np.asarray(cell_error[key], dtype=float).reshape(-1)
+                                   for key in values], axis=0)
+        self._cell_strides = [int(np.prod(cells[j + 1:])) for j in range(len(cells))]
+
+    def __repr__(self):
+        shape = 'x'.join(str(len(g)) for g in self.axes.values())
+        return f'<LookupTable {self.solver} over {", ".join(self.axes)} ({shape})>'
+
+    @property
+    def outputs(self):
+        return list(self.values)
+
+    def exact(self, **kwargs) -> Dict[str, np.ndarray]:
+        """Call the underlying solver."""
+        return self._solve(**kwargs, **self.fixed)
+
+    def in_range(self, **kwargs) -> np.ndarray:
+        """Boolean mask of points inside the tabulated grid."""
+        args = np.broadcast_arrays(*(np.asarray(kwargs[n], dtype=float) for n in self.axes))
+        inside = np.ones(args[0].shape, dtype=bool)
+        for x, grid in zip(args, self.axes.values()):
+            inside &= (x >= grid[0]) & (x <= grid[-1])
+        return inside
+
+    def _locate(self, args):
+        """Flat index of each point's cell (node and cell numbering) and the
+        fractional position along each axis."""
+        node = cell = 0
+        weight = []
+        for x, name, coords, stride, cstride in zip(args, self.axes, self._coords,
+                                                    self._strides, self._cell_strides):
+            x = np.log(x) if name in self.log_axes else x
+            i = np.clip(np.searchsorted(coords, x, side='right') - 1, 0, len(coords) - 2)
+            node = node + i * stride
+            cell = cell + i * cstride
+            weight.append((x - coords[i]) / (coords[i + 1] - coords[i]))
+        return node, cell, weight
+
+    def _combine(self, node, weight):
+        total = 0.0
+        for corner, offset in self._corners:
+            w = 1.0
+            for c, t in zip(corner, weight):
+                w = w * (t if c else 1 - t)
+            total = total + w[..., None] * self._flat[node + offset]
+        return total
+
+    def interpolate(self, **kwargs) -> Dict[str, np.ndarray]:
+        """Multilinear interpolation; points must lie inside the grid."""
+        args = np.broadcast_arrays(*(np.asarray(kwargs[n], dtype=float) for n in self.axes))
+        node, _, weight = self._locate(args)
+        total = self._combine(node, weight)
+        return {key: total[..., k] for k, key in enumerate(self.values)}
+
+    def _too_coarse(self, cell, tol) -> np.ndarray:
+        """True where a cell's estimated error exceeds `tol` for some output."""
+        if isinstance(tol, dict):
+            return np.any([np.asarray(self.cell_error[key]).reshape(-1)[cell] > t
+                           for key, t in tol.items()], axis=0)
+        return self._cell_worst[cell] > tol
+
+    def _lookup_scalar(self, values, tol):
+        """`__call__` for one point: plain-float cell search and one gather."""
+        node = cell = 0
+        weight = []
+        for x, name, coords, stride, cstride in zip(values, self.axes, self._coord_lists,
+                                                    self._strides, self._cell_strides):
+            if name in self.log_axes:
+                if x <= 0:
+                    return None
+                x = math.log(x)
+            if not coords[0] <= x <= coords[-1]:
+                return None
+            i = min(bisect.bisect_right(coords, x) - 1, len(coords) - 2)
+            node += i * stride
+            cell += i * cstride
+            weight.append((x - coords[i]) / (coords[i + 1] - coords[i]))
+        if tol is not None and self._too_coarse(cell, tol):
+            return None
+        w = [math.prod(t if c else 1 - t for c, t in zip(corner, weight))
+             for corner, _ in self._corners]
+        row = np.dot(w, self._flat[[node + offset for _, offset in self._corners]])
+        if np.isnan(row).any():
+            return None
+        return {key: row[k] for k, key in enumerate(self.values)}
+
+    def __call__(self, tol=None, **kwargs) -> Dict[str, np.ndarray]:
+        """Look up outputs, solving exactly wherever the table cannot answer.
+
+        Args:
+            tol: Largest acceptable interpolation error, either one number
+                for every output or a dict {output: tol}.  Points in cells
+                whose estimated error exceeds it are solved exactly.
+            **kwargs: One value or array per table axis (broadcast together)
+
+        Returns:
+            Dict of output arrays (NumPy scalars for scalar input)
+        """
+        missing = set(self.axes) - set(kwargs)
+        if missing:
+            raise TypeError(f'missing table arguments: {", ".join(sorted(missing))}')
+        values = [kwargs[n] for n in self.axes]
+        if all(isinstance(v, (int, float)) for v in values):
+            out = self._lookup_scalar(values, tol)
+            if out is not None:
+                return out
+
+        args = dict(zip(self.axes, np.broadcast_arrays(
+            *(np.asarray(kwargs[n], dtype=float) for n in self.axes))))
+        inside = self.in_range(**args)
+        out = {key: np.full(inside.shape, np.nan) for key in self.values}
+        if inside.any():
+            node, cell, weight = self._locate([a[inside] for a in args.values()])
+            total = self._combine(node, weight)
+            ok = np.ones(total.shape[:-1], dtype=bool)
+            if tol is not None:
+                ok = ~self._too_coarse(cell, tol)
+            for k, key in enumerate(self.values):
+                out[key][inside] = np.where(ok, total[..., k], np.nan)
+
+        # outside the grid, in a cell too coarse for tol, or next to an
+        # entry the table left blank
+        solve = ~inside | np.any([np.isnan(val) for val in out.values()], axis=0)
+        if solve.any():
+            with np.errstate(all='ignore'):
+                exact = self.exact(**{n: a[solve] for n, a in args.items()})
+            for key in out:
+                out[key][solve] = exact[key]
+        if inside.ndim == 0:
+            return {key: val[()] for key, val in out.items()}
+        return out
+
+    def save(self, path: str):
+        """Write the table to a single .npz file."""
+        meta = {'solver': self.solver, 'axes': list(self.axes), 'outputs': self.outputs,
+                'fixed': self.fixed, 'log_axes': list(self.log_axes),
+                'error_bound': self.error_bound}
+        arrays = {f'axis_{name}': grid for name, grid in self.axes.items()}
+        arrays.update({f'value_{key}': val for key, val in self.values.items()})
+        arrays.update({f'cellerror_{key}': val for key, val in self.cell_error.items()})
+        np.savez(path, meta=json.dumps(meta), **arrays)
+
+
+def load(path: str) -> LookupTable:
+    """Read a table written by LookupTable.save."""
+    with np.load(path) as data:
+        meta = json.loads(str(data['meta']))
+        axes = {name: data[f'axis_{name}'] for name in meta['axes']}
+        values = {key: data[f'value_{key}'] for key in meta['outputs']}
+        cell_error = None
+        if all(f'cellerror_{key}' in data for key in meta['outputs']):
+            cell_error = {key: data[f'cellerror_{key}'] for key in meta['outputs']}
+    return LookupTable(meta['solver'], axes, values, meta['fixed'],
+                       meta['log_axes'], meta['error_bound'], cell_error)
+
+
+def build_table(solver: str, axes: Dict[str, Sequence[float]],
+                fixed: Optional[Dict] = None, log_axes: Sequence[str] = (),
+                outputs: Optional[Sequence[str]] = None, valid: Optional[str] = None,
+                dtype=np.float64,
+                max_checks: int = 100_000, seed: int = 0) -> LookupTable:
+    """Tabulate a vectorized solver over the Cartesian product of `axes`.
+
+    Args:
+        solver: Exact solver as 'module.function'
+        axes: Grid points per argument
+        fixed: Arguments held constant
+        log_axes: Axes to interpolate in log space
+        outputs: Keys of the solver's result to keep (default: all)
+        valid: Key of a boolean result marking where the solution is
+            economically meaningful (e.g. 'in_cone' for HOS); it is not
+            tabulated and the error bound is measured only where it holds
+        dtype: Storage type for the tabulated values (float32 halves the size)
+        max_checks: Cells checked against the exact solver when estimating
+            the error (a random sample if there are more)
+        seed: Seed for that sample
+
+    Returns:
+        LookupTable with error_bound filled in
+    """
+    fixed = dict(fixed or {})
+    solve = _resolve(solver)
+    grids = {name: np.asarray(grid, dtype=float) for name, grid in axes.items()}
+    for name, grid in grids.items():
+        if grid.ndim != 1 or grid.size < 2 or np.any(np.diff(grid) <= 0):
+            raise ValueError(f'axis {name!r} must be a strictly increasing 1-d grid')
+
+    mesh = np.meshgrid(*grids.values(), indexing='ij')
+    with np.errstate(all='ignore'):
+        result = solve(**dict(zip(grids, mesh)), **fixed)
+    keys = list(outputs or (key for key in result if key != valid))
+    values = {key: np.broadcast_to(result[key], mesh[0].shape).astype(dtype) for key in keys}
+    table = LookupTable(solver, grids, values, fixed, log_axes)
+
+    # probe each cell at its centre and at the midpoints of the edges through
+    # its lowest and highest corners (in interpolation coordinates): the
+    # error peaks at the centre, but curvatures along different axes can
+    # cancel there and not on the edges
+    n_cells = [len(g) - 1 for g in grids.values()]
+    rng = np.random.default_rng(seed)
+    if np.prod(n_cells) <= max_checks:
+        cells = np.meshgrid(*(np.arange(n) for n in n_cells), indexing='ij')
+        cells = [c.ravel() for c in cells]
+    else:
+        cells = [rng.integers(0, n, max_checks) for n in n_cells]
+    d = len(grids)
+    probes = [(0.5,) * d] + [tuple(0.5 if j == k else end for j in range(d))
+                             for k in range(d) for end in (0.0, 1.0)]
+    errors = {key: np.zeros(len(cells[0])) for key in keys}
+    for frac in probes:
+        point = {}
+        for (name, coords), i, t in zip(zip(grids, table._coords), cells, frac):
+            x = (1 - t) * coords[i] + t * coords[i + 1]
+            point[name] = np.exp(x) if name in table.log_axes else x
+        with np.errstate(all='ignore'):
+            exact = solve(**point, **fixed)
+        approx = table.interpolate(**point)
+        use = np.ones(len(cells[0]), dtype=bool)
+        if valid is not None:
+            use = np.broadcast_to(exact[valid], use.shape)
+        for key in keys:
+            err = np.where(use, np.abs(approx[key] - exact[key]), 0.0)
+            errors[key] = np.fmax(errors[key], np.nan_to_num(err, nan=np.inf))
+
+    flat_cell = np.ravel_multi_index(cells, n_cells)
+    cell_error = {}
+    for key in keys:
+        table.error_bound[key] = float(np.max(errors[key][np.isfinite(errors[key])], initial=0.0))
+        # unchecked cells (when sampling) get the table-wide estimate
+        cell = np.full(int(np.prod(n_cells)), table.error_bound[key], dtype=np.float32)
+        cell[flat_cell] = errors[key]
+        cell_error[key] = cell.reshape(n_cells)
+    return LookupTable(solver, grids, values, fixed, log_axes, table.error_bound, cell_error)
+
+
+# ============================================================================
+# Default tables
+# ============================================================================
+
+def build_sfm_table(n: int = 201, m: int = 31, Lbar: Optional[float] = None,
+                    alpha: Optional[float] = None,
+                    beta: Optional[float] = None) -> LookupTable:
+    """SFM labor allocation, wage and demands over price and the specific factors.
+
+    Lbar and the labor shares default to sfm.DEFAULT_PARAMS.  With unequal
+    labor shares sfm.labor_allocation iterates (Newton), which is where a
+    lookup beats solving; with equal shares (the default) the closed form is
+    faster than any table.
+
+    p runs over 0.1..4 (n points) and Tbar, Kbar over 50..200 (m points
+    each), all spaced and interpolated in log space.  At the default sizes
+    the estimated error is about 0.03 workers in La (Lbar = 400), 2e-4 in w
+    and 0.15 in CA; `error_bound` holds the measured values.
+    """
+    import sfm
+    defaults = sfm.DEFAULT_PARAMS
+    fixed = {'Lbar': defaults.Lbar if Lbar is None else Lbar,
+             'alpha': defaults.alpha if alpha is None else alpha,
+             'beta': defaults.beta if beta is None else beta}
+    return build_table('tables.sfm_equilibrium',
+                       {'p': np.geomspace(0.1, 4, n),
+                        'Tbar': np.geomspace(50, 200, m),
+                        'Kbar': np.geomspace(50, 200, m)},
+                       fixed=fixed, log_axes=('p', 'Tbar', 'Kbar'), dtype=np.float32)
+
+
+if __name__ == "__main__":
+    outdir = sys.argv[1] if len(sys.argv) > 1 else '.'
+    os.makedirs(outdir, exist_ok=True)
+    for name, build in [('sfm_equilibrium', build_sfm_table)]:
+        table = build()
+        path = os.path.join(outdir, f'{name}.npz')
+        table.save(path)
+        bounds = ', '.join(f'{k} {v:.1e}' for k, v in table.error_bound.items())
+        print(f'{path}: {table!r}  {os.path.getsize(path) / 2**20:.1f} MB  error bound {bounds}')